@@ -0,0 +1,101 @@
+"""
+Perbandingan encoding chart Vision AI (offline, tanpa network).
+
+Untuk setiap ukuran target, render beberapa chart sampel dari data sintetis seperti bot
+(PatternRecognizer.render_chart_png pada DPI chart_render_dpi), lalu encode dengan setiap format.
+Baseline "original png" = render lama (CHART_RENDER_DPI, PNG apa adanya). Laporan per opsi: bytes file,
+bytes base64 (yang benar-benar dikirim di request), rasio vs original, median durasi render & encode.
+"""
+import base64
+import logging
+import statistics
+import time
+from collections import deque
+
+import config
+from benchmarks import synthetic
+
+SAMPLE_VOLATILITY = (0.001, 0.003, 0.008)  # Chart tenang -> sangat volatil
+
+
+def render_samples(n, max_side):
+    """Return (list PNG bytes, median detik render) untuk n chart sintetis pada ukuran target max_side."""
+    logging.disable(logging.INFO)  # Tetap berlaku walau setup_logger() men-set level INFO saat import
+    from src.modules.market_data import MarketDataManager
+    from src.modules.pattern_recognizer import PatternRecognizer, chart_render_dpi
+
+    dpi = chart_render_dpi(max_side)
+    md = MarketDataManager(exchange=None)
+    pr = PatternRecognizer(md)
+    symbol = config.BTC_SYMBOL
+    samples, times = [], []
+    for i in range(n):
+        bars = synthetic.make_ohlcv(config.LIMIT_SETUP, interval_ms=3_600_000, seed=synthetic.SEED + i,
+                                    volatility=SAMPLE_VOLATILITY[i % len(SAMPLE_VOLATILITY)])
+        md.market_store[symbol][config.TIMEFRAME_SETUP] = deque(bars, maxlen=config.LIMIT_SETUP)
+        start = time.perf_counter()
+        png, _ = pr.render_chart_png(symbol, dpi=dpi)
+        times.append(time.perf_counter() - start)
+        if png:
+            samples.append(png)
+    return samples, statistics.median(times)
+
+
+def compare(samples_by_size, formats, quality, colors, repeat=5):
+    """
+    samples_by_size: {'original' | max_side: (list PNG, median detik render)}.
+    Return list baris hasil (dict) per opsi encoding.
+    """
+    from src.utils.chart_encoding import encode_chart
+
+    base_pngs, base_render = samples_by_size['original']
+    original = statistics.mean(len(png) for png in base_pngs)
+    rows = [{
+        'option': 'original png', 'bytes': original, 'b64_bytes': len(base64.b64encode(b'\0' * int(original))),
+        'ratio': 1.0, 'render_ms': base_render * 1000, 'encode_ms': 0.0
+    }]
+    for size, (samples, render_s) in samples_by_size.items():
+        if size == 'original':
+            continue
+        for fmt in formats:
+            sizes_b, times = [], []
+            for png in samples:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    data, _ = encode_chart(png, fmt, max_side=size, quality=quality, colors=colors)
+                    times.append(time.perf_counter() - start)
+                sizes_b.append(len(data))
+            avg = statistics.mean(sizes_b)
+            rows.append({
+                'option': f"{fmt} @{size or 'full'}",
+                'bytes': avg,
+                'b64_bytes': len(base64.b64encode(b'\0' * int(avg))),
+                'ratio': avg / original,
+                'render_ms': render_s * 1000,
+                'encode_ms': statistics.median(times) * 1000,
+            })
+    return rows
+
+
+def run(samples=6, formats=None, sizes=None, quality=None, colors=None, repeat=5):
+    """Cetak tabel perbandingan. Return exit code."""
+    from src.utils.chart_encoding import FORMATS
+    formats = formats or list(FORMATS)
+    sizes = sizes or [768, 512]
+    quality = quality or getattr(config, 'CHART_IMAGE_QUALITY', 80)
+    colors = colors or getattr(config, 'CHART_IMAGE_COLORS', 64)
+
+    samples_by_size = {'original': render_samples(samples, 0)}
+    for size in sizes:
+        samples_by_size[size] = render_samples(samples, size)
+    if not all(pngs for pngs, _ in samples_by_size.values()):
+        print("❌ Gagal render chart sampel (cek pandas_ta / mplfinance).")
+        return 1
+
+    print(f"🖼️ Chart encoding ({samples} sampel, quality={quality}, colors={colors}, repeat={repeat})")
+    print(f"\n{'option':<22} {'bytes':>10} {'base64':>10} {'vs orig':>8} {'render':>10} {'encode':>10}")
+    for row in compare(samples_by_size, formats, quality, colors, repeat):
+        print(f"{row['option']:<22} {row['bytes']:>10,.0f} {row['b64_bytes']:>10,.0f} "
+              f"{row['ratio']:>7.0%} {row['render_ms']:>8.1f}ms {row['encode_ms']:>8.2f}ms")
+    print(f"\nConfig aktif: {getattr(config, 'CHART_IMAGE_FORMAT', 'png_palette')} @{getattr(config, 'CHART_IMAGE_MAX_SIDE', 512)}")
+    return 0
@@ -0,0 +1,475 @@
+"""
+Benchmark suite untuk hot path bot (standalone, tanpa network & tanpa API key).
+
+Usage (dari root repo):
+    python -m benchmarks run                          # jalankan semua benchmark
+    python -m benchmarks run -k order_book            # filter nama (substring)
+    python -m benchmarks run --save benchmarks/baselines/local.json
+    python -m benchmarks run --baseline benchmarks/baselines/local.json --tolerance 0.15
+    python -m benchmarks compare OLD.json NEW.json --tolerance 0.15
+    python -m benchmarks startup --budget 2.0          # import-time report + cold-start budget
+    python -m benchmarks charts --sizes 768 512        # bytes & durasi render/encode chart Vision per format
+
+Setiap case punya setup (di luar pengukuran) yang mengembalikan callable (sync / async).
+Hasil panggilan pertama divalidasi (`check`, default: bukan None); case yang error / hasilnya tidak
+valid ditandai gagal dan tidak diukur. Callable dipanggil `warmup` kali lalu diukur `repeat` kali;
+median dipakai untuk perbandingan. Baseline tidak disimpan jika ada case yang gagal.
+Exit code 1 jika ada case gagal atau lebih lambat dari baseline melebihi tolerance.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Path setup sama seperti src/main.py (import config & src.*)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+for _p in (ROOT_DIR, SRC_DIR):
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+import config  # noqa: E402
+from benchmarks import synthetic  # noqa: E402
+
+BENCHMARKS = {}
+
+
+def _not_none(result):
+    return result is not None
+
+
+def benchmark(name, ops=1, check=_not_none):
+    """
+    Daftarkan setup function. `ops` = jumlah operasi per panggilan (untuk kolom per-op).
+    `check(result) -> bool` memvalidasi hasil panggilan (case gagal jika False).
+    """
+    def decorator(setup_fn):
+        BENCHMARKS[name] = {'setup': setup_fn, 'ops': ops, 'check': check}
+        return setup_fn
+    return decorator
+
+
+# ==========================================
+# SHARED FIXTURES
+# ==========================================
+ALT_SYMBOL = next((c['symbol'] for c in config.DAFTAR_KOIN if c['symbol'] != config.BTC_SYMBOL), config.BTC_SYMBOL)
+
+
+def _fill_market_store(md):
+    """Isi market_store semua simbol dengan OHLCV sintetis (BTC & ALT berkorelasi)."""
+    from collections import deque
+    for i, symbol in enumerate(md.market_store):
+        btc_trend, alt_trend = synthetic.make_correlated_ohlcv(config.LIMIT_TREND, interval_ms=3_600_000, seed=synthetic.SEED + i)
+        md.market_store[symbol] = {
+            config.TIMEFRAME_EXEC: deque(synthetic.make_ohlcv(config.LIMIT_EXEC, interval_ms=900_000, seed=synthetic.SEED + i), maxlen=config.LIMIT_EXEC),
+            config.TIMEFRAME_TREND: deque(btc_trend if symbol == config.BTC_SYMBOL else alt_trend, maxlen=config.LIMIT_TREND),
+            config.TIMEFRAME_SETUP: deque(synthetic.make_ohlcv(config.LIMIT_SETUP, interval_ms=1_800_000, seed=synthetic.SEED + i), maxlen=config.LIMIT_SETUP),
+        }
+
+
+_CLEANUP = []
+
+
+def _market_data():
+    from src.modules.market_data import MarketDataManager
+    md = MarketDataManager(exchange=None)
+    if md.exchange_public is not None:
+        _CLEANUP.append(md.exchange_public.close)
+    _fill_market_store(md)
+    return md
+
+
+def _loaded_book(md, symbol):
+    book = md.order_books[symbol]
+    snapshot = synthetic.make_depth_snapshot()
+    book.load_snapshot(snapshot)
+    return book, snapshot
+
+
+# ==========================================
+# CASES
+# ==========================================
+@benchmark("tech_data_threaded", check=lambda r: isinstance(r, dict) and 'rsi' in r)
+def bench_tech_data():
+    from src.modules.market_data import _calculate_tech_data_threaded
+    bars_exec = synthetic.make_ohlcv(config.LIMIT_EXEC, interval_ms=900_000)
+    bars_trend = synthetic.make_ohlcv(config.LIMIT_TREND, interval_ms=3_600_000, seed=synthetic.SEED + 7)
+    return lambda: _calculate_tech_data_threaded(bars_exec, bars_trend, ALT_SYMBOL)
+
+
+@benchmark("market_structure_static")
+def bench_market_structure():
+    from src.modules.market_data import _calculate_market_structure_static
+    bars = synthetic.make_ohlcv(config.LIMIT_TREND, interval_ms=3_600_000)
+    return lambda: _calculate_market_structure_static(bars, lookback=5)
+
+
+@benchmark("btc_correlation", check=lambda r: isinstance(r, float) and -1.0 <= r <= 1.0)
+def bench_btc_correlation():
+    md = _market_data()
+    return lambda: md.get_btc_correlation(ALT_SYMBOL)
+
+
+@benchmark("order_book_diff_apply", ops=100)
+def bench_order_book_update():
+    md = _market_data()
+    book, snapshot = _loaded_book(md, config.BTC_SYMBOL)
+    diffs = synthetic.make_depth_diffs(100, snapshot)
+
+    async def run():
+        book.load_snapshot(snapshot)
+        md.ob_cache.pop(config.BTC_SYMBOL, None)
+        for payload in diffs:
+            await md._handle_depth_update(payload)
+        return md.ob_cache.get(config.BTC_SYMBOL)
+    return run
+
+
+@benchmark("get_order_book_depth", ops=1000, check=lambda r: isinstance(r, dict) and 'imbalance_pct' in r)
+def bench_order_book_depth():
+    md = _market_data()
+    book, _ = _loaded_book(md, config.BTC_SYMBOL)
+    md._update_ob_features(config.BTC_SYMBOL, book)
+
+    async def run():
+        depth = None
+        for _ in range(1000):
+            depth = await md.get_order_book_depth(config.BTC_SYMBOL)
+        return depth
+    return run
+
+
+def _sentiment_with_news(n=200):
+    from src.modules.sentiment import SentimentAnalyzer
+    sa = SentimentAnalyzer()
+    keywords = list(getattr(config, 'MACRO_KEYWORDS', []))
+    for coin in config.DAFTAR_KOIN:
+        keywords += coin.get('keywords', [])
+    sa.raw_news = synthetic.make_headlines(n, keywords)
+    return sa
+
+
+@benchmark("news_index_rebuild", check=bool)
+def bench_news_rebuild():
+    sa = _sentiment_with_news()
+
+    def run():
+        sa._rebuild_news_index()
+        sa._update_macro_cache()
+        return sa._keyword_index
+    return run
+
+
+@benchmark("filter_news_by_relevance", ops=len(config.DAFTAR_KOIN))
+def bench_filter_news():
+    sa = _sentiment_with_news()
+    sa._rebuild_news_index()
+    symbols = [c['symbol'] for c in config.DAFTAR_KOIN]
+    return lambda: [sa.filter_news_by_relevance(s) for s in symbols]
+
+
+@benchmark("build_market_prompt", check=lambda r: isinstance(r, str) and len(r) > 0)
+def bench_build_prompt():
+    from src.modules.market_data import _calculate_tech_data_threaded
+    from src.modules.onchain import OnChainAnalyzer
+    from src.utils.prompt_builder import build_market_prompt
+
+    md = _market_data()
+    book, _ = _loaded_book(md, config.BTC_SYMBOL)
+    md._update_ob_features(config.BTC_SYMBOL, book)
+
+    bars_exec = list(md.market_store[ALT_SYMBOL][config.TIMEFRAME_EXEC])
+    bars_trend = list(md.market_store[ALT_SYMBOL][config.TIMEFRAME_TREND])
+    tech_data = _calculate_tech_data_threaded(bars_exec, bars_trend, ALT_SYMBOL)
+    tech_data.update({
+        "btc_trend": "BULLISH", "btc_correlation": 0.82, "funding_rate": 0.0001,
+        "open_interest": 1_000_000.0, "lsr": None,
+        "trade_flow": None, "order_book": md.ob_cache[config.BTC_SYMBOL]['data'],
+    })
+
+    sa = _sentiment_with_news()
+    sa._rebuild_news_index()
+    sentiment_data = sa.get_latest(ALT_SYMBOL)
+
+    onchain = OnChainAnalyzer()
+    for i in range(50):
+        onchain.detect_whale(ALT_SYMBOL, 200_000 + i * 1000, "BUY" if i % 2 else "SELL", 100.0 + i)
+    onchain_data = onchain.get_latest(symbol=ALT_SYMBOL)
+
+    pattern = {"analysis": "Bullish flag forming above EMA.", "is_valid": True}
+    return lambda: build_market_prompt(ALT_SYMBOL, tech_data, sentiment_data, onchain_data, pattern)
+
+
+@benchmark("generate_chart_image", check=lambda r: bool(r and r[0]))
+def bench_chart():
+    from src.modules.pattern_recognizer import PatternRecognizer
+    md = _market_data()
+    pr = PatternRecognizer(md)
+    return lambda: pr.generate_chart_image(ALT_SYMBOL)
+
+
+@benchmark("ws_dispatch_mixed", ops=2000)
+def bench_ws_dispatch():
+    md = _market_data()
+    _, snapshot = _loaded_book(md, config.BTC_SYMBOL)
+
+    msgs = []
+    msgs += synthetic.make_agg_trade_messages(1200)
+    msgs += synthetic.make_kline_messages(synthetic.make_ohlcv(300, start_price=30_000.0), config.BTC_SYMBOL, config.TIMEFRAME_EXEC)
+    msgs += synthetic.make_mini_ticker_messages(300)
+    msgs += synthetic.make_depth_messages(synthetic.make_depth_diffs(200, snapshot))
+    # Interleave deterministik (urutan stabil)
+    msgs.sort(key=lambda m: json.loads(m)['data']['E'])
+
+    async def on_trailing(symbol, price):
+        return None
+
+    md._ws_callbacks = {
+        'account_update': None, 'order_update': None,
+        'whale': lambda *args: None, 'trailing': on_trailing
+    }
+
+    async def run():
+        md.order_books[config.BTC_SYMBOL].load_snapshot(snapshot)
+        for m in msgs:
+            await md._dispatch_ws_message(m)
+        await asyncio.sleep(0)  # Biarkan task trailing selesai
+        return md.ob_cache.get(config.BTC_SYMBOL)
+    return run
+
+
+class _FakeExchange:
+    """Exchange palsu untuk jalur trailing (tanpa network)."""
+
+    def price_to_precision(self, symbol, price):
+        return f"{price:.2f}"
+
+    async def fetch_open_orders(self, symbol):
+        return [{'id': '1', 'type': 'STOP_MARKET'}]
+
+    async def cancel_order(self, order_id, symbol):
+        return {}
+
+    async def create_order(self, *args, **kwargs):
+        return {'id': '2'}
+
+
+@benchmark("update_trailing_sl", ops=1000)
+def bench_trailing():
+    from src.modules.executor import OrderExecutor
+    config.TRACKER_FILENAME = os.path.join(tempfile.mkdtemp(prefix="bench_"), 'safety_tracker.json')
+
+    ex = OrderExecutor(_FakeExchange())
+    prices = [float(json.loads(m)['data']['c']) for m in synthetic.make_mini_ticker_messages(1000)]
+    tracker = {
+        "status": "SECURED", "side": "LONG", "trailing_active": True,
+        "trailing_sl": prices[0] * 0.99, "trailing_high": prices[0],
+    }
+
+    async def run():
+        ex.safety_orders_tracker[ALT_SYMBOL] = dict(tracker)
+        ex._trailing_last_update.clear()
+        for p in prices:
+            await ex.update_trailing_sl(ALT_SYMBOL, p)
+        return ex.safety_orders_tracker[ALT_SYMBOL].get('trailing_sl')
+    return run
+
+
+# ==========================================
+# RUNNER
+# ==========================================
+async def _call(fn):
+    result = fn()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+async def _run_case(name, spec, warmup, repeat):
+    setup = spec['setup']
+    fn = setup()
+    result = await _call(fn)
+    if not spec['check'](result):
+        raise AssertionError(f"hasil tidak valid: {repr(result)[:80]}")
+    for _ in range(warmup):
+        await _call(fn)
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        await _call(fn)
+        samples.append(time.perf_counter() - t0)
+
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "median_ms": median * 1000,
+        "min_ms": samples[0] * 1000,
+        "p90_ms": samples[min(len(samples) - 1, int(len(samples) * 0.9))] * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "ops": spec['ops'],
+        "per_op_us": median / spec['ops'] * 1e6,
+        "repeat": repeat,
+    }
+
+
+async def run_all(pattern=None, warmup=3, repeat=20):
+    results = {}
+    for name, spec in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        try:
+            results[name] = await _run_case(name, spec, warmup, repeat)
+            r = results[name]
+            print(f"  {name:<28} median {r['median_ms']:>10.3f} ms | p90 {r['p90_ms']:>10.3f} ms | {r['per_op_us']:>10.2f} µs/op")
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"  {name:<28} FAILED {type(e).__name__}: {e}")
+
+    for close in _CLEANUP:
+        try:
+            await close()
+        except Exception:
+            pass
+    _CLEANUP.clear()
+    return results
+
+
+def _environment():
+    import numpy
+    import pandas
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+    }
+
+
+def compare(baseline, current, tolerance):
+    """Bandingkan median per case. Return list nama case yang regresi."""
+    regressions = []
+    base_results = baseline.get('results', {})
+    cur_results = current.get('results', {})
+    print(f"\n{'case':<28} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name in sorted(set(base_results) | set(cur_results)):
+        base = base_results.get(name, {})
+        cur = cur_results.get(name, {})
+        if 'median_ms' not in base or 'median_ms' not in cur:
+            status = "missing" if name not in cur_results else ("error" if 'error' in cur else "new")
+            print(f"{name:<28} {'-':>12} {'-':>12} {status:>9}")
+            continue
+        change = cur['median_ms'] / base['median_ms'] - 1 if base['median_ms'] > 0 else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  ❌ REGRESSION"
+            regressions.append(name)
+        elif change < -tolerance:
+            flag = "  ✅ faster"
+        print(f"{name:<28} {base['median_ms']:>10.3f}ms {cur['median_ms']:>10.3f}ms {change * 100:>+8.1f}%{flag}")
+
+    if base_results and baseline.get('environment', {}).get('machine') != current.get('environment', {}).get('machine'):
+        print("⚠️ Baseline dibuat di mesin berbeda, hasil perbandingan kurang akurat.")
+    return regressions
+
+
+def _load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark hot path bot trading.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Jalankan benchmark")
+    p_run.add_argument("-k", "--filter", help="Substring nama case")
+    p_run.add_argument("--warmup", type=int, default=3)
+    p_run.add_argument("--repeat", type=int, default=20)
+    p_run.add_argument("--save", help="Simpan hasil ke file JSON (baseline)")
+    p_run.add_argument("--baseline", help="Bandingkan dengan baseline JSON")
+    p_run.add_argument("--tolerance", type=float, default=0.15, help="Batas regresi relatif (0.15 = 15%%)")
+
+    p_cmp = sub.add_parser("compare", help="Bandingkan dua file hasil JSON")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--tolerance", type=float, default=0.15)
+
+    sub.add_parser("list", help="Tampilkan daftar case")
+
+    p_start = sub.add_parser("startup", help="Laporan import-time & cek budget cold-start src/main.py")
+    p_start.add_argument("--budget", type=float, default=getattr(config, 'STARTUP_IMPORT_BUDGET', 2.0),
+                         help="Budget cold-start import (detik)")
+    p_start.add_argument("--top", type=int, default=15, help="Jumlah package terlambat yang ditampilkan")
+    p_start.add_argument("--runs", type=int, default=3)
+
+    p_chart = sub.add_parser("charts", help="Bandingkan encoding chart Vision AI (bytes & durasi encode)")
+    p_chart.add_argument("--samples", type=int, default=6, help="Jumlah chart sintetis")
+    p_chart.add_argument("--formats", nargs="+", help="Subset format (default semua)")
+    p_chart.add_argument("--sizes", nargs="+", type=int, help="Ukuran target sisi terpanjang px (0 = CHART_RENDER_DPI)")
+    p_chart.add_argument("--quality", type=int, help="Kualitas webp / jpeg")
+    p_chart.add_argument("--colors", type=int, help="Jumlah warna png_palette")
+    p_chart.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name, spec in BENCHMARKS.items():
+            print(f"{name} (ops={spec['ops']})")
+        return 0
+
+    if args.command == "startup":
+        from benchmarks import startup
+        lazy_modules = getattr(config, 'STARTUP_LAZY_MODULES', [])
+        return startup.check(args.budget, lazy_modules, top=args.top, runs=args.runs)
+
+    if args.command == "charts":
+        from benchmarks import chart_encoding
+        return chart_encoding.run(args.samples, args.formats, args.sizes, args.quality, args.colors, args.repeat)
+
+    if args.command == "compare":
+        regressions = compare(_load(args.baseline), _load(args.current), args.tolerance)
+        return 1 if regressions else 0
+
+    # Benchmark tidak butuh log INFO bot (menghindari noise & I/O). logging.disable tetap berlaku
+    # walau setup_logger() men-set level INFO saat helper ter-import oleh case.
+    logging.disable(logging.INFO)
+
+    print(f"🏁 Running benchmarks (warmup={args.warmup}, repeat={args.repeat})")
+    results = asyncio.run(run_all(args.filter, args.warmup, args.repeat))
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "environment": _environment(),
+        "results": results,
+    }
+
+    failed = sorted(name for name, r in results.items() if 'error' in r)
+    if failed:
+        print(f"\n❌ {len(failed)} case gagal: {', '.join(failed)}")
+
+    if args.save and failed:
+        print(f"⛔ Baseline tidak disimpan ({args.save}): hasil case yang gagal tidak boleh jadi pembanding.")
+    elif args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"💾 Saved: {args.save}")
+
+    if args.baseline:
+        regressions = compare(_load(args.baseline), report, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Laporan import-time & budget cold-start untuk entry point (src/main.py).
+
+Menjalankan `python -X importtime -c "import src.main"` di subprocess (proses bersih),
+lalu merangkum waktu import per package top-level. Gagal (exit 1) jika:
+- Total import melebihi budget (config.STARTUP_IMPORT_BUDGET), atau
+- Ada library berat yang seharusnya lazy ikut ter-import saat startup (config.STARTUP_LAZY_MODULES).
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_IMPORT = "import src.main"
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def _run(code, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", code]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True)
+    elapsed = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"'{code}' gagal (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+    return elapsed, proc.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Parse output -X importtime.
+    Return (entries, per_package): entries = [(name, self_us, cumulative_us, depth)],
+    per_package = {package root: total self_us} -> biaya eksklusif tiap package (semua kedalaman).
+    """
+    entries = []
+    per_package = {}
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, cum_us, indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        depth = (len(indent) - 1) // 2
+        entries.append((name, self_us, cum_us, depth))
+        pkg = name.split('.')[0]
+        per_package[pkg] = per_package.get(pkg, 0) + self_us
+    return entries, per_package
+
+
+def report(top=15, runs=3):
+    """Jalankan pengukuran. Return dict ringkasan."""
+    # Run pertama memanaskan cache .pyc agar angka stabil (fokus ke biaya import, bukan compile)
+    _run(ENTRY_IMPORT)
+
+    baseline = statistics.median(_run("pass")[0] for _ in range(runs))
+    walls = []
+    stderr = ""
+    for _ in range(runs):
+        elapsed, stderr = _run(ENTRY_IMPORT, importtime=True)
+        walls.append(elapsed)
+
+    entries, per_package = parse_importtime(stderr)
+    imported = {name for name, *_ in entries}
+    return {
+        "wall_seconds": statistics.median(walls) - baseline,
+        "import_seconds": sum(per_package.values()) / 1e6,
+        "top": sorted(per_package.items(), key=lambda kv: kv[1], reverse=True)[:top],
+        "imported": imported,
+    }
+
+
+def check(budget, lazy_modules, top=15, runs=3):
+    """Cetak laporan & cek budget. Return exit code (0 = lolos)."""
+    result = report(top=top, runs=runs)
+
+    print(f"🚀 Cold-start import '{ENTRY_IMPORT}'")
+    print(f"   Wall (tanpa startup interpreter): {result['wall_seconds']:.3f}s | Total import: {result['import_seconds']:.3f}s")
+    print(f"\n{'package':<28} {'self total':>12}")
+    for pkg, self_us in result['top']:
+        print(f"{pkg:<28} {self_us / 1000:>10.1f}ms")
+
+    failed = False
+    eager = sorted(m for m in lazy_modules if m in result['imported'])
+    if eager:
+        failed = True
+        print(f"\n❌ Library berat ter-import saat startup (harus lazy): {', '.join(eager)}")
+
+    if budget and result['wall_seconds'] > budget:
+        failed = True
+        print(f"\n❌ Cold-start {result['wall_seconds']:.3f}s melebihi budget {budget:.3f}s")
+
+    if not failed:
+        print(f"\n✅ Cold-start dalam budget ({budget:.3f}s)")
+    return 1 if failed else 0
@@ -0,0 +1,161 @@
+"""
+Generator data pasar sintetis yang deterministik (seed tetap) untuk benchmark.
+Format output mengikuti format asli yang dipakai bot:
+- OHLCV: [[ts_ms, open, high, low, close, volume], ...] (format ccxt / market_store)
+- WS message: string JSON combined stream {"stream": ..., "data": {...}} (format Binance Futures)
+- Depth: snapshot REST {lastUpdateId, bids, asks} + diff depthUpdate dengan sequencing U/u/pu valid
+"""
+import json
+
+import numpy as np
+
+SEED = 1337
+START_TS = 1_700_000_000_000  # ms, dibulatkan ke menit
+
+
+def make_ohlcv(n, start_price=100.0, interval_ms=60_000, volatility=0.002, seed=SEED, returns=None):
+    """Random walk geometris -> list candle OHLCV. `returns` opsional untuk series berkorelasi."""
+    rng = np.random.default_rng(seed)
+    if returns is None:
+        returns = rng.normal(0, volatility, n)
+    closes = start_price * np.exp(np.cumsum(returns))
+    opens = np.concatenate(([start_price], closes[:-1]))
+    spread = np.abs(rng.normal(0, volatility, n)) * closes
+    highs = np.maximum(opens, closes) + spread
+    lows = np.minimum(opens, closes) - spread
+    volumes = rng.lognormal(mean=8, sigma=0.5, size=n)
+    ts = START_TS + np.arange(n, dtype=np.int64) * interval_ms
+    return [
+        [int(ts[i]), float(opens[i]), float(highs[i]), float(lows[i]), float(closes[i]), float(volumes[i])]
+        for i in range(n)
+    ]
+
+
+def make_correlated_ohlcv(n, corr=0.8, start_price=100.0, interval_ms=60_000, volatility=0.002, seed=SEED):
+    """Dua series OHLCV (base, follower) dengan korelasi return ~corr dan timestamp sama."""
+    rng = np.random.default_rng(seed)
+    base_ret = rng.normal(0, volatility, n)
+    noise = rng.normal(0, volatility, n)
+    follow_ret = corr * base_ret + np.sqrt(1 - corr ** 2) * noise
+    base = make_ohlcv(n, start_price * 300, interval_ms, volatility, seed + 1, returns=base_ret)
+    follower = make_ohlcv(n, start_price, interval_ms, volatility, seed + 2, returns=follow_ret)
+    return base, follower
+
+
+def _symbol_raw(symbol):
+    return symbol.replace('/', '')
+
+
+def make_agg_trade_messages(n, symbol='BTC/USDT', price=30_000.0, seed=SEED):
+    """Pesan aggTrade (string JSON). Sekitar 1% trade berukuran whale."""
+    rng = np.random.default_rng(seed)
+    raw = _symbol_raw(symbol)
+    prices = price * np.exp(np.cumsum(rng.normal(0, 0.0001, n)))
+    qtys = rng.lognormal(mean=-3, sigma=1.2, size=n)
+    whales = rng.random(n) < 0.01
+    qtys[whales] *= 500
+    sides = rng.random(n) < 0.5
+    msgs = []
+    for i in range(n):
+        ts = START_TS + i * 50
+        msgs.append(json.dumps({
+            "stream": f"{raw.lower()}@aggTrade",
+            "data": {"e": "aggTrade", "E": ts, "s": raw, "a": i, "p": f"{prices[i]:.2f}",
+                     "q": f"{qtys[i]:.4f}", "T": ts, "m": bool(sides[i])}
+        }))
+    return msgs
+
+
+def make_kline_messages(bars, symbol, interval):
+    """Pesan kline (string JSON) dari list OHLCV: setiap candle dikirim sebagai update."""
+    raw = _symbol_raw(symbol)
+    msgs = []
+    for b in bars:
+        msgs.append(json.dumps({
+            "stream": f"{raw.lower()}@kline_{interval}",
+            "data": {"e": "kline", "E": b[0] + 1000, "s": raw,
+                     "k": {"t": b[0], "i": interval, "o": str(b[1]), "h": str(b[2]),
+                           "l": str(b[3]), "c": str(b[4]), "v": str(b[5]), "x": False}}
+        }))
+    return msgs
+
+
+def make_mini_ticker_messages(n, symbol='BTC/USDT', price=30_000.0, seed=SEED):
+    rng = np.random.default_rng(seed)
+    raw = _symbol_raw(symbol)
+    prices = price * np.exp(np.cumsum(rng.normal(0, 0.0002, n)))
+    return [
+        json.dumps({
+            "stream": f"{raw.lower()}@miniTicker",
+            "data": {"e": "24hrMiniTicker", "E": START_TS + i * 1000, "s": raw, "c": f"{prices[i]:.2f}"}
+        })
+        for i in range(n)
+    ]
+
+
+def make_depth_snapshot(levels=1000, mid=30_000.0, tick=0.1, last_update_id=1_000, seed=SEED):
+    """Snapshot REST: bids descending, asks ascending (string, seperti Binance)."""
+    rng = np.random.default_rng(seed)
+    bid_prices = mid - tick * np.arange(1, levels + 1)
+    ask_prices = mid + tick * np.arange(1, levels + 1)
+    bid_qtys = rng.lognormal(mean=0, sigma=1, size=levels)
+    ask_qtys = rng.lognormal(mean=0, sigma=1, size=levels)
+    return {
+        "lastUpdateId": last_update_id,
+        "bids": [[f"{p:.1f}", f"{q:.3f}"] for p, q in zip(bid_prices, bid_qtys)],
+        "asks": [[f"{p:.1f}", f"{q:.3f}"] for p, q in zip(ask_prices, ask_qtys)],
+    }
+
+
+def make_depth_diffs(n, snapshot, symbol='BTC/USDT', mid=30_000.0, tick=0.1, levels_per_diff=20, seed=SEED):
+    """
+    Diff depthUpdate berurutan (pu == u sebelumnya) setelah snapshot.
+    Tiap diff mengubah/menambah/menghapus level di sekitar mid.
+    """
+    rng = np.random.default_rng(seed)
+    raw = _symbol_raw(symbol)
+    last_u = snapshot['lastUpdateId']
+    payloads = []
+    for i in range(n):
+        # Event pertama harus mengapit snapshot (U <= lastUpdateId <= u)
+        first_u = last_u - 1 if i == 0 else last_u + 1
+        final_u = first_u + int(rng.integers(1, 10))
+        offsets = rng.integers(1, 500, size=(2, levels_per_diff))
+        qtys = rng.lognormal(mean=0, sigma=1, size=(2, levels_per_diff))
+        qtys[rng.random((2, levels_per_diff)) < 0.2] = 0.0  # 20% level dihapus
+        payloads.append({
+            "e": "depthUpdate", "E": START_TS + i * 100, "s": raw,
+            "U": first_u, "u": final_u, "pu": last_u,
+            "b": [[f"{mid - tick * o:.1f}", f"{q:.3f}"] for o, q in zip(offsets[0], qtys[0])],
+            "a": [[f"{mid + tick * o:.1f}", f"{q:.3f}"] for o, q in zip(offsets[1], qtys[1])],
+        })
+        last_u = final_u
+    return payloads
+
+
+def make_depth_messages(payloads, symbol='BTC/USDT'):
+    raw = _symbol_raw(symbol).lower()
+    return [json.dumps({"stream": f"{raw}@depth@100ms", "data": p}) for p in payloads]
+
+
+_HEADLINE_TEMPLATES = [
+    "{kw} surges as traders eye {other}",
+    "Analysts warn {kw} could face pressure after {other} report",
+    "{kw} volume spikes amid {other} uncertainty",
+    "Breaking: {kw} and {other} move in tandem",
+    "Market wrap: {other} steady while {kw} drifts",
+]
+_FILLER_WORDS = ["market", "rally", "selloff", "etf", "regulation", "liquidity", "exchange", "stocks", "gold", "yields"]
+
+
+def make_headlines(n, keywords, seed=SEED):
+    """Headline sintetis yang menyebut keyword koin/makro + kata pengisi."""
+    rng = np.random.default_rng(seed)
+    pool = list(keywords) + _FILLER_WORDS
+    out = []
+    for i in range(n):
+        tpl = _HEADLINE_TEMPLATES[i % len(_HEADLINE_TEMPLATES)]
+        kw = pool[int(rng.integers(len(pool)))]
+        other = pool[int(rng.integers(len(pool)))]
+        out.append(f"{tpl.format(kw=kw.title(), other=other)} (Source {i % 7})")
+    return out
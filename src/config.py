@@ -25,6 +25,7 @@ TELEGRAM_MESSAGE_THREAD_ID_SENTIMENT = os.getenv("TELEGRAM_MESSAGE_THREAD_ID_SEN
 
 # 3rd Party APIs
 AI_API_KEY = os.getenv("AI_API_KEY")       # OpenRouter / DeepSeek
+AI_HEDGE_API_KEY = os.getenv("AI_HEDGE_API_KEY")  # Opsional: key provider hedge (kosong = AI_API_KEY)
 CMC_API_KEY = os.getenv("CMC_API_KEY")     # CoinMarketCap
 
 # ==============================================================================
@@ -32,8 +33,58 @@ CMC_API_KEY = os.getenv("CMC_API_KEY")     # CoinMarketCap
 # ==============================================================================
 PAKAI_DEMO = True               # False = Real Money, True = Testnet (Uang Monopoly)
 LOG_FILENAME = 'bot_trading.log'
+LOG_FORMAT = 'text'              # 'text' (human readable) atau 'json' (1 JSON per baris)
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotasi log jika file > N bytes (0 = nonaktif)
+LOG_ROTATE_HOURS = 24            # Rotasi log tiap N jam (0 = nonaktif)
+LOG_BACKUP_COUNT = 14            # Jumlah file rotasi yang disimpan
+LOG_COMPRESS = True              # Kompres file rotasi (.gz)
+LOG_PAYLOAD_FILENAME = 'ai_payloads.log'  # Arsip payload besar (prompt AI, reasoning)
+LOG_PAYLOAD_SAMPLE_RATE = 0.0    # Fraksi payload yang juga ditulis penuh ke log utama (0.0 - 1.0)
+LOG_PAYLOAD_PREVIEW_CHARS = 200  # Panjang preview payload di log utama
+
+# Metrics (Prometheus Endpoint Lokal)
+METRICS_ENABLED = True           # Aktifkan endpoint /metrics
+METRICS_HOST = '127.0.0.1'       # Bind lokal saja (jangan expose ke publik)
+METRICS_PORT = 9108              # Port endpoint http://127.0.0.1:9108/metrics
+
+# Loop Watchdog (Deteksi Event Loop Terblokir)
+LOOP_WATCHDOG_ENABLED = False    # Opt-in: ukur lag event loop & capture stack saat stall
+LOOP_WATCHDOG_INTERVAL = 0.1     # Interval probe (detik)
+LOOP_LAG_THRESHOLD = 0.25        # Lag di atas ini dianggap stall -> log stack trace (detik)
+LOOP_LAG_WINDOW = 600            # Jumlah sampel lag untuk quantile (600 x 0.1s = 1 menit)
+LOOP_DEBUG_MODE = False          # Dev mode: asyncio debug + laporan slow callback
+LOOP_SLOW_CALLBACK = 0.1         # Ambang slow callback asyncio debug (detik)
+
+# Startup Budget (dicek via: python -m benchmarks startup)
+STARTUP_IMPORT_BUDGET = 2.0      # Batas waktu import src/main.py saat cold-start (detik)
+STARTUP_LAZY_MODULES = [         # Library berat yang TIDAK boleh ter-import saat startup (lazy on first use)
+    "pandas", "pandas_ta", "scipy", "matplotlib", "mplfinance", "openai", "feedparser", "aiohttp.web"
+]
 TRACKER_FILENAME = 'safety_tracker.json'
 
+# Mode Multi-Proses (Ingestion / Decision / Execution di proses terpisah)
+MULTIPROCESS_MODE = False        # True = 3 proses (atau jalankan: python src/main.py --multiprocess)
+MP_SHM_PREFIX = 'ezbot'          # Prefix nama segmen shared memory & socket IPC
+MP_IPC_DIR = None                # Folder Unix socket IPC (None = folder temp OS)
+MP_IPC_PORT_BASE = 9120          # Fallback TCP lokal jika Unix socket tidak tersedia (Windows)
+MP_META_INTERVAL = 0.5           # Interval publish funding/OI/LSR, fitur order book & trade flow (detik)
+MP_META_MAX_BYTES = 64 * 1024    # Kapasitas blob meta per symbol di shared memory (bytes)
+MP_TICKER_POLL_INTERVAL = 0.2    # Interval proses execution membaca harga (trailing stop) dari shared memory (detik)
+MP_STATE_PUBLISH_INTERVAL = 0.5  # Interval cek & publish state executor ke proses decision (detik)
+MP_RPC_TIMEOUT = 30              # Timeout RPC antar proses, misal eksekusi order (detik)
+MP_READY_TIMEOUT = 300           # Batas tunggu proses lain siap saat startup (detik)
+
+# Feed Service Market Data (satu feed lokal dipakai bersama beberapa bot / konfigurasi)
+MARKET_FEED_SERVICE = False      # True = market data dari feed service (jalankan dulu: python src/feed_service.py)
+FEED_SERVICE_PREFIX = 'ezfeed'   # Prefix socket IPC & shared memory feed service (harus sama di semua bot)
+
+# Warm State Checkpoint (restart tanpa mulai dari nol)
+CHECKPOINT_ENABLED = True        # Simpan cache & histori in-memory ke file lokal
+CHECKPOINT_FILENAME = 'state_checkpoint.json.gz'  # File checkpoint (gzip JSON)
+CHECKPOINT_INTERVAL = 300        # Simpan berkala tiap N detik (+ saat shutdown)
+CHECKPOINT_MAX_AGE = 6 * 3600    # Checkpoint lebih tua dari ini diabaikan saat startup (detik)
+CHECKPOINT_OB_MAX_AGE = 120      # Cache fitur order book lebih tua dari ini tidak di-restore (detik)
+
 # Performa Loop & Request
 CONCURRENCY_LIMIT = 20           # Maksimal pair yang diproses bersamaan (multithreading)
 LOOP_SLEEP_DELAY = 1             # Istirahat antar putaran loop utama (detik)
@@ -42,6 +93,13 @@ API_REQUEST_TIMEOUT = 10         # Batas waktu tunggu balasan server (detik)
 API_RECV_WINDOW = 10000          # Toleransi waktu server Binance (ms)
 LOOP_SKIP_DELAY = 2              # Delay saat skip coin karena data tidak lengkap (detik)
 
+# Notifikasi Telegram (Dispatcher Async)
+TELEGRAM_MIN_INTERVAL = 1.1      # Jeda minimal antar pesan ke chat yang sama (detik, limit Telegram ~1 msg/detik/chat)
+TELEGRAM_BATCH_INTERVAL = 30     # Pesan prioritas rendah dikumpulkan lalu dikirim gabungan tiap N detik
+TELEGRAM_MAX_RETRIES = 4         # Percobaan ulang jika gagal (network / 429 / 5xx)
+TELEGRAM_RETRY_BASE_DELAY = 1.0  # Backoff awal (detik), dikali 2 tiap retry
+TELEGRAM_QUEUE_MAXLEN = 500      # Batas antrian per chat (pesan tertua dibuang jika penuh)
+
 # ==============================================================================
 # 📊 INDIKATOR TEKNIKAL & ANALISA CHART
 # ==============================================================================
@@ -112,6 +170,12 @@ DEFAULT_CORRELATION_HIGH = 0.99  # Nilai default jika data korrelasi belum ada
 AI_MODEL_NAME = 'arcee-ai/trinity-large-preview:free'
 AI_TEMPERATURE = 0.0             # 0.0 = Logis & Konsisten, 1.0 = Kreatif & Halusinasi
 AI_CONFIDENCE_THRESHOLD = 70     # Minimal keyakinan (%) untuk berani eksekusi
+
+# [NEW] Model Cascade: model murah screening dulu, main model hanya untuk kandidat
+AI_CASCADE_ENABLED = False       # True = screening WAIT/CANDIDATE sebelum AI_MODEL_NAME
+AI_SCREEN_MODEL = 'xiaomi/mimo-v2-flash' # Model screening (cepat & murah)
+AI_SCREEN_ESCALATE_MARGIN = 15   # Eskalasi jika CANDIDATE & confidence >= AI_CONFIDENCE_THRESHOLD - margin
+AI_SCREEN_MAX_TOKENS = 150       # Output screening kecil (verdict + alasan singkat)
 AI_SYSTEM_ROLE = f"""You are a Professional Crypto Strategy Selector. Your job is to analyze market data and SELECT the BEST strategy from the available options based on current conditions.
 
 AVAILABLE STRATEGIES:
@@ -175,6 +239,23 @@ AI_REASONING_EFFORT = 'medium'    # Level effort: 'xhigh', 'high', 'medium', 'lo
 AI_REASONING_EXCLUDE = False      # True = reasoning tidak ditampilkan di response
 AI_LOG_REASONING = True           # Catat proses reasoning ke log? (True/False)
 
+# [NEW] Structured Output (JSON schema via response_format + validasi schema)
+AI_STRUCTURED_OUTPUT = True        # Kirim JSON schema ke model (auto fallback jika model/provider menolak)
+AI_SCHEMA_REPAIR_RETRIES = 1       # Retry tertarget: hanya minta ulang field keputusan yang rusak/hilang
+AI_SCHEMA_REPAIR_MAX_TOKENS = 300  # Batas output retry tertarget (cukup untuk beberapa field)
+
+# [NEW] Hedged Request (kontrol tail latency keputusan AI)
+AI_HEDGE_ENABLED = False           # True = kirim request kedua jika main model lambat
+AI_HEDGE_MODEL = None              # Model hedge (None = AI_MODEL_NAME, provider lain via routing OpenRouter)
+AI_HEDGE_BASE_URL = None           # Endpoint hedge (None = AI_BASE_URL), key dari AI_HEDGE_API_KEY
+AI_HEDGE_QUANTILE = 0.9            # Deadline hedge = persentil latency main model terakhir
+AI_HEDGE_WINDOW = 100              # Jumlah sampel latency terakhir untuk hitung persentil
+AI_HEDGE_MIN_SAMPLES = 20          # Sebelum sampel cukup, pakai AI_HEDGE_DEFAULT_DELAY
+AI_HEDGE_DEFAULT_DELAY = 20        # Deadline awal (detik)
+AI_HEDGE_MIN_DELAY = 3             # Deadline minimal (detik), cegah hedge berlebihan saat model cepat
+AI_HEDGE_MAX_RATE = 0.1            # Maksimal 10% request di-hedge (batas biaya tambahan)
+AI_HEDGE_BURST = 2                 # Kuota hedge beruntun maksimal (token bucket)
+
 # Identitas Bot
 AI_APP_URL = "https://github.com/KaleksananBarqi/Bot-Trading-Easy-Peasy-Full-AI"
 AI_APP_TITLE = "Bot Trading Easy Peasy Full AI"
@@ -196,6 +277,16 @@ AI_VISION_MAX_TOKENS = 300            # Naikkan untuk mencegah output terpotong
 PATTERN_MAX_RETRIES = 2               # Berapa kali retry jika output tidak valid
 PATTERN_MIN_ANALYSIS_LENGTH = 50      # Minimal panjang karakter output yang dianggap valid
 PATTERN_REQUIRED_KEYWORDS = ['BULLISH', 'BEARISH', 'NEUTRAL']  # Minimal satu harus ada
+PATTERN_PREWARM_ENABLED = False       # Render chart + Vision di background saat candle SETUP close (hanya symbol yang lolos STEP C sebelumnya)
+PATTERN_PREWARM_CONCURRENCY = 2       # Maksimal render/vision paralel saat pre-render
+PATTERN_PREWARM_DELAY = 3             # Jeda setelah candle close sebelum pre-render (detik, tunggu kline WS)
+PATTERN_PREWARM_MAX_WAIT = 30         # Batas tunggu candle baru masuk per symbol (detik)
+# Encoding chart ke Vision AI (bandingkan opsi: python -m benchmarks charts)
+CHART_IMAGE_FORMAT = 'png_palette'    # 'png' | 'png_palette' | 'webp' | 'jpeg'
+CHART_IMAGE_MAX_SIDE = 512            # Sisi terpanjang (px), 512 = tile "detail: low". Chart dirender langsung seukuran ini
+CHART_RENDER_DPI = 100                # DPI render jika CHART_IMAGE_MAX_SIDE = 0 (ukuran penuh)
+CHART_IMAGE_QUALITY = 80              # Kualitas webp / jpeg (1-100)
+CHART_IMAGE_COLORS = 64               # Jumlah warna png_palette
 
 # Data OnChain
 ONCHAIN_PROVIDER = 'DefiLlama'   # Sumber data OnChain
@@ -213,15 +304,40 @@ MIN_ORDER_USDT = 5               # Minimal order yang diizinkan Binance
 DEFAULT_LEVERAGE = 10
 DEFAULT_MARGIN_TYPE = 'isolated' # 'isolated' (aman) atau 'cross' (beresiko/gabungan)
 MAX_POSITIONS_PER_CATEGORY = 5   # Batas maksimal koin aktif per kategori (Layer 1, AI, Meme, dll)
+BALANCE_CACHE_MAX_AGE = 300      # Umur maksimal cache saldo sebelum fetch ulang via REST (detik)
 
 # Pendeteksi Paus (Whale)
-WHALE_THRESHOLD_USDT = 1000000   # Transaksi > $1 Juta ditandai sebagai Whale
+WHALE_THRESHOLD_USDT = 1000000   # Transaksi > $1 Juta ditandai sebagai Whale (mode 'fixed' / sebelum sketch siap)
+WHALE_THRESHOLD_MODE = 'quantile' # 'quantile' (adaptif per koin dari distribusi trade) atau 'fixed'
+WHALE_QUANTILE = 0.999           # Trade di atas persentil ini = Whale (override per koin: 'whale_quantile')
+WHALE_MIN_USDT = 50000           # Lantai threshold adaptif (koin sepi tidak menandai trade receh)
+WHALE_SKETCH_ALPHA = 0.02        # Akurasi relatif sketch quantile (2% -> ~600 bucket/koin, memori tetap)
+WHALE_SKETCH_MIN_COUNT = 1000    # Minimal trade di sketch sebelum threshold adaptif dipakai
+WHALE_SKETCH_REFRESH_TRADES = 200 # Hitung ulang threshold tiap N trade
+WHALE_SKETCH_HALFLIFE = 24 * 3600 # Half-life bobot trade lama (detik), 0 = tanpa decay
 WHALE_HISTORY_LIMIT = 10         # Cek 10 transaksi terakhir
+WHALE_STORE_MAXLEN = 500         # Maksimal event whale yang disimpan per koin (untuk agregasi window)
+WHALE_FLOW_WINDOWS = {'5m': 300, '1h': 3600} # Window agregasi Net Whale Flow (label: detik)
 STABLECOIN_INFLOW_THRESHOLD_PERCENT = 0.05 # Ambang batas aliran masuk stablecoin
+STABLECOIN_HISTORY_FILENAME = 'stablecoin_history.json' # Histori lokal series stablecoin (DefiLlama)
+STABLECOIN_HISTORY_DAYS = 30     # Jumlah record harian terakhir yang disimpan
+STABLECOIN_TREND_DAYS = [1, 3, 7] # Perubahan supply stablecoin untuk tren (hari)
+
+# Order Flow (Agregasi aggTrade)
+TRADE_FLOW_BUCKET_SECONDS = 60   # Ukuran bucket agregasi trade (detik)
+TRADE_FLOW_BUCKETS = 60          # Jumlah bucket di ring buffer (60 x 60s = 1 jam)
+TRADE_FLOW_WINDOWS = [5, 15, 60] # Window ringkasan order flow untuk prompt (menit)
 
 # Order Book Analysis
 ORDERBOOK_RANGE_PERCENT = 0.02   # Range depth analysis order book (2%)
 ORDERBOOK_IMBALANCE_THRESHOLD = 20 # Minimal imbalance (20%) untuk dianggap signifikan
+ORDERBOOK_SNAPSHOT_LIMIT = 1000  # Jumlah level snapshot REST untuk Local Order Book
+ORDERBOOK_RESYNC_DELAY = 1       # Jeda sebelum ambil snapshot agar diff pertama sudah ter-buffer (detik)
+ORDERBOOK_FEATURE_BANDS = [0.0025, 0.005, 0.01, 0.02] # Band imbalance multi-level (0.25% / 0.5% / 1% / 2%)
+ORDERBOOK_FEATURE_MIN_INTERVAL = 0.25 # Jeda minimal hitung ulang fitur order book per symbol (detik)
+ORDERBOOK_WALL_MULTIPLIER = 5.0  # Level dianggap "Wall" jika notional >= N x median level
+ORDERBOOK_HISTORY_SAMPLE_SECONDS = 5 # Interval sampling histori imbalance (detik)
+ORDERBOOK_HISTORY_LEN = 60       # Jumlah sampel histori imbalance (60 x 5s = 5 menit)
 
 # Mekanisme Pendinginan (Anti-FOMO/Anti-Revenge)
 COOLDOWN_IF_PROFIT = 3600        # Jeda trading di koin ini jika PROFIT (detik)
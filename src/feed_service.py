@@ -0,0 +1,45 @@
+"""
+Feed Service Market Data (standalone, dipakai bersama beberapa bot / konfigurasi, misal demo + live
+atau dua daftar koin berbeda).
+
+    python src/feed_service.py [BTC/USDT ETH/USDT ...]
+
+Satu proses memegang WebSocket market, preload REST & slow data (funding/OI/LSR). Bot dengan
+MARKET_FEED_SERVICE=True memanggil RPC `subscribe(symbols)`; symbol yang belum ada di-preload lalu
+ditambahkan ke stream (SUBSCRIBE, tanpa reconnect), segmen shared memory-nya dibuat saat itu juga.
+Beban ke Binance sebanding jumlah symbol unik, bukan jumlah bot. Symbol tetap di-stream sampai
+service di-restart. Network data (live / testnet) mengikuti PAKAI_DEMO di config feed service.
+"""
+import asyncio
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__)) # src
+project_root = os.path.dirname(current_dir) # project root
+if project_root not in sys.path:
+    sys.path.insert(0, project_root) # Allow: from src.utils...
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)  # Allow: import config
+
+import config
+from src.utils.helper import setup_logger, run_with_telegram
+from src.utils.ipc import ipc_address
+from src.multiprocess import run_ingestion
+
+
+def main(symbols=None):
+    prefix = getattr(config, 'FEED_SERVICE_PREFIX', 'ezfeed')
+    setup_logger('feed')
+    asyncio.run(run_with_telegram(run_ingestion(
+        address=ipc_address('feed', prefix=prefix),
+        symbols=symbols or [],
+        prefix=prefix,
+        role='feed'
+    )))
+
+
+if __name__ == "__main__":
+    try:
+        main([arg.upper() for arg in sys.argv[1:]])
+    except KeyboardInterrupt:
+        print("👋 Feed Service Stopped.")
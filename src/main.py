@@ -17,9 +17,13 @@ if current_dir not in sys.path:
     sys.path.insert(0, current_dir)  # Allow: import config
 
 import config
-from src.utils.helper import logger, kirim_tele, kirim_tele_sync, parse_timeframe_to_seconds, get_next_rounded_time, get_coin_leverage
+from src.utils.helper import logger, log_payload, kirim_tele, kirim_tele_sync, run_with_telegram, parse_timeframe_to_seconds, get_next_rounded_time, get_coin_leverage
 from src.utils.prompt_builder import build_market_prompt, build_sentiment_prompt
+from src.utils.metrics import start_metrics_server
+from src.utils.loop_watchdog import LoopWatchdog
+from src.utils.checkpoint import StateCheckpoint
 from src.utils.calc import calculate_profit_loss_estimation, validate_ai_setup, calculate_trap_entry_setup
+from src.utils.analysis_graph import AnalysisGraph
 
 # MODULE IMPORTS
 from src.modules.market_data import MarketDataManager
@@ -36,6 +40,10 @@ onchain = None
 ai_brain = None
 executor = None
 pattern_recognizer = None
+state_checkpoint = None
+
+# Symbol yang lolos STEP C di candle terakhir yang dievaluasi (kandidat pre-render Vision)
+step_c_passed = set()
 
 async def safety_monitor_loop():
     """
@@ -85,23 +93,26 @@ async def trailing_price_handler(symbol, price):
     if config.ENABLE_TRAILING_STOP and executor:
         await executor.check_trailing_on_price(symbol, price)
 
-async def main():
-    global market_data, sentiment, onchain, ai_brain, executor, pattern_recognizer
-    
-    # Track AI Query Timestamp (Candle ID)
-    analyzed_candle_ts = {}
-    # Time constants
-    timeframe_exec_seconds = parse_timeframe_to_seconds(config.TIMEFRAME_EXEC)
-    
-    # [NEW] Fixed Time Scheduler Logic
-    next_sentiment_update_time = get_next_rounded_time(config.SENTIMENT_UPDATE_INTERVAL)
-    # Jadwal terpisah untuk Analisa AI (agar tidak boros token tiap jam kalau mau)
-    next_sentiment_analysis_time = get_next_rounded_time(config.SENTIMENT_ANALYSIS_INTERVAL)
-    
-    logger.info(f"⏳ Next Sentiment Data Refresh: {time.ctime(next_sentiment_update_time)}")
-    logger.info(f"⏳ Next Sentiment AI Analysis: {time.ctime(next_sentiment_analysis_time)}")
+async def trailing_from_shared(feeds):
+    """Trailing stop dari shared memory (feed service / multi-proses): poll harga symbol yang ada di tracker."""
+    interval = getattr(config, 'MP_TICKER_POLL_INTERVAL', 0.2)
+    last_ts = {}
+    while True:
+        await asyncio.sleep(interval)
+        for symbol in list(executor.safety_orders_tracker):
+            feed = feeds.get(symbol)
+            if feed is None:
+                continue
+            try:
+                price, ts = feed.read_ticker()
+                if ts and ts != last_ts.get(symbol):
+                    last_ts[symbol] = ts
+                    await trailing_price_handler(symbol, price)
+            except Exception as e:
+                logger.error(f"Error in trailing poll {symbol}: {e}")
 
-    # 1. INITIALIZATION
+def build_exchange():
+    """Buat instance ccxt Binance Futures (dipakai mode single maupun tiap proses di mode multi-proses)."""
     exchange = ccxt.binance({
         'apiKey': config.API_KEY_DEMO if config.PAKAI_DEMO else config.API_KEY_LIVE,
         'secret': config.SECRET_KEY_DEMO if config.PAKAI_DEMO else config.SECRET_KEY_LIVE,
@@ -113,222 +124,295 @@ async def main():
         }
     })
     if config.PAKAI_DEMO: exchange.enable_demo_trading(True)
-
-    await kirim_tele("🤖 <b>BOT TRADING STARTED</b>\nAI-Hybrid System Online.", alert=True)
-
-    # 2. SETUP MODULES
-    market_data = MarketDataManager(exchange)
-    sentiment = SentimentAnalyzer()
-    onchain = OnChainAnalyzer()
-    ai_brain = AIBrain()
-    executor = OrderExecutor(exchange)
-    pattern_recognizer = PatternRecognizer(market_data)
-
-    # 3. PRELOAD DATA
-    await market_data.initialize_data()
-    await sentiment.update_all() # Initial Fetch Headline & F&G
+    return exchange
+
+# --- WEBSOCKET CALLBACKS ---
+async def account_update_cb(payload):
+    # Saldo / posisi berubah: available dibaca ulang dari REST saat sizing berikutnya, lalu sync posisi
+    executor.invalidate_available_balance()
+    await executor.sync_positions()
+
+async def order_update_cb(payload):
+    # Handle order updates from WebSocket (FILLED, CANCELED, EXPIRED)
+    o = payload['o']
+    sym = o['s'].replace('USDT', '/USDT')
+    status = o['X']
+
+    # Margin terpakai berubah -> saldo available dibaca ulang dari REST saat sizing berikutnya
+    executor.invalidate_available_balance()
     
-    # 4. START BACKGROUND TASKS
-    # WebSocket Callback Wrappers
-    async def account_update_cb(payload):
-        # Trigger sync when account balance/position changes
-        await executor.sync_positions()
-
-    async def order_update_cb(payload):
-        # Handle order updates from WebSocket (FILLED, CANCELED, EXPIRED)
-        o = payload['o']
-        sym = o['s'].replace('USDT', '/USDT')
-        status = o['X']
+    # --- [NEW] Handle CANCELED/EXPIRED Orders (Realtime) ---
+    if status == 'CANCELED':
+        order_id = str(o.get('i', ''))
+        client_order_id = o.get('c', '')
+        
+        # Check if this is our tracked order
+        tracker = executor.safety_orders_tracker.get(sym, {})
+        tracked_id = str(tracker.get('entry_id', ''))
+        
+        if tracked_id == order_id:
+            # This is our limit entry order - was cancelled manually
+            logger.info(f"🗑️ Order CANCELED manually: {sym} (ID: {order_id})")
+            await executor.remove_from_tracker(sym)
+            await kirim_tele(
+                f"🗑️ <b>ORDER CANCELED</b>\n"
+                f"Order {sym} dibatalkan secara manual.\n"
+                f"Tracker cleaned."
+            )
+        else:
+            # Not our tracked order (could be SL/TP or other) - just log
+            logger.debug(f"🔔 Order canceled (non-entry): {sym} ID {order_id}")
+    
+    elif status == 'EXPIRED':
+        order_id = str(o.get('i', ''))
+        
+        # Check if this is our tracked order
+        tracker = executor.safety_orders_tracker.get(sym, {})
+        tracked_id = str(tracker.get('entry_id', ''))
+        
+        if tracked_id == order_id:
+            logger.info(f"⏰ Order EXPIRED/TIMEOUT: {sym} (ID: {order_id})")
+            await executor.remove_from_tracker(sym)
+            await kirim_tele(
+                f"⏰ <b>ORDER EXPIRED</b>\n"
+                f"Limit Order {sym} kadaluarsa (timeout).\n"
+                f"Tracker cleaned."
+            )
+        else:
+            logger.debug(f"🔔 Order expired (non-entry): {sym} ID {order_id}")
+    
+    elif status == 'FILLED':
+        rp = float(o.get('rp', 0))
+        logger.info(f"⚡ Order Filled: {sym} {o['S']} @ {o['ap']} | RP: {rp}")
         
-        # --- [NEW] Handle CANCELED/EXPIRED Orders (Realtime) ---
-        if status == 'CANCELED':
-            order_id = str(o.get('i', ''))
-            client_order_id = o.get('c', '')
+        # COOLDOWN LOGIC BASED ON RESULT (Profit/Loss)
+        # Only trigger cooldown if this fill actually closes a position (Realized Profit != 0)
+        if rp != 0:
+            if rp > 0:
+                executor.set_cooldown(sym, config.COOLDOWN_IF_PROFIT)
+            else:
+                executor.set_cooldown(sym, config.COOLDOWN_IF_LOSS)
             
-            # Check if this is our tracked order
-            tracker = executor.safety_orders_tracker.get(sym, {})
-            tracked_id = str(tracker.get('entry_id', ''))
+            # Format Pesan
+            pnl = rp
+            order_info = o
+            symbol = sym
+            price = float(o.get('ap', 0))
+            order_type = o.get('o', 'UNKNOWN')
             
-            if tracked_id == order_id:
-                # This is our limit entry order - was cancelled manually
-                logger.info(f"🗑️ Order CANCELED manually: {sym} (ID: {order_id})")
-                await executor.remove_from_tracker(sym)
-                await kirim_tele(
-                    f"🗑️ <b>ORDER CANCELED</b>\n"
-                    f"Order {sym} dibatalkan secara manual.\n"
-                    f"Tracker cleaned."
-                )
-            else:
-                # Not our tracked order (could be SL/TP or other) - just log
-                logger.debug(f"🔔 Order canceled (non-entry): {sym} ID {order_id}")
-        
-        elif status == 'EXPIRED':
-            order_id = str(o.get('i', ''))
+            emoji = "💰" if pnl > 0 else "🛑"
+            title = "TAKE PROFIT HIT" if pnl > 0 else "STOP LOSS HIT"
+            pnl_str = f"+${pnl:.2f}" if pnl > 0 else f"-${abs(pnl):.2f}"
             
-            # Check if this is our tracked order
-            tracker = executor.safety_orders_tracker.get(sym, {})
-            tracked_id = str(tracker.get('entry_id', ''))
+            # Hitung size yang diclose
+            qty_closed = float(order_info.get('q', 0))
+            size_closed_usdt = qty_closed * price
             
-            if tracked_id == order_id:
-                logger.info(f"⏰ Order EXPIRED/TIMEOUT: {sym} (ID: {order_id})")
-                await executor.remove_from_tracker(sym)
-                await kirim_tele(
-                    f"⏰ <b>ORDER EXPIRED</b>\n"
-                    f"Limit Order {sym} kadaluarsa (timeout).\n"
-                    f"Tracker cleaned."
-                )
-            else:
-                logger.debug(f"🔔 Order expired (non-entry): {sym} ID {order_id}")
-        
-        elif status == 'FILLED':
-            rp = float(o.get('rp', 0))
-            logger.info(f"⚡ Order Filled: {sym} {o['S']} @ {o['ap']} | RP: {rp}")
+            # --- ROI CALCULATION ---
+            # 1. Get Leverage from Config
+            leverage = get_coin_leverage(symbol)
             
-            # COOLDOWN LOGIC BASED ON RESULT (Profit/Loss)
-            # Only trigger cooldown if this fill actually closes a position (Realized Profit != 0)
-            if rp != 0:
-                if rp > 0:
-                    executor.set_cooldown(sym, config.COOLDOWN_IF_PROFIT)
-                else:
-                    executor.set_cooldown(sym, config.COOLDOWN_IF_LOSS)
-                
-                # Format Pesan
-                pnl = rp
-                order_info = o
-                symbol = sym
-                price = float(o.get('ap', 0))
-                order_type = o.get('o', 'UNKNOWN')
-                
-                emoji = "💰" if pnl > 0 else "🛑"
-                title = "TAKE PROFIT HIT" if pnl > 0 else "STOP LOSS HIT"
-                pnl_str = f"+${pnl:.2f}" if pnl > 0 else f"-${abs(pnl):.2f}"
-                
-                # Hitung size yang diclose
-                qty_closed = float(order_info.get('q', 0))
-                size_closed_usdt = qty_closed * price
-                
-                # --- ROI CALCULATION ---
-                # 1. Get Leverage from Config
-                leverage = get_coin_leverage(symbol)
-                
-                # 2. Calculate Margin & ROI
-                # Margin = Size / Leverage
-                margin_used = size_closed_usdt / leverage if leverage > 0 else size_closed_usdt
-                
-                roi_percent = 0
-                if margin_used > 0:
-                    roi_percent = (pnl / margin_used) * 100
-                    
-                roi_icon = "🔥" if roi_percent > 0 else "🩸"
-                
-                msg = (
-                        f"{emoji} <b>{title}</b>\n"
-                        f"✨ <b>{symbol}</b>\n"
-                        f"🏷️ Type: {order_type}\n"
-                        f"📏 Size: ${size_closed_usdt:.2f}\n" 
-                        f"💵 Price: {price}\n"
-                        f"💸 PnL: <b>{pnl_str}</b>\n"
-                        f"{roi_icon} ROI: <b>{roi_percent:+.2f}%</b>"
-                    )
-                await kirim_tele(msg)
+            # 2. Calculate Margin & ROI
+            # Margin = Size / Leverage
+            margin_used = size_closed_usdt / leverage if leverage > 0 else size_closed_usdt
+            
+            roi_percent = 0
+            if margin_used > 0:
+                roi_percent = (pnl / margin_used) * 100
                 
-                # Clean up tracker immediately
-                await executor.remove_from_tracker(symbol)
+            roi_icon = "🔥" if roi_percent > 0 else "🩸"
             
-            else:
-                # ENTRY FILL (RP = 0)
-                # Cek jika ini adalah LIMIT ORDER yang terisi
-                order_type = o.get('o', 'UNKNOWN')
-                if order_type == 'LIMIT':
-                     price_filled = float(o.get('ap', 0))
-                     qty_filled = float(o.get('q', 0))
-                     side_filled = o['S'] # BUY/SELL
-                     size_usdt = qty_filled * price_filled
-                     
-                     # Calculate TP/SL for Notification
-                     # [FIX] Ambil langsung dari tracker yang sudah simpan nilai AI
-                     tracker = executor.safety_orders_tracker.get(sym, {})
-                     ai_tp = tracker.get('ai_tp_price', 0)
-                     ai_sl = tracker.get('ai_sl_price', 0)
-                     
-                     tp_str = "-"
-                     sl_str = "-"
-                     rr_str = "-"
-                     
+            msg = (
+                    f"{emoji} <b>{title}</b>\n"
+                    f"✨ <b>{symbol}</b>\n"
+                    f"🏷️ Type: {order_type}\n"
+                    f"📏 Size: ${size_closed_usdt:.2f}\n" 
+                    f"💵 Price: {price}\n"
+                    f"💸 PnL: <b>{pnl_str}</b>\n"
+                    f"{roi_icon} ROI: <b>{roi_percent:+.2f}%</b>"
+                )
+            await kirim_tele(msg)
+            
+            # Clean up tracker immediately
+            await executor.remove_from_tracker(symbol)
+        
+        else:
+            # ENTRY FILL (RP = 0)
+            # Cek jika ini adalah LIMIT ORDER yang terisi
+            order_type = o.get('o', 'UNKNOWN')
+            if order_type == 'LIMIT':
+                 # Catat waktu fill untuk metrik Time-to-Protected
+                 if sym in executor.safety_orders_tracker:
+                     fill_ts = o.get('T')
+                     executor.safety_orders_tracker[sym]['filled_at'] = (int(fill_ts) / 1000) if fill_ts else time.time()
+
+                 price_filled = float(o.get('ap', 0))
+                 qty_filled = float(o.get('q', 0))
+                 side_filled = o['S'] # BUY/SELL
+                 size_usdt = qty_filled * price_filled
+                 
+                 # Calculate TP/SL for Notification
+                 # [FIX] Ambil langsung dari tracker yang sudah simpan nilai AI
+                 tracker = executor.safety_orders_tracker.get(sym, {})
+                 ai_tp = tracker.get('ai_tp_price', 0)
+                 ai_sl = tracker.get('ai_sl_price', 0)
+                 atr_val = tracker.get('atr_value', 0)
+                 
+                 tp_str = "-"
+                 sl_str = "-"
+                 rr_str = "-"
+                 
+                 # [FIX-NOTIF-BUG-1] Start Check AI Setup First
+
+                 if ai_sl > 0 and ai_tp > 0:
+                     tp_str = f"{ai_tp:.4f}"
+                     sl_str = f"{ai_sl:.4f}"
                      
-                     # [FIX-NOTIF-BUG-1] Start Check AI Setup First
-                     ai_sl = tracker.get('ai_sl_price', 0)
-                     ai_tp = tracker.get('ai_tp_price', 0)
-
-                     if ai_sl > 0 and ai_tp > 0:
-                         tp_str = f"{ai_tp:.4f}"
-                         sl_str = f"{ai_sl:.4f}"
-                         
-                         dist_tp = abs(ai_tp - price_filled)
-                         dist_sl = abs(ai_sl - price_filled)
-                         rr = dist_tp / dist_sl if dist_sl > 0 else 0
-                         rr_str = f"1:{rr:.2f}"
+                     dist_tp = abs(ai_tp - price_filled)
+                     dist_sl = abs(ai_sl - price_filled)
+                     rr = dist_tp / dist_sl if dist_sl > 0 else 0
+                     rr_str = f"1:{rr:.2f}"
+                 
+                 elif atr_val > 0:
+                     # Tanpa setup AI: SL/TP fallback ATR (sama dengan install_safety_orders)
+                     dist_sl = atr_val * config.TRAP_SAFETY_SL
+                     dist_tp = atr_val * config.ATR_MULTIPLIER_TP1
                      
-                     elif atr_val > 0:
-                         dist_sl = atr_val * config.TRAP_SAFETY_SL
-                         dist_tp = atr_val * config.ATR_MULTIPLIER_TP1
-                         
-                         # Hitung R:R dari AI setup
-                         if side_filled.upper() == 'BUY':
-                             dist_tp = ai_tp - price_filled
-                             dist_sl = price_filled - ai_sl
-                         else:  # SELL
-                             dist_tp = price_filled - ai_tp
-                             dist_sl = ai_sl - price_filled
-                         
-                         rr = dist_tp / dist_sl if dist_sl > 0 else 0
-                         rr_str = f"1:{rr:.2f}"
+                     if side_filled.upper() == 'BUY':
+                         tp_price = price_filled + dist_tp
+                         sl_price = price_filled - dist_sl
+                     else:  # SELL
+                         tp_price = price_filled - dist_tp
+                         sl_price = price_filled + dist_sl
                      
-                     msg = (
-                        f"✅ <b>LIMIT ENTRY FILLED</b>\n"
-                        f"✨ <b>{sym}</b>\n"
-                        f"🏷️ Type: {order_type}\n"
-                        f"🚀 Side: {side_filled}\n"
-                        f"📏 Size: ${size_usdt:.2f}\n"
-                        f"💵 Price: {price_filled}\n\n"
-                        f"🎯 <b>Safety Orders:</b>\n"
-                        f"• TP: {tp_str}\n"
-                        f"• SL: {sl_str}\n"
-                        f"• R:R: {rr_str}"
-                     )
-                     await kirim_tele(msg)
-
-            # Trigger safety check immediately
-            await executor.sync_positions()
-
-    def whale_handler(symbol, amount, side):
-        # Callback from Market Data (AggTrade)
-        onchain.detect_whale(symbol, amount, side)
-
-    # [FIX] Wrap background tasks dengan proper exception handler
-    async def safe_task_wrapper(coro, task_name):
-        """Wrapper untuk handle exception pada background tasks tanpa crash bot"""
-        while True:
-            try:
-                await coro
-            except asyncio.CancelledError:
-                logger.info(f"⛔ Task {task_name} cancelled.")
-                break
-            except Exception as e:
-                logger.error(f"❌ Task {task_name} crashed: {e}. Restarting in 5s...")
-                await asyncio.sleep(5)
-                # Recreate coroutine untuk restart
-                if task_name == "WebSocket Stream":
-                    coro = market_data.start_stream(account_update_cb, order_update_cb, whale_handler)
-                elif task_name == "Safety Monitor":
-                    coro = safety_monitor_loop()
-
-    asyncio.create_task(safe_task_wrapper(
-        market_data.start_stream(account_update_cb, order_update_cb, whale_handler),
-        "WebSocket Stream"
-    ))
-    asyncio.create_task(safe_task_wrapper(safety_monitor_loop(), "Safety Monitor"))
+                     tp_str = f"{tp_price:.4f}"
+                     sl_str = f"{sl_price:.4f}"
+                     rr = dist_tp / dist_sl if dist_sl > 0 else 0
+                     rr_str = f"1:{rr:.2f}"
+                 
+                 msg = (
+                    f"✅ <b>LIMIT ENTRY FILLED</b>\n"
+                    f"✨ <b>{sym}</b>\n"
+                    f"🏷️ Type: {order_type}\n"
+                    f"🚀 Side: {side_filled}\n"
+                    f"📏 Size: ${size_usdt:.2f}\n"
+                    f"💵 Price: {price_filled}\n\n"
+                    f"🎯 <b>Safety Orders:</b>\n"
+                    f"• TP: {tp_str}\n"
+                    f"• SL: {sl_str}\n"
+                    f"• R:R: {rr_str}"
+                 )
+                 await kirim_tele(msg)
+
+        # Trigger safety check immediately
+        await executor.sync_positions()
+
+        # Entry fill: pasang SL/TP sekarang juga (tanpa menunggu siklus Safety Monitor)
+        if rp == 0:
+            pos = executor.position_cache.get(sym.split('/')[0])
+            if pos and executor.safety_orders_tracker.get(sym, {}).get('status') != 'SECURED':
+                spawn_background(executor.install_safety_orders(sym, pos), f"Install Safety {sym}")
 
+def whale_handler(symbol, amount, side, price=0.0):
+    # Callback from Market Data (AggTrade)
+    onchain.detect_whale(symbol, amount, side, price)
+
+# Task one-shot: referensi disimpan (cegah GC saat masih jalan) & exception dicatat
+_background_tasks = set()
+
+def spawn_background(coro, task_name):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+
+    def _done(t):
+        _background_tasks.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.error(f"❌ Task {task_name} failed: {t.exception()}")
+    task.add_done_callback(_done)
+    return task
+
+# [FIX] Wrap background tasks dengan proper exception handler
+async def safe_task_wrapper(coro_factory, task_name):
+    """
+    Wrapper untuk handle exception pada background tasks tanpa crash bot.
+    coro_factory: callable tanpa argumen yang membuat coroutine baru (untuk restart).
+    """
+    while True:
+        try:
+            await coro_factory()
+        except asyncio.CancelledError:
+            logger.info(f"⛔ Task {task_name} cancelled.")
+            break
+        except Exception as e:
+            logger.error(f"❌ Task {task_name} crashed: {e}. Restarting in 5s...")
+            await asyncio.sleep(5)
+
+def setup_state_checkpoint(components, analyzed_candle_ts=None, filename=None):
+    """
+    [NEW] Warm State: daftarkan komponen ({nama: objek dengan export_state/restore_state}) ke checkpoint,
+    lalu restore dari file. Return StateCheckpoint, atau None jika CHECKPOINT_ENABLED=False.
+    """
+    if not getattr(config, 'CHECKPOINT_ENABLED', True):
+        return None
+    checkpoint = StateCheckpoint(filename)
+    for name, component in components.items():
+        checkpoint.register(name, component.export_state, component.restore_state)
+    if analyzed_candle_ts is not None:
+        checkpoint.register(
+            'main', lambda: {'analyzed_candle_ts': analyzed_candle_ts},
+            lambda state, age: analyzed_candle_ts.update(state.get('analyzed_candle_ts', {}))
+        )
+    checkpoint.load()
+    return checkpoint
+
+def pattern_prewarm_candidates():
+    """
+    Symbol yang kemungkinan dianalisa AI: lolos filter teknikal (STEP C) di candle sebelumnya dan
+    lolos cek posisi aktif / cooldown / limit kategori (STEP B). Symbol lain tidak di-render (hemat Vision).
+    """
+    candidates = []
+    for coin in config.DAFTAR_KOIN:
+        symbol = coin['symbol']
+        if symbol not in step_c_passed:
+            continue
+        if executor.has_active_or_pending_trade(symbol) or executor.is_under_cooldown(symbol):
+            continue
+        if config.MAX_POSITIONS_PER_CATEGORY > 0:
+            if executor.get_open_positions_count_by_category(coin.get('category', 'UNKNOWN')) >= config.MAX_POSITIONS_PER_CATEGORY:
+                continue
+        candidates.append(symbol)
+    return candidates
+
+def build_analysis_graph():
+    """
+    DAG analisa per symbol: korelasi BTC dijalankan sendiri sebelum filter STEP C; pattern (Vision) dan
+    order book saling independen -> jalan bersamaan, hanya untuk setup yang lolos STEP C. Korelasi
+    di-memo per candle; pattern punya cache candle sendiri (hanya hasil valid), order book selalu live.
+    """
+    graph = AnalysisGraph()
+    graph.step('btc_corr', lambda symbol: market_data.get_btc_correlation(symbol))
+    graph.step('pattern', lambda symbol: pattern_recognizer.analyze_pattern(symbol), memo=False)
+    graph.step('order_book', lambda symbol: market_data.get_order_book_depth(symbol), memo=False)
+    return graph
+
+async def trading_loop(analyzed_candle_ts):
+    """Main Trading Loop (scheduler sentiment + round robin analisa AI per koin)."""
+    # [NEW] Pre-render chart + Vision saat candle SETUP close (keluar dari critical path keputusan)
+    if getattr(config, 'PATTERN_PREWARM_ENABLED', False) and config.USE_PATTERN_RECOGNITION and pattern_recognizer.client:
+        asyncio.create_task(safe_task_wrapper(
+            lambda: pattern_recognizer.prewarm_loop(pattern_prewarm_candidates),
+            "Pattern Prewarm"
+        ))
+
+    analysis_graph = build_analysis_graph()
+
+    # [NEW] Fixed Time Scheduler Logic
+    next_sentiment_update_time = get_next_rounded_time(config.SENTIMENT_UPDATE_INTERVAL)
+    # Jadwal terpisah untuk Analisa AI (agar tidak boros token tiap jam kalau mau)
+    next_sentiment_analysis_time = get_next_rounded_time(config.SENTIMENT_ANALYSIS_INTERVAL)
+    
+    logger.info(f"⏳ Next Sentiment Data Refresh: {time.ctime(next_sentiment_update_time)}")
+    logger.info(f"⏳ Next Sentiment AI Analysis: {time.ctime(next_sentiment_analysis_time)}")
     logger.info("🚀 MAIN LOOP RUNNING...")
 
     # 5. MAIN TRADING LOOP
@@ -346,7 +430,7 @@ async def main():
                 try:
                     # Jalankan di background task agar tidak memblokir main loop (Fire & Forget)
                     asyncio.create_task(sentiment.update_all())
-                    asyncio.create_task(asyncio.to_thread(onchain.fetch_stablecoin_inflows))
+                    asyncio.create_task(onchain.fetch_stablecoin_inflows())
                     
                     # Schedule Next Update
                     next_sentiment_update_time = get_next_rounded_time(config.SENTIMENT_UPDATE_INTERVAL)
@@ -365,7 +449,7 @@ async def main():
                         prompt = build_sentiment_prompt(s_data, o_data)
                         
                         # Ask AI
-                        logger.info(f"📝 SENTIMENT AI PROMPT:\n{prompt}")
+                        log_payload("📝 SENTIMENT AI PROMPT:", prompt)
                         result = await ai_brain.analyze_sentiment(prompt)
                         
                         if result:
@@ -390,7 +474,7 @@ async def main():
                                 f"<i>Analisa ini digenerate otomatis oleh AI ({config.AI_SENTIMENT_MODEL})</i>"
                             )
                             
-                            logger.info(f"📤 SENTIMENT TELEGRAM MESSAGE:\n{msg}")
+                            log_payload("📤 SENTIMENT TELEGRAM MESSAGE:", msg)
                             await kirim_tele(msg, channel='sentiment')
                             logger.info("✅ Sentiment Report Sent.")
                     except Exception as e:
@@ -437,7 +521,24 @@ async def main():
                 if current_cat_count >= config.MAX_POSITIONS_PER_CATEGORY:
                    await asyncio.sleep(config.LOOP_SLEEP_DELAY)
                    continue
-            
+
+            # Candle-Based Throttling (Smart Execution)
+            # Logic: Hanya tanya AI jika candle Exec Timeframe (misal 1H) sudah close & berganti baru.
+            # Kita bandingkan timestamp candle terakhir yang datanya kita ambil vs yang terakhir kita analisa.
+            # (Dicek sebelum DAG analisa agar candle yang sudah dianalisa tidak memicu Vision / order book)
+            current_candle_ts = tech_data.get('candle_timestamp', 0)
+            last_analyzed_ts = analyzed_candle_ts.get(symbol, 0)
+
+            if current_candle_ts <= last_analyzed_ts:
+                # Candle ID masih sama = Candle belum ganti = Skip Analisa
+                await asyncio.sleep(config.LOOP_SLEEP_DELAY)
+                continue
+
+            # [NEW] DAG Analisa tahap 1: hanya korelasi BTC (input filter STEP C, di-memo per candle)
+            analysis = {}
+            if symbol != config.BTC_SYMBOL:
+                analysis = await analysis_graph.run(symbol, current_candle_ts, ['btc_corr'])
+
             # --- STEP C: TRADITIONAL FILTER FIRST ---
             # Don't waste AI tokens on garbage setups
             # Rule: Harusnya ada sinyal teknikal dasar dulu (e.g. RSI extreme atau Trend following)
@@ -455,7 +556,7 @@ async def main():
                     is_interesting = True
             else:
                 # Non-BTC: Cek korelasi dan config seperti biasa
-                btc_corr = await market_data.get_btc_correlation(symbol)
+                btc_corr = analysis['btc_corr']
                 
                 # [LOGIC UPDATE] Cek Konfigurasi BTC Correlation Per-Koin
                 use_btc_corr_config = coin_cfg.get('btc_corr', True)  # Default True
@@ -490,30 +591,23 @@ async def main():
             
 
             if not is_interesting:
+                step_c_passed.discard(symbol)
                 await asyncio.sleep(config.LOOP_SKIP_DELAY)
                 continue
+            step_c_passed.add(symbol)
+
+            # DAG Analisa tahap 2 (hanya setup yang lolos STEP C): pattern (Vision) & order book jalan
+            # bersamaan (latency = cabang terpanjang; Vision bisa sudah siap dari pre-render background)
+            analysis.update(await analysis_graph.run(symbol, current_candle_ts, ['pattern', 'order_book']))
 
             # Strategy Selection is now handled by AI
             tech_data['strategy_mode'] = 'AI_DECISION'
 
             # --- STEP D: AI ANALYSIS ---
-            # Candle-Based Throttling (Smart Execution)
-            # Logic: Hanya tanya AI jika candle Exec Timeframe (misal 1H) sudah close & berganti baru.
-            # Kita bandingkan timestamp candle terakhir yang datanya kita ambil vs yang terakhir kita analisa.
-            
-            current_candle_ts = tech_data.get('candle_timestamp', 0)
-            last_analyzed_ts = analyzed_candle_ts.get(symbol, 0)
-            
-            if current_candle_ts <= last_analyzed_ts:
-                # Candle ID masih sama = Candle belum ganti = Skip Analisa
-                await asyncio.sleep(config.LOOP_SLEEP_DELAY)
-                continue
-
-
             logger.info(f"🤖 Asking AI: {symbol} (Corr: {btc_corr:.2f}, Candle: {current_candle_ts}) ...")
             
-            # Pattern Recognition (Vision)
-            pattern_ctx = await pattern_recognizer.analyze_pattern(symbol)
+            # Pattern Recognition (Vision) - hasil DAG
+            pattern_ctx = analysis['pattern']
             
             # Validasi Pattern Output - Skip jika gagal/terpotong
             if not pattern_ctx.get('is_valid', True):
@@ -521,9 +615,8 @@ async def main():
                 await asyncio.sleep(config.LOOP_SKIP_DELAY)
                 continue
             
-            # Order Book Depth Analysis (Scalping Context)
-            ob_depth = await market_data.get_order_book_depth(symbol)
-            tech_data['order_book'] = ob_depth
+            # Order Book Depth Analysis (Scalping Context) - hasil DAG
+            tech_data['order_book'] = analysis['order_book']
             # ==============================================================================
             # 6. GENERATE AI SIGNAL
             # ==============================================================================
@@ -747,12 +840,91 @@ async def main():
             logger.error(f"Main Loop Error: {e}")
             await asyncio.sleep(config.ERROR_SLEEP_DELAY)
 
+async def main():
+    global market_data, sentiment, onchain, ai_brain, executor, pattern_recognizer, state_checkpoint
+    
+    # Track AI Query Timestamp (Candle ID)
+    analyzed_candle_ts = {}
+
+    # 1. INITIALIZATION
+    exchange = build_exchange()
+
+    await kirim_tele("🤖 <b>BOT TRADING STARTED</b>\nAI-Hybrid System Online.", alert=True)
+
+    # 2. SETUP MODULES
+    # [NEW] Feed Service: market data dibaca dari feed lokal bersama (WS/REST tidak diduplikasi per bot)
+    use_feed = getattr(config, 'MARKET_FEED_SERVICE', False)
+    if use_feed:
+        from src.modules.shared_market import SharedMarketData, feed_address
+        from src.utils.ipc import IpcClient
+        feed_client = IpcClient(feed_address())
+        await feed_client.connect()
+        feed_client.on('whale', lambda event: whale_handler(*event))
+        market_data = SharedMarketData(feed_client)
+    else:
+        market_data = MarketDataManager(exchange)
+    sentiment = SentimentAnalyzer()
+    onchain = OnChainAnalyzer()
+    ai_brain = AIBrain()
+    executor = OrderExecutor(exchange)
+    pattern_recognizer = PatternRecognizer(market_data)
+
+    # Metrics Endpoint (Prometheus) & Loop Watchdog (opt-in)
+    await start_metrics_server()
+    if getattr(config, 'LOOP_WATCHDOG_ENABLED', False):
+        LoopWatchdog().start()
+
+    # [NEW] Warm State: restore cache/histori dari checkpoint sebelum preload
+    state_checkpoint = setup_state_checkpoint({
+        'market_data': market_data,
+        'pattern': pattern_recognizer,
+        'sentiment': sentiment,
+        'onchain': onchain,
+        'executor': executor,
+    }, analyzed_candle_ts)
+
+    # 3. PRELOAD DATA
+    await market_data.initialize_data()
+    await executor.seed_account_state() # Cache Leverage/Margin & Saldo
+    await sentiment.update_all() # Initial Fetch Headline & F&G
+    
+    # 4. START BACKGROUND TASKS
+    if use_feed:
+        # Stream market milik feed service -> bot ini cukup user data stream + trailing dari shared memory
+        user_stream = MarketDataManager(exchange, symbols=[])
+        asyncio.create_task(safe_task_wrapper(
+            lambda: user_stream.start_stream(account_update_cb, order_update_cb, include_market=False),
+            "User Data Stream"
+        ))
+        if config.ENABLE_TRAILING_STOP:
+            asyncio.create_task(safe_task_wrapper(lambda: trailing_from_shared(market_data.feeds), "Trailing Stop"))
+    else:
+        asyncio.create_task(safe_task_wrapper(
+            lambda: market_data.start_stream(account_update_cb, order_update_cb, whale_handler),
+            "WebSocket Stream"
+        ))
+    asyncio.create_task(safe_task_wrapper(safety_monitor_loop, "Safety Monitor"))
+    if state_checkpoint:
+        state_checkpoint.start_periodic()
+
+    await trading_loop(analyzed_candle_ts)
+
 if __name__ == "__main__":
+    # Mode multi-proses: ingestion / decision / execution di proses terpisah (lihat src/multiprocess.py)
+    if getattr(config, 'MULTIPROCESS_MODE', False) or '--multiprocess' in sys.argv:
+        from src.multiprocess import run_multiprocess
+        run_multiprocess()
+        sys.exit(0)
+
     try:
-        asyncio.run(main())
+        asyncio.run(run_with_telegram(main()))
     except KeyboardInterrupt:
         print("👋 Bot Stopped Manually.")
+        if state_checkpoint:
+            state_checkpoint.save()
         kirim_tele_sync("🛑 Bot Stopped Manually")
     except Exception as e:
         print(f"💀 Fatal Crash: {e}")
-        kirim_tele_sync(f"💀 Bot Crash: {e}")
\ No newline at end of file
+        if state_checkpoint:
+            state_checkpoint.save()
+        kirim_tele_sync(f"💀 Bot Crash: {e}")
@@ -1,14 +1,41 @@
 
-from openai import AsyncOpenAI
+import asyncio
 import json
+import time
+from collections import deque
 import config
-from src.utils.helper import logger
-import re
+from src.utils.helper import logger, log_payload
+from src.utils.metrics import (
+    LLM_LATENCY, LLM_ERRORS, LLM_PARSE, LLM_CASCADE, LLM_CASCADE_SAVED, LLM_REQUEST, LLM_HEDGE
+)
+from src.utils.llm_schema import (
+    DECISION_SCHEMA, SCREEN_SCHEMA, SENTIMENT_SCHEMA, CompiledSchema, extract_json, response_format, sub_schema
+)
+from src.utils.prompt_builder import build_screening_prompt
+
+_SCHEMAS = {'trade_decision': DECISION_SCHEMA, 'setup_screen': SCREEN_SCHEMA, 'sentiment_report': SENTIMENT_SCHEMA}
+
+
+def _decision_critical_fields(clean):
+    """Field yang wajib valid sebelum keputusan boleh dipakai (harga hanya relevan jika BUY/SELL)."""
+    fields = ['decision', 'confidence']
+    if clean.get('decision') in ('BUY', 'SELL'):
+        fields += ['entry_price', 'tp_price', 'sl_price']
+    return fields
+
+
+def _screen_critical_fields(clean):
+    return ['verdict', 'confidence']
+
+
+def _sentiment_critical_fields(clean):
+    return ['overall_sentiment', 'sentiment_score', 'summary']
 
 class AIBrain:
     def __init__(self):
         if config.AI_API_KEY:
             import httpx
+            from openai import AsyncOpenAI
             self.client = AsyncOpenAI(
                 base_url=config.AI_BASE_URL,
                 api_key=config.AI_API_KEY,
@@ -18,10 +45,33 @@ class AIBrain:
             logger.info(f"🧠 AI Brain Initialized: {self.model_name} via OpenRouter")
             if getattr(config, 'AI_REASONING_ENABLED', False):
                 logger.info(f"🧠 Reasoning Feature ENABLED (Effort: {config.AI_REASONING_EFFORT})")
+
+            # [NEW] Hedged Request: client kedua hanya jika endpoint hedge berbeda
+            hedge_url = getattr(config, 'AI_HEDGE_BASE_URL', None)
+            if hedge_url:
+                self.hedge_client = AsyncOpenAI(
+                    base_url=hedge_url,
+                    api_key=getattr(config, 'AI_HEDGE_API_KEY', None) or config.AI_API_KEY,
+                    http_client=httpx.AsyncClient()
+                )
+            else:
+                self.hedge_client = self.client
+            self.hedge_model = getattr(config, 'AI_HEDGE_MODEL', None) or self.model_name
+            if getattr(config, 'AI_HEDGE_ENABLED', False):
+                logger.info(f"⏱️ Hedged Request ENABLED: {self.hedge_model} via {hedge_url or config.AI_BASE_URL}")
         else:
             self.client = None
+            self.hedge_client = None
             logger.warning("⚠️ AI_API_KEY not found. AI Brain is disabled.")
 
+        # [NEW] Structured Output: validator di-compile sekali, model yang menolak response_format diingat
+        self.validators = {name: CompiledSchema(schema) for name, schema in _SCHEMAS.items()}
+        self._no_schema_models = set()
+
+        # [NEW] Hedged Request: sampel latency terakhir per kind (deadline persentil) + token bucket biaya
+        self._latency_window = {}
+        self._hedge_tokens = 1.0
+
     def _build_reasoning_config(self):
         """
         Build reasoning configuration berdasarkan config.
@@ -39,76 +89,273 @@ class AIBrain:
         }
         return reasoning_config
 
+    def _log_reasoning(self, completion):
+        """[LOGGING REASONING] Catat field reasoning jika provider mengirimkannya."""
+        try:
+            msg_obj = completion.choices[0].message
+            # Coba berbagai kemungkinan field reasoning (tergantung SDK & Provider)
+            r_content = getattr(msg_obj, 'reasoning', None)
+            if not r_content: r_content = getattr(msg_obj, 'reasoning_content', None) 
+            if not r_content: # Cek di model_dump/extra jika pakai pydantic model underlying
+                model_extra = getattr(msg_obj, 'model_extra', {}) or {}
+                r_content = model_extra.get('reasoning') or model_extra.get('reasoning_content')
+            
+            if r_content:
+                log_payload("🧠💭 [AI REASONING]", r_content)
+        except Exception as e_reason:
+            logger.warning(f"⚠️ Failed to extract/log reasoning: {e_reason}")
+
+    async def _create(self, kind, model, messages, temperature, schema_name=None, schema=None, client=None, **kwargs):
+        """
+        Panggil chat completion. Jika AI_STRUCTURED_OUTPUT aktif, kirim JSON schema (response_format);
+        model/provider yang menolak (400) diingat dan otomatis fallback ke JSON via prompt.
+        """
+        from openai import BadRequestError
+
+        client = client or self.client
+
+        params = dict(
+            extra_headers={
+                "HTTP-Referer": config.AI_APP_URL, 
+                "X-Title": config.AI_APP_TITLE, 
+            },
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            **kwargs
+        )
+        use_schema = (schema is not None and getattr(config, 'AI_STRUCTURED_OUTPUT', True)
+                      and model not in self._no_schema_models)
+        if use_schema:
+            params['response_format'] = response_format(schema_name, schema)
+
+        llm_start = time.perf_counter()
+        try:
+            completion = await client.chat.completions.create(**params)
+        except BadRequestError as e:
+            if not use_schema:
+                raise
+            logger.warning(f"⚠️ {model} menolak structured output ({e}). Fallback ke JSON via prompt.")
+            self._no_schema_models.add(model)
+            params.pop('response_format')
+            llm_start = time.perf_counter()
+            completion = await client.chat.completions.create(**params)
+        LLM_LATENCY.observe(time.perf_counter() - llm_start, kind=kind)
+        return completion
+
+    async def _request_structured(self, kind, model, messages, schema_name, critical_fn, temperature,
+                                  client=None, **kwargs):
+        """
+        Request + parse + validasi schema. Field kritis (critical_fn) yang rusak/hilang di-retry secara
+        tertarget: model hanya diminta mengirim ulang field tersebut (output kecil), hasilnya di-merge.
+        Return (clean_dict, raw_text). Raise ValueError jika field kritis tetap tidak valid.
+        """
+        validator = self.validators[schema_name]
+        schema = validator.schema
+
+        completion = await self._create(kind, model, messages, temperature, schema_name, schema, client, **kwargs)
+        if kind == 'logic' and getattr(config, 'AI_LOG_REASONING', False):
+            self._log_reasoning(completion)
+        raw_text = completion.choices[0].message.content or ""
+
+        try:
+            clean, errors = validator.validate(extract_json(raw_text))
+        except ValueError as e:
+            clean, errors = {}, {'$': str(e)}
+
+        repaired = False
+        for _ in range(getattr(config, 'AI_SCHEMA_REPAIR_RETRIES', 1)):
+            bad = {f: errors.get(f, errors.get('$', 'wajib ada')) for f in critical_fn(clean) if f not in clean}
+            if not bad:
+                break
+            logger.warning(f"⚠️ AI output field rusak {list(bad)}. Retry tertarget...")
+            fix_prompt = (
+                "Your previous JSON had missing/invalid fields: "
+                + "; ".join(f"{f}: {err}" for f, err in bad.items())
+                + f". Return ONLY a JSON object with corrected values for exactly these keys: {list(bad)}."
+            )
+            fix_messages = messages + [
+                {"role": "assistant", "content": raw_text or "{}"},
+                {"role": "user", "content": fix_prompt},
+            ]
+            fix_completion = await self._create(
+                kind, model, fix_messages, temperature, f"{schema_name}_fix", sub_schema(schema, bad), client,
+                max_tokens=getattr(config, 'AI_SCHEMA_REPAIR_MAX_TOKENS', 300)
+            )
+            try:
+                fixed, fix_errors = validator.validate(extract_json(fix_completion.choices[0].message.content or ""))
+            except ValueError as e:
+                fixed, fix_errors = {}, {'$': str(e)}
+            clean.update({k: v for k, v in fixed.items() if k in bad})
+            errors.update({k: v for k, v in fix_errors.items() if k.split('.')[0] in bad})
+            repaired = True
+
+        bad = [f for f in critical_fn(clean) if f not in clean]
+        if bad:
+            LLM_PARSE.inc(kind=kind, result='failed')
+            raise ValueError(f"Field kritis tidak valid: {', '.join(bad)} (raw: {raw_text[:200]})")
+        LLM_PARSE.inc(kind=kind, result='repaired' if repaired else 'ok')
+        return clean, raw_text
+
+    def _hedge_delay(self, kind):
+        """Deadline hedge: persentil AI_HEDGE_QUANTILE dari latency main model terakhir (min AI_HEDGE_MIN_DELAY)."""
+        samples = self._latency_window.get(kind)
+        if not samples or len(samples) < getattr(config, 'AI_HEDGE_MIN_SAMPLES', 20):
+            return getattr(config, 'AI_HEDGE_DEFAULT_DELAY', 20)
+        ordered = sorted(samples)
+        idx = min(len(ordered) - 1, int(getattr(config, 'AI_HEDGE_QUANTILE', 0.9) * len(ordered)))
+        return max(getattr(config, 'AI_HEDGE_MIN_DELAY', 3), ordered[idx])
+
+    def _record_latency(self, kind, elapsed):
+        """Latency main model saja (bukan hedge) -> basis deadline hedge tetap mencerminkan main model."""
+        window = self._latency_window.get(kind)
+        if window is None:
+            window = self._latency_window[kind] = deque(maxlen=getattr(config, 'AI_HEDGE_WINDOW', 100))
+        window.append(elapsed)
+
+    async def _request_hedged(self, kind, messages, **kwargs):
+        """
+        [NEW] Hedged Request: jika main model belum menjawab dalam deadline (_hedge_delay), request kedua
+        dikirim ke AI_HEDGE_MODEL / AI_HEDGE_BASE_URL. Response valid (lolos validasi schema) pertama menang,
+        yang lain di-cancel. Tiap request menambah AI_HEDGE_MAX_RATE token, hedge memakai 1 token
+        -> rata-rata rate hedge tidak melebihi AI_HEDGE_MAX_RATE.
+        Window latency hanya berisi waktu main model: dicatat saat main selesai (menang / kalah / gagal);
+        jika di-cancel karena hedge menang, waktu sampai cancel dicatat sebagai batas bawah.
+        """
+        start = time.perf_counter()
+        if not getattr(config, 'AI_HEDGE_ENABLED', False):
+            result = await self._request_structured(kind, self.model_name, messages, **kwargs)
+            elapsed = time.perf_counter() - start
+            self._record_latency(kind, elapsed)
+            LLM_REQUEST.observe(elapsed, kind=kind)
+            return result
+
+        self._hedge_tokens = min(getattr(config, 'AI_HEDGE_BURST', 2),
+                                 self._hedge_tokens + getattr(config, 'AI_HEDGE_MAX_RATE', 0.1))
+        delay = self._hedge_delay(kind)
+        primary = asyncio.create_task(self._request_structured(kind, self.model_name, messages, **kwargs))
+        # Callback jalan saat main selesai atau ter-cancel -> perf_counter() = waktu selesai / batas bawah
+        primary.add_done_callback(lambda _: self._record_latency(kind, time.perf_counter() - start))
+        tasks = {primary: 'primary'}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                if self._hedge_tokens >= 1:
+                    self._hedge_tokens -= 1
+                    logger.warning(f"⏱️ {self.model_name} belum menjawab dalam {delay:.1f}s. Hedge ke {self.hedge_model}...")
+                    hedge = asyncio.create_task(self._request_structured(
+                        kind, self.hedge_model, messages, client=self.hedge_client, **kwargs
+                    ))
+                    tasks[hedge] = 'hedge'
+                else:
+                    LLM_HEDGE.inc(result='skipped_budget')
+
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    LLM_REQUEST.observe(time.perf_counter() - start, kind=kind)
+                    if len(tasks) > 1:
+                        LLM_HEDGE.inc(result=f"{tasks[task]}_won")
+                        if tasks[task] == 'hedge':
+                            logger.info(f"⚡ Hedge {self.hedge_model} menang ({time.perf_counter() - start:.1f}s)")
+                    return task.result()
+            if len(tasks) > 1:
+                LLM_HEDGE.inc(result='both_failed')
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _screen_market(self, prompt_text):
+        """
+        [NEW] Tier 1 Model Cascade: model murah menilai WAIT / CANDIDATE.
+        Return hasil WAIT jika setup disaring, None jika harus eskalasi ke main model
+        (termasuk saat screening gagal -> fail-open, keputusan tetap di main model).
+        """
+        screen_model = getattr(config, 'AI_SCREEN_MODEL', self.model_name)
+        screen_start = time.perf_counter()
+        try:
+            screen, _ = await self._request_structured(
+                kind='screen',
+                model=screen_model,
+                messages=[{"role": "user", "content": build_screening_prompt(prompt_text)}],
+                schema_name='setup_screen',
+                critical_fn=_screen_critical_fields,
+                temperature=config.AI_TEMPERATURE,
+                max_tokens=getattr(config, 'AI_SCREEN_MAX_TOKENS', 150)
+            )
+        except Exception as e:
+            LLM_ERRORS.inc(kind='screen')
+            LLM_CASCADE.inc(route='screen_failed')
+            logger.warning(f"⚠️ Screening gagal ({e}). Eskalasi ke {self.model_name}.")
+            return None
+        screen_latency = time.perf_counter() - screen_start
+
+        verdict, confidence = screen['verdict'], screen['confidence']
+        escalate_floor = config.AI_CONFIDENCE_THRESHOLD - getattr(config, 'AI_SCREEN_ESCALATE_MARGIN', 15)
+        if verdict == 'CANDIDATE' and confidence >= escalate_floor:
+            LLM_CASCADE.inc(route='escalated')
+            logger.info(f"🔎 Screening CANDIDATE {screen.get('direction', 'NONE')} ({confidence}%) -> eskalasi ke {self.model_name}")
+            return None
+
+        LLM_CASCADE.inc(route='screened_out')
+        # Estimasi hemat = rata-rata latency main model - latency screening
+        LLM_CASCADE_SAVED.inc(max(0.0, LLM_LATENCY.mean(kind='logic') - screen_latency))
+        logger.info(f"🔎 Screening {verdict} ({confidence}%) via {screen_model}: {screen.get('reason', '-')}")
+        return {
+            "decision": "WAIT",
+            "confidence": confidence,
+            "reason": f"[Screening {screen_model}] {screen.get('reason', '-')}",
+            "selected_strategy": "SCREENED_OUT",
+            "screening": screen,
+        }
+
     async def analyze_market(self, prompt_text):
         """
-        Send prompt to AI and parse JSON response.
+        Send prompt to AI and parse JSON response (structured output + validasi schema).
+        Jika AI_CASCADE_ENABLED: screening model murah dulu, main model hanya untuk kandidat.
         """
         if not self.client:
             return {"decision": "WAIT", "confidence": 0, "reason": "AI Key Missing"}
 
-        logger.info(f"🧠 AI PROMPT SENT:\n{prompt_text}")
+        log_payload("🧠 AI PROMPT SENT:", prompt_text)
+
+        if getattr(config, 'AI_CASCADE_ENABLED', False):
+            screened = await self._screen_market(prompt_text)
+            if screened is not None:
+                return screened
 
         try:
-            # Generate Content
-            completion = await self.client.chat.completions.create(
-                extra_headers={
-                    "HTTP-Referer": config.AI_APP_URL, 
-                    "X-Title": config.AI_APP_TITLE, 
-                },
-                extra_body=self._build_reasoning_config(),
-                model=self.model_name,
+            decision_json, _ = await self._request_hedged(
+                kind='logic',
                 messages=[ 
                     {
                         "role": "user",
                         "content": prompt_text
                     }
                 ],
-                temperature=config.AI_TEMPERATURE
+                schema_name='trade_decision',
+                critical_fn=_decision_critical_fields,
+                temperature=config.AI_TEMPERATURE,
+                extra_body=self._build_reasoning_config()
             )
-
-            # [LOGGING REASONING]
-            if getattr(config, 'AI_LOG_REASONING', False):
-                try:
-                    msg_obj = completion.choices[0].message
-                    # Coba berbagai kemungkinan field reasoning (tergantung SDK & Provider)
-                    r_content = getattr(msg_obj, 'reasoning', None)
-                    if not r_content: r_content = getattr(msg_obj, 'reasoning_content', None) 
-                    if not r_content: # Cek di model_dump/extra jika pakai pydantic model underlying
-                        model_extra = getattr(msg_obj, 'model_extra', {}) or {}
-                        r_content = model_extra.get('reasoning') or model_extra.get('reasoning_content')
-                    
-                    if r_content:
-                        logger.info(f"🧠💭 [AI REASONING START]\n{r_content}\n🧠💭 [AI REASONING END]")
-                except Exception as e_reason:
-                    logger.warning(f"⚠️ Failed to extract/log reasoning: {e_reason}")
-            
-            # Text Cleaning (Robust Regex)
-            raw_text = completion.choices[0].message.content
-            
-            # Cari substring yang diawali '{' dan diakhiri '}'
-            match = re.search(r"\{.*\}", raw_text, re.DOTALL)
-            
-            if match:
-                cleaned_text = match.group(0)
-                # Parse JSON
-                decision_json = json.loads(cleaned_text)
-            else:
-                # Fallback simple clean if regex fails (though unlikely if JSON exists)
-                cleaned_text = raw_text.replace('```json', '').replace('```', '').strip()
-                decision_json = json.loads(cleaned_text)
             
             # Standardize Output
             if "decision" not in decision_json: decision_json["decision"] = "WAIT"
             if "confidence" not in decision_json: decision_json["confidence"] = 0
             
-            # Log full response dengan indentasi agar rapi
-            logger.info(f"🧠 FULL AI RESPONSE:\n{json.dumps(decision_json, indent=2, ensure_ascii=False)}")
+            # Full response (indentasi) -> arsip payload; log utama hanya preview / sampel
+            log_payload("🧠 FULL AI RESPONSE:", json.dumps(decision_json, indent=2, ensure_ascii=False))
             return decision_json
 
         except Exception as e:
-            # Safe raw_text access for logging
-            raw_text_snippet = raw_text[:200] if 'raw_text' in locals() and raw_text else "None"
-            logger.error(f"❌ AI Analysis Failed: {e}. Raw Text snippet: {raw_text_snippet}...")
+            LLM_ERRORS.inc(kind='logic')
+            logger.error(f"❌ AI Analysis Failed: {e}")
             return {"decision": "WAIT", "confidence": 0, "reason": "AI Error"}
 
     async def analyze_sentiment(self, prompt_text):
@@ -123,31 +370,19 @@ class AIBrain:
         target_model = getattr(config, 'AI_SENTIMENT_MODEL', self.model_name)
         
         try:
-            completion = await self.client.chat.completions.create(
-                extra_headers={
-                    "HTTP-Referer": config.AI_APP_URL, 
-                    "X-Title": config.AI_APP_TITLE, 
-                },
+            decision_json, _ = await self._request_structured(
+                kind='sentiment',
                 model=target_model,
                 messages=[{"role": "user", "content": prompt_text}],
+                schema_name='sentiment_report',
+                critical_fn=_sentiment_critical_fields,
                 # Sentiment boleh lebih kreatif sedikit
                 temperature=0.3 
             )
-            
-            raw_text = completion.choices[0].message.content
-            
-            # Cleaning JSON
-            match = re.search(r"\{.*\}", raw_text, re.DOTALL)
-            if match:
-                cleaned_text = match.group(0)
-                decision_json = json.loads(cleaned_text)
-            else:
-                cleaned_text = raw_text.replace('```json', '').replace('```', '').strip()
-                decision_json = json.loads(cleaned_text)
-                
             logger.info(f"🧠 Sentiment Analysis Done via {target_model}")
             return decision_json
 
         except Exception as e:
+            LLM_ERRORS.inc(kind='sentiment')
             logger.error(f"❌ Sentiment Analysis Failed: {e}")
             return None
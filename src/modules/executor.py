@@ -5,6 +5,10 @@ import os
 import ccxt.async_support as ccxt
 import config
 from src.utils.helper import logger, kirim_tele
+from src.utils.metrics import ORDER_RTT, FILL_TO_PROTECTED
+
+# Binance: "ClientOrderId is duplicated" -> order dengan id tersebut sudah ada
+_DUPLICATE_CLIENT_ID = '-4116'
 
 class OrderExecutor:
     def __init__(self, exchange):
@@ -12,8 +16,10 @@ class OrderExecutor:
         self.safety_orders_tracker = {}
         self.position_cache = {}
         self.symbol_cooldown = {}
-        self._safety_lock = asyncio.Lock()  # Prevent race condition on safety orders
+        self._safety_locks = {}  # Lock per-symbol: cegah race condition tanpa menahan koin lain
         self._trailing_last_update = {} # [NEW] Throttle for Trailing SL Update to Exchange
+        self.leverage_state = {}  # {symbol: {'leverage': int, 'margin_type': str}} yang sudah aktif di exchange
+        self.balance_cache = None # {'available': float, 'ts': float} (None = perlu dibaca ulang dari REST)
         self.load_tracker()
 
     # --- TRACKER MANAGEMENT ---
@@ -62,19 +68,91 @@ class OrderExecutor:
         with open(config.TRACKER_FILENAME, 'w') as f:
             json.dump(self.safety_orders_tracker, f, indent=2, sort_keys=True)
 
-    # --- RISK & SIZING HELPERS ---
-    async def get_available_balance(self):
-        """Fetch USDT Available Balance"""
+    # --- ACCOUNT STATE CACHE (Leverage, Margin, Balance) ---
+    async def seed_account_state(self):
+        """
+        Isi cache leverage/margin per-symbol dari endpoint positionRisk dan saldo awal.
+        Dipanggil sekali saat startup agar entry tidak perlu set_leverage/set_margin_mode tiap order.
+        """
+        monitored = {c['symbol'] for c in config.DAFTAR_KOIN}
+        try:
+            risks = await self.exchange.fapiPrivateV2GetPositionRisk()
+            for r in risks:
+                sym = r.get('symbol', '').replace('USDT', '/USDT')
+                if sym not in monitored:
+                    continue
+                margin_type = str(r.get('marginType', '')).lower()
+                if margin_type == 'crossed': margin_type = 'cross'
+                self.leverage_state[sym] = {
+                    'leverage': int(float(r.get('leverage', 0))),
+                    'margin_type': margin_type
+                }
+            logger.info(f"⚙️ Leverage/Margin State Seeded: {len(self.leverage_state)} symbols")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed seed leverage state (will apply on first entry): {e}")
+
+        await self.refresh_balance()
+
+    async def ensure_leverage_and_margin(self, symbol, leverage, margin_type):
+        """
+        Apply leverage & margin type HANYA jika berbeda dari state yang diketahui.
+        """
+        state = self.leverage_state.setdefault(symbol, {})
+
+        if state.get('leverage') != leverage:
+            try:
+                await self.exchange.set_leverage(leverage, symbol)
+                state['leverage'] = leverage
+            except ccxt.BaseError as e:
+                logger.warning(f"⚠️ Leverage setup skipped for {symbol}: {e}")
+
+        if state.get('margin_type') != margin_type:
+            try:
+                await self.exchange.set_margin_mode(margin_type, symbol)
+                state['margin_type'] = margin_type
+            except ccxt.BaseError as e:
+                err_msg = str(e).lower()
+                if "already set" in err_msg or "no need to change" in err_msg:
+                    state['margin_type'] = margin_type
+                else:
+                    logger.warning(f"⚠️ Margin setup skipped for {symbol}: {e}")
+
+    def invalidate_available_balance(self):
+        """
+        Saldo / margin terpakai berubah (order dipasang / dibatalkan / terisi, ACCOUNT_UPDATE)
+        -> available dibaca ulang dari REST saat sizing berikutnya.
+        """
+        if self.balance_cache:
+            self.balance_cache['available'] = None
+
+    async def refresh_balance(self):
+        """Fetch saldo USDT dari REST dan simpan ke cache."""
         try:
             bal = await self.exchange.fetch_balance()
-            return float(bal['USDT']['free'])
+            self.balance_cache = {
+                'available': float(bal['USDT']['free']),
+                'ts': time.time()
+            }
         except Exception as e:
             logger.error(f"❌ Failed fetch balance: {e}")
+
+    # --- RISK & SIZING HELPERS ---
+    async def get_available_balance(self):
+        """Fetch USDT Available Balance (dari cache, REST hanya jika cache kosong/basi)"""
+        max_age = getattr(config, 'BALANCE_CACHE_MAX_AGE', 300)
+        if (not self.balance_cache or self.balance_cache.get('available') is None
+                or time.time() - self.balance_cache['ts'] > max_age):
+            await self.refresh_balance()
+        if not self.balance_cache or self.balance_cache.get('available') is None:
             return 0.0
+        return self.balance_cache['available']
 
     async def calculate_dynamic_amount_usdt(self, symbol, leverage):
         """
         Hitung entry size berdasarkan % Risk dari Saldo Available.
+        Saldo available tetap dibaca dari REST per entry: ACCOUNT_UPDATE tidak membawa availableBalance
+        (cw belum dikurangi margin order/posisi), cache hanya dipakai ulang selama tidak ada event
+        order / akun sejak pembacaan terakhir.
         Return: Amount dalam USDT.
         """
         if not config.USE_DYNAMIC_SIZE:
@@ -137,6 +215,17 @@ class OrderExecutor:
                 del self.symbol_cooldown[symbol] # Cleanup
         return False
 
+    # --- [NEW] WARM STATE CHECKPOINT ---
+    def export_state(self):
+        return {'symbol_cooldown': self.symbol_cooldown}
+
+    def restore_state(self, state, age):
+        """Cooldown disimpan sebagai epoch akhir -> yang sudah lewat langsung dibuang."""
+        now = time.time()
+        for sym, end_time in state.get('symbol_cooldown', {}).items():
+            if end_time > now:
+                self.symbol_cooldown[sym] = end_time
+
     # --- EXECUTION LOGIC ---
     async def execute_entry(self, symbol, side, order_type, price, amount_usdt, leverage, strategy_tag, atr_value=0, sl_price=0, tp_price=0):
         """
@@ -149,14 +238,8 @@ class OrderExecutor:
             return
 
         try:
-            # 2. Set Leverage & Margin
-            try:
-                await self.exchange.set_leverage(leverage, symbol)
-                await self.exchange.set_margin_mode(config.DEFAULT_MARGIN_TYPE, symbol)
-            except ccxt.BaseError as e:
-                err_msg = str(e).lower()
-                if "already set" not in err_msg and "no need to change" not in err_msg:
-                    logger.warning(f"⚠️ Leverage/Margin setup skipped for {symbol}: {e}")
+            # 2. Set Leverage & Margin (Cached: hanya kirim ke exchange jika berubah)
+            await self.ensure_leverage_and_margin(symbol, leverage, config.DEFAULT_MARGIN_TYPE)
 
             # 3. Hitung Qty
             if price is None or price == 0:
@@ -178,7 +261,9 @@ class OrderExecutor:
 
             # Execute as LIMIT Order
             try:
-                order = await self.exchange.create_order(symbol, 'limit', side, qty, price_exec)
+                with ORDER_RTT.time(kind='entry'):
+                    order = await self.exchange.create_order(symbol, 'limit', side, qty, price_exec)
+                self.invalidate_available_balance()
                 
                 # Save to tracker as WAITING_ENTRY
                 self.safety_orders_tracker[symbol] = {
@@ -212,11 +297,100 @@ class OrderExecutor:
             await kirim_tele(f"❌ <b>ENTRY ERROR</b>\n{symbol}: {html_module.escape(str(e))}", alert=True)
 
     # --- SAFETY ORDERS (SL/TP) ---
+    def _get_safety_lock(self, symbol):
+        """Ambil (atau buat) lock khusus symbol ini untuk instalasi safety orders."""
+        lock = self._safety_locks.get(symbol)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._safety_locks[symbol] = lock
+        return lock
+
+    async def _place_safety_batch(self, symbol, side_api, p_sl, p_tp):
+        """
+        Kirim SL + TP sekaligus dalam satu request batchOrders.
+        Retry (maks config.ORDER_SLTP_RETRIES) hanya untuk leg yang ditolak.
+        Tiap leg punya clientOrderId (prefix unik per instalasi): setelah error network / timeout
+        (hasil tidak diketahui), open orders dicek dulu agar leg yang ternyata sudah diterima tidak dikirim ulang.
+        Return True jika kedua leg sudah terpasang.
+        """
+        clean_sym = symbol.replace('/', '')
+        prefix = f"ezs{int(time.time() * 1000)}"
+        pending = {
+            'SL': {
+                'symbol': clean_sym, 'side': side_api.upper(), 'type': 'STOP_MARKET',
+                'stopPrice': str(p_sl), 'closePosition': 'true', 'workingType': 'MARK_PRICE',
+                'newClientOrderId': f"{prefix}SL"
+            },
+            'TP': {
+                'symbol': clean_sym, 'side': side_api.upper(), 'type': 'TAKE_PROFIT_MARKET',
+                'stopPrice': str(p_tp), 'closePosition': 'true', 'workingType': 'CONTRACT_PRICE',
+                'newClientOrderId': f"{prefix}TP"
+            },
+        }
+
+        retries = max(0, int(getattr(config, 'ORDER_SLTP_RETRIES', 0)))
+        retry_delay = getattr(config, 'ORDER_SLTP_RETRY_DELAY', 1)
+        outcome_unknown = False
+
+        for attempt in range(retries + 1):
+            if outcome_unknown:
+                await self._drop_accepted_legs(symbol, prefix, pending)
+                outcome_unknown = False
+                if not pending:
+                    return True
+
+            legs = list(pending.keys())
+            try:
+                with ORDER_RTT.time(kind='safety'):
+                    response = await self.exchange.fapiPrivatePostBatchOrders({
+                        'batchOrders': json.dumps([pending[leg] for leg in legs])
+                    })
+                # Response berurutan sesuai request: order dict atau {"code": ..., "msg": ...}
+                for leg, res in zip(legs, response or []):
+                    if isinstance(res, dict) and (res.get('orderId') or str(res.get('code')) == _DUPLICATE_CLIENT_ID):
+                        del pending[leg]  # Duplikat clientOrderId = leg sudah ada di exchange
+                    else:
+                        logger.warning(f"⚠️ {leg} rejected {symbol} (attempt {attempt + 1}/{retries + 1}): {res}")
+            except Exception as e:
+                outcome_unknown = True
+                logger.warning(f"⚠️ Batch Safety Order Error {symbol} (attempt {attempt + 1}/{retries + 1}): {e}")
+
+            if not pending:
+                return True
+
+            if attempt < retries:
+                await asyncio.sleep(retry_delay)
+
+        if outcome_unknown:
+            await self._drop_accepted_legs(symbol, prefix, pending)
+            if not pending:
+                return True
+
+        logger.error(f"❌ Safety legs still missing for {symbol} after {retries + 1} attempts: {list(pending.keys())}")
+        return False
+
+    async def _drop_accepted_legs(self, symbol, prefix, pending):
+        """Hapus dari pending leg yang clientOrderId-nya sudah ada di open orders (request sebelumnya diterima)."""
+        try:
+            open_orders = await self.exchange.fapiPrivateGetOpenOrders({'symbol': symbol.replace('/', '')})
+        except Exception as e:
+            logger.warning(f"⚠️ Cek open orders {symbol} gagal ({e}), kirim ulang semua leg tersisa.")
+            return
+        placed = {o.get('clientOrderId') for o in open_orders or [] if str(o.get('clientOrderId', '')).startswith(prefix)}
+        for leg in list(pending):
+            if pending[leg]['newClientOrderId'] in placed:
+                logger.info(f"ℹ️ {leg} {symbol} ternyata sudah terpasang, tidak dikirim ulang.")
+                del pending[leg]
+
     async def install_safety_orders(self, symbol, pos_data):
         """
         Pasang SL dan TP untuk posisi yang sudah terbuka.
         """
-        async with self._safety_lock:  # Prevent race condition
+        async with self._get_safety_lock(symbol):  # Prevent race condition (per-symbol)
+            # Bisa saja sudah dipasang oleh trigger lain (WS fill vs Safety Monitor)
+            if self.safety_orders_tracker.get(symbol, {}).get('status') == 'SECURED':
+                return True
+
             entry_price = float(pos_data['entryPrice'])
             quantity = float(pos_data['contracts'])
             side = pos_data['side']
@@ -226,6 +400,7 @@ class OrderExecutor:
                 await self.exchange.fapiPrivateDeleteAllOpenOrders({'symbol': symbol.replace('/', '')})
             except ccxt.BaseError as e:
                 logger.debug(f"Cancel old orders for {symbol}: {e}")
+            self.invalidate_available_balance()
             
             # 2. Hitung Jarak SL/TP
             # Cek apakah kita punya data ATR dari tracker (saat entry)
@@ -276,20 +451,21 @@ class OrderExecutor:
             if side == "LONG": side_api = 'sell'
             else: side_api = 'buy'
 
-            p_sl = self.exchange.price_to_precision(symbol, sl_price)
-            p_tp = self.exchange.price_to_precision(symbol, tp_price)
-
             try:
-                # A. STOP LOSS (STOP_MARKET)
-                await self.exchange.create_order(symbol, 'STOP_MARKET', side_api, None, None, {
-                    'stopPrice': p_sl, 'closePosition': True, 'workingType': 'MARK_PRICE'
-                })
-                # B. TAKE PROFIT (TAKE_PROFIT_MARKET)
-                await self.exchange.create_order(symbol, 'TAKE_PROFIT_MARKET', side_api, None, None, {
-                    'stopPrice': p_tp, 'closePosition': True, 'workingType': 'CONTRACT_PRICE'
-                })
-                
-                logger.info(f"✅ Safety Orders Installed: {symbol} | SL {p_sl} | TP {p_tp}")
+                p_sl = self.exchange.price_to_precision(symbol, sl_price)
+                p_tp = self.exchange.price_to_precision(symbol, tp_price)
+
+                # A+B. STOP_MARKET & TAKE_PROFIT_MARKET dalam satu batch (dengan retry)
+                if not await self._place_safety_batch(symbol, side_api, p_sl, p_tp):
+                    return False
+
+                # Time-to-Protected: jarak waktu fill -> SL/TP terpasang
+                protected_at = time.time()
+                filled_at = tracker_data.get('filled_at')
+                ttp_str = f" | Protected in {protected_at - filled_at:.2f}s" if filled_at else ""
+                if filled_at:
+                    FILL_TO_PROTECTED.observe(protected_at - filled_at)
+                logger.info(f"✅ Safety Orders Installed: {symbol} | SL {p_sl} | TP {p_tp}{ttp_str}")
 
                 # [UPDATE] Save TP/SL info to tracker for Trailing Logic
                 if symbol in self.safety_orders_tracker:
@@ -299,7 +475,9 @@ class OrderExecutor:
                         "tp_price": tp_price,
                         "sl_price_initial": sl_price,
                         "side": side, # LONG/SHORT
-                        "trailing_active": False 
+                        "trailing_active": False,
+                        "protected_at": protected_at,
+                        "time_to_protected": (protected_at - filled_at) if filled_at else None
                     })
                     await self.save_tracker()
 
@@ -481,6 +659,7 @@ class OrderExecutor:
                      await self.exchange.cancel_order(sl_order_id, symbol)
                  except Exception as e:
                      logger.warning(f"Failed to cancel old SL {sl_order_id}: {e}")
+                 self.invalidate_available_balance()
 
              # Place New SL
              p_sl = self.exchange.price_to_precision(symbol, new_sl_price)
@@ -571,6 +750,7 @@ class OrderExecutor:
                             await self.exchange.cancel_order(tracked_id, symbol)
                         except Exception as e:
                             logger.warning(f"⚠️ Failed to cancel expired order {symbol} (might be already gone): {e}")
+                        self.invalidate_available_balance()
 
                         # Clean tracker
                         del self.safety_orders_tracker[symbol]
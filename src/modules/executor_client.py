@@ -0,0 +1,87 @@
+"""
+Jembatan OrderExecutor antar proses (mode multi-proses).
+
+- Proses execution: `serve_executor()` mendaftarkan method eksekusi ke IpcServer dan mempublikasikan
+  snapshot state (posisi, tracker, cooldown) setiap kali berubah.
+- Proses decision: `ExecutorClient` punya interface yang dipakai main loop. Cek read-only
+  (posisi aktif / cooldown / limit kategori) dijawab dari snapshot lokal tanpa round-trip,
+  eksekusi order diteruskan lewat RPC.
+"""
+import asyncio
+import json
+import time
+
+import config
+from src.utils.helper import logger, json_default
+from src.modules.executor import OrderExecutor
+
+
+def _executor_state(executor):
+    return {
+        'position_cache': executor.position_cache,
+        'safety_orders_tracker': executor.safety_orders_tracker,
+        'symbol_cooldown': executor.symbol_cooldown,
+    }
+
+
+def serve_executor(server, executor):
+    """Daftarkan RPC OrderExecutor ke IpcServer. Return coroutine publisher state (jalankan sebagai task)."""
+    server.register('execute_entry', executor.execute_entry)
+    server.register('calculate_dynamic_amount_usdt', executor.calculate_dynamic_amount_usdt)
+    server.register('set_cooldown', executor.set_cooldown)
+    server.register('get_state', lambda: _executor_state(executor))
+
+    async def publish_state_loop():
+        interval = getattr(config, 'MP_STATE_PUBLISH_INTERVAL', 0.5)
+        last = None
+        while True:
+            try:
+                state = _executor_state(executor)
+                raw = json.dumps(state, default=json_default, sort_keys=True)
+                if raw != last:
+                    server.publish('executor_state', state)
+                    last = raw
+            except Exception as e:
+                logger.error(f"Executor State Publish Error: {e}")
+            await asyncio.sleep(interval)
+
+    return publish_state_loop()
+
+
+class ExecutorClient:
+    """Proxy OrderExecutor di proses decision."""
+
+    # Logika read-only dipakai ulang apa adanya (hanya butuh position_cache / tracker / cooldown)
+    has_active_or_pending_trade = OrderExecutor.has_active_or_pending_trade
+    get_open_positions_count_by_category = OrderExecutor.get_open_positions_count_by_category
+    is_under_cooldown = OrderExecutor.is_under_cooldown
+
+    def __init__(self, client):
+        self.client = client
+        self.position_cache = {}
+        self.safety_orders_tracker = {}
+        self.symbol_cooldown = {}
+        client.on('executor_state', self._apply_state)
+
+    async def start(self):
+        self._apply_state(await self.client.call('get_state'))
+
+    def _apply_state(self, state):
+        self.position_cache = state.get('position_cache', {})
+        self.safety_orders_tracker = state.get('safety_orders_tracker', {})
+        # Cooldown lokal yang belum sampai ke proses execution jangan sampai tertimpa snapshot lama
+        now = time.time()
+        merged = {s: t for s, t in self.symbol_cooldown.items() if t > now}
+        for sym, end_time in state.get('symbol_cooldown', {}).items():
+            merged[sym] = max(end_time, merged.get(sym, 0))
+        self.symbol_cooldown = merged
+
+    def set_cooldown(self, symbol, duration_seconds):
+        self.symbol_cooldown[symbol] = time.time() + duration_seconds
+        self.client.notify('set_cooldown', symbol, duration_seconds)
+
+    async def calculate_dynamic_amount_usdt(self, symbol, leverage):
+        return await self.client.call('calculate_dynamic_amount_usdt', symbol, leverage)
+
+    async def execute_entry(self, **kwargs):
+        return await self.client.call('execute_entry', **kwargs)
@@ -3,14 +3,23 @@ import asyncio
 import json
 import time
 import numpy as np
-import pandas as pd
-import pandas_ta as ta
 import ccxt.async_support as ccxt
 import websockets
 import config
 from collections import deque
-from scipy.signal import argrelextrema
 from src.utils.helper import logger, kirim_tele, wib_time, parse_timeframe_to_seconds
+from src.modules.order_book import LocalOrderBook
+from src.modules.trade_flow import TradeFlowAggregator
+from src.modules.whale_threshold import WhaleThreshold
+from src.utils.metrics import WS_MESSAGES, WS_MESSAGE_LAG, KLINE_HANDLE, TECH_CACHE, TECH_CALC, CORRELATION
+
+# --- LAZY HEAVY IMPORTS ---
+# pandas / pandas_ta / scipy baru di-import saat kalkulasi pertama (bukan saat startup).
+def _load_pandas_ta():
+    """Import pandas + pandas_ta (registrasi accessor df.ta). Return modul pandas."""
+    import pandas as pd
+    import pandas_ta  # noqa: F401
+    return pd
 
 # --- STATIC CALCULATION FUNCTIONS (Thread-Safe) ---
 
@@ -53,6 +62,9 @@ def _calculate_market_structure_static(bars, lookback=5):
     try:
         if len(bars) < config.MARKET_STRUCTURE_MIN_BARS: return "INSUFFICIENT_DATA"
 
+        import pandas as pd
+        from scipy.signal import argrelextrema
+
         df = pd.DataFrame(bars, columns=['timestamp','open','high','low','close','volume'])
 
         # Vektorisasi menggunakan scipy.signal.argrelextrema
@@ -172,6 +184,7 @@ def _calculate_tech_data_threaded(bars_exec, bars_trend, symbol):
         if len(bars_exec) < config.EMA_SLOW + 5: return None
 
         # 1. Prepare DataFrame
+        pd = _load_pandas_ta()
         df = pd.DataFrame(bars_exec, columns=['timestamp','open','high','low','close','volume'])
 
         # 2. EMAs
@@ -253,7 +266,7 @@ def _calculate_tech_data_threaded(bars_exec, bars_trend, symbol):
 
 
 class MarketDataManager:
-    def __init__(self, exchange):
+    def __init__(self, exchange, symbols=None):
         self.exchange = exchange
         self.exchange_public = None # [NEW] Untuk fetch data public di mode testnet
         
@@ -270,6 +283,7 @@ class MarketDataManager:
         self.ws_url = config.WS_URL_FUTURES_TESTNET if config.PAKAI_DEMO else config.WS_URL_FUTURES_LIVE
         self.listen_key = None
         self.last_heartbeat = time.time()
+        self._ws_callbacks = {'account_update': None, 'order_update': None, 'whale': None, 'trailing': None}
         
         # [NEW] Initialize Public Exchange if Demo Mode
         if config.PAKAI_DEMO:
@@ -278,26 +292,49 @@ class MarketDataManager:
                 'options': {'defaultType': 'future'}
             })
         
-        # Initialize Store Structure with Deque
-        for coin in config.DAFTAR_KOIN:
-            self.market_store[coin['symbol']] = {
-                config.TIMEFRAME_EXEC: deque(maxlen=config.LIMIT_EXEC),
-                config.TIMEFRAME_TREND: deque(maxlen=config.LIMIT_TREND),
-                config.TIMEFRAME_SETUP: deque(maxlen=config.LIMIT_SETUP)
-            }
+        # Cache for Technical Data to avoid redundant recalculation
+        self.tech_cache = {} # {symbol: {ts, data}}
+
+        # Cache for Order Book Analysis to avoid spamming API if managed differently
+        self.ob_cache = {} # {symbol: {ts, data}}
+
+        # [NEW] Local Full-Depth Order Book (Snapshot + Diff Stream)
+        self.order_books = {}
+        self._ob_resync_pending = set()
+
+        # [NEW] Order Book Feature Cache (dihitung saat depth update, dibaca gratis oleh prompt)
+        self._ob_bands = sorted(set(getattr(config, 'ORDERBOOK_FEATURE_BANDS', []) + [config.ORDERBOOK_RANGE_PERCENT]))
+        self._ob_imbalance_history = {} # {symbol: deque[(ts, imbalance_pct)]}
+
+        # [NEW] Order Flow Aggregator dari aggTrade (CVD, Buy/Sell Volume Buckets)
+        self.trade_flow = {}
+
+        # [NEW] Threshold Whale adaptif per symbol (quantile sketch notional aggTrade)
+        self.whale_threshold = WhaleThreshold()
+
+        # Symbol yang dimonitor (default DAFTAR_KOIN). Feed service menambah symbol saat runtime (add_symbols)
+        self.symbols = [coin['symbol'] for coin in config.DAFTAR_KOIN] if symbols is None else list(symbols)
+        self._symbols_lock = asyncio.Lock()
+        self._ws = None # Koneksi WS aktif (untuk SUBSCRIBE stream symbol baru)
+        for sym in self.symbols:
+            self._init_symbol(sym)
         # BTC (Wajib ada helper store)
-        if config.BTC_SYMBOL not in self.market_store:
-            self.market_store[config.BTC_SYMBOL] = {
+        self._init_symbol(config.BTC_SYMBOL, order_book=False)
+
+    def _init_symbol(self, symbol, order_book=True):
+        """Siapkan store OHLCV (deque), order flow & local order book untuk satu symbol"""
+        if symbol not in self.market_store:
+            self.market_store[symbol] = {
                 config.TIMEFRAME_EXEC: deque(maxlen=config.LIMIT_EXEC),
                 config.TIMEFRAME_TREND: deque(maxlen=config.LIMIT_TREND),
                 config.TIMEFRAME_SETUP: deque(maxlen=config.LIMIT_SETUP)
             }
-        
-        # Cache for Technical Data to avoid redundant recalculation
-        self.tech_cache = {} # {symbol: {ts, data}}
+            self.trade_flow[symbol] = TradeFlowAggregator(config.TRADE_FLOW_BUCKET_SECONDS, config.TRADE_FLOW_BUCKETS)
+        if order_book and symbol not in self.order_books:
+            self.order_books[symbol] = LocalOrderBook(symbol)
 
-        # Cache for Order Book Analysis to avoid spamming API if managed differently
-        self.ob_cache = {} # {symbol: {ts, data}}
+    def refresh(self, symbol):
+        """Hook sinkronisasi market_store sebelum dibaca langsung (no-op: WS menulis langsung ke store)."""
 
     async def _fetch_lsr(self, symbol):
         """Helper Fetch LSR dengan Fallback ke Public Exchange jika Demo"""
@@ -321,8 +358,44 @@ class MarketDataManager:
             # Fallback silently or log if critical
             return None
 
-    async def initialize_data(self):
-        """Fetch Initial Historical Data (REST API)"""
+    # --- [NEW] WARM STATE CHECKPOINT ---
+    def export_state(self):
+        """Snapshot cache untuk checkpoint (lihat src/utils/checkpoint.py)."""
+        return {
+            'tech_cache': self.tech_cache,
+            'ob_cache': self.ob_cache,
+            'ob_imbalance_history': {sym: list(h) for sym, h in self._ob_imbalance_history.items()},
+            'whale_threshold': self.whale_threshold.export_state(),
+        }
+
+    def restore_state(self, state, age):
+        """
+        Restore cache dari checkpoint.
+        - tech_cache: self-validating (key = timestamp candle closed), aman di-restore apa adanya.
+        - ob_cache & histori imbalance: hanya jika masih segar (order book cepat basi).
+        - whale_threshold: sketch quantile, bobot di-decay sesuai umur checkpoint.
+        """
+        self.whale_threshold.restore_state(state.get('whale_threshold', {}), age)
+
+        for sym, entry in state.get('tech_cache', {}).items():
+            if sym in self.market_store:
+                self.tech_cache[sym] = entry
+
+        now = time.time()
+        ob_max_age = getattr(config, 'CHECKPOINT_OB_MAX_AGE', 120)
+        for sym, entry in state.get('ob_cache', {}).items():
+            if sym in self.order_books and now - entry.get('ts', 0) <= ob_max_age:
+                self.ob_cache[sym] = entry
+
+        history_len = getattr(config, 'ORDERBOOK_HISTORY_LEN', 60)
+        history_window = history_len * getattr(config, 'ORDERBOOK_HISTORY_SAMPLE_SECONDS', 5)
+        for sym, samples in state.get('ob_imbalance_history', {}).items():
+            fresh = [(ts, v) for ts, v in samples if now - ts <= history_window]
+            if sym in self.order_books and fresh:
+                self._ob_imbalance_history[sym] = deque(fresh, maxlen=history_len)
+
+    async def initialize_data(self, symbols=None):
+        """Fetch Initial Historical Data (REST API). symbols=None -> semua symbol + BTC"""
         logger.info("📥 Initializing Market Data...")
         tasks = []
         
@@ -366,11 +439,10 @@ class MarketDataManager:
                 logger.error(f"   ❌ Failed Load {symbol}: {e}")
 
         # Batch fetch
-        for coin in config.DAFTAR_KOIN:
-            tasks.append(fetch_pair(coin['symbol']))
-            
-        if not any(k['symbol'] == config.BTC_SYMBOL for k in config.DAFTAR_KOIN):
-             tasks.append(fetch_pair(config.BTC_SYMBOL))
+        if symbols is None:
+            symbols = self.symbols + ([config.BTC_SYMBOL] if config.BTC_SYMBOL not in self.symbols else [])
+        for symbol in symbols:
+            tasks.append(fetch_pair(symbol))
              
         await asyncio.gather(*tasks)
         self._update_btc_trend()
@@ -380,6 +452,7 @@ class MarketDataManager:
         try:
             bars = self.market_store[config.BTC_SYMBOL][config.TIMEFRAME_TREND]
             if bars:
+                pd = _load_pandas_ta()
                 df_btc = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
                 ema_btc = df_btc.ta.ema(length=config.BTC_EMA_PERIOD).iloc[-1]
                 price_now = df_btc['close'].iloc[-1]
@@ -401,47 +474,62 @@ class MarketDataManager:
             logger.error(f"❌ Gagal ListenKey: {e}")
             return None
 
-    async def start_stream(self, callback_account_update=None, callback_order_update=None, callback_whale=None, callback_trailing=None):
-        """Main WebSocket Loop"""
+    async def start_stream(self, callback_account_update=None, callback_order_update=None, callback_whale=None, callback_trailing=None,
+                           include_market=True, include_user=True):
+        """
+        Main WebSocket Loop
+        include_market / include_user: mode multi-proses memisah stream market (proses ingestion)
+        dan user data stream / listenKey (proses execution).
+        """
+        self._ws_callbacks = {
+            'account_update': callback_account_update,
+            'order_update': callback_order_update,
+            'whale': callback_whale,
+            'trailing': callback_trailing
+        }
         while True:
-            await self.get_listen_key()
-            if not self.listen_key:
-                await asyncio.sleep(config.WS_RECONNECT_DELAY)
-                continue
-                
-            streams = [self.listen_key]
-            # Add Kline Streams & MiniTicker
-            for coin in config.DAFTAR_KOIN:
-                s_clean = coin['symbol'].replace('/', '').lower()
-                streams.append(f"{s_clean}@kline_{config.TIMEFRAME_EXEC}")
-                streams.append(f"{s_clean}@kline_{config.TIMEFRAME_TREND}")
-                streams.append(f"{s_clean}@kline_{config.TIMEFRAME_SETUP}")
-                streams.append(f"{s_clean}@aggTrade") # Whale Detector Stream
-                streams.append(f"{s_clean}@miniTicker") # [NEW] Realtime Price for Trailing
-                streams.append(f"{s_clean}@depth20@500ms") # [NEW] Order Book Cache Stream
-
-            # Add BTC Stream manual if not exists
-            btc_clean = config.BTC_SYMBOL.replace('/', '').lower()
-            btc_s = f"{btc_clean}@kline_{config.TIMEFRAME_TREND}"
-            if btc_s not in streams: streams.append(btc_s)
-
-            # [NEW] Force BTC Whale Stream for Context (Global Whale Data)
-            btc_whale_stream = f"{btc_clean}@aggTrade"
-            if btc_whale_stream not in streams:
-                streams.append(btc_whale_stream)
-                # logger.info("🐋 BTC Whale Stream Subscribed (Context Only)")
+            streams = []
+            if include_user:
+                await self.get_listen_key()
+                if not self.listen_key:
+                    await asyncio.sleep(config.WS_RECONNECT_DELAY)
+                    continue
+                streams.append(self.listen_key)
+
+            if include_market:
+                # Add Kline Streams & MiniTicker
+                for symbol in self.symbols:
+                    streams.extend(self._market_streams(symbol))
+
+                # Add BTC Stream manual if not exists
+                btc_clean = config.BTC_SYMBOL.replace('/', '').lower()
+                btc_s = f"{btc_clean}@kline_{config.TIMEFRAME_TREND}"
+                if btc_s not in streams: streams.append(btc_s)
+
+                # [NEW] Force BTC Whale Stream for Context (Global Whale Data)
+                btc_whale_stream = f"{btc_clean}@aggTrade"
+                if btc_whale_stream not in streams:
+                    streams.append(btc_whale_stream)
+                    # logger.info("🐋 BTC Whale Stream Subscribed (Context Only)")
 
             url = self.ws_url + "/".join(streams)
             logger.info(f"📡 Connecting WS... ({len(streams)} streams)")
             
-            # Keep Alive Task from Config
-            asyncio.create_task(self._keep_alive_listen_key())
+            if include_user:
+                # Keep Alive Task from Config
+                asyncio.create_task(self._keep_alive_listen_key())
             
-            # [NEW] Background Task untuk Data Lambat (Funding Rate & OI)
-            asyncio.create_task(self._maintain_slow_data())
+            if include_market:
+                # [NEW] Background Task untuk Data Lambat (Funding Rate & OI)
+                asyncio.create_task(self._maintain_slow_data())
+
+            # Sequence diff depth putus setiap reconnect -> book wajib snapshot ulang
+            for book in self.order_books.values():
+                book.reset()
 
             try:
                 async with websockets.connect(url) as ws:
+                    self._ws = ws
                     logger.info("✅ WebSocket Connected!")
                     await kirim_tele("✅ <b>WebSocket System Online</b>")
                     self.last_heartbeat = time.time()
@@ -449,44 +537,100 @@ class MarketDataManager:
                     while True:
                         msg = await ws.recv()
                         self.last_heartbeat = time.time()
-                        data = json.loads(msg)
-                        
-                        if 'data' in data:
-                            payload = data['data']
-                            evt = payload.get('e', '')
-                            
-                            if evt == 'kline':
-                                await self._handle_kline(payload)
-                            elif evt == 'ACCOUNT_UPDATE' and callback_account_update:
-                                await callback_account_update(payload)
-                            elif evt == 'ORDER_TRADE_UPDATE' and callback_order_update:
-                                await callback_order_update(payload)
-                            elif evt == 'aggTrade' and callback_whale:
-                                # "s": "BTCUSDT", "p": "0.001", "q": "100", "m": true
-                                symbol = payload['s'].replace('USDT', '/USDT')
-                                price = float(payload['p'])
-                                qty = float(payload['q'])
-                                amount_usdt = price * qty
-                                side = "SELL" if payload['m'] else "BUY" # m=True means the maker was a buyer, so the aggressor was a seller (SELL trade).
-                                if amount_usdt >= config.WHALE_THRESHOLD_USDT:
-                                    callback_whale(symbol, amount_usdt, side)
-                            
-                            elif evt == '24hrMiniTicker':
-                                # [NEW] Realtime Price Handler for Trailing Stop
-                                # Payload: {"e":"24hrMiniTicker","E":167233,"s":"BTCUSDT","c":"1234.56",...}
-                                symbol = payload['s'].replace('USDT', '/USDT')
-                                price = float(payload['c']) # Current Close Price
-                                
-                                if callback_trailing:
-                                    # Use fire-and-forget task
-                                    asyncio.create_task(self._safe_callback_execution(callback_trailing, symbol, price))
-
-                            elif evt == 'depthUpdate':
-                                await self._handle_depth_update(payload)
+                        await self._dispatch_ws_message(msg)
                                 
             except Exception as e:
                 logger.warning(f"⚠️ WS Disconnected: {e}. Reconnecting...")
                 await asyncio.sleep(config.WS_RECONNECT_DELAY)
+            finally:
+                self._ws = None
+
+    @staticmethod
+    def _market_streams(symbol):
+        """Daftar stream market per symbol"""
+        s_clean = symbol.replace('/', '').lower()
+        return [
+            f"{s_clean}@kline_{config.TIMEFRAME_EXEC}",
+            f"{s_clean}@kline_{config.TIMEFRAME_TREND}",
+            f"{s_clean}@kline_{config.TIMEFRAME_SETUP}",
+            f"{s_clean}@aggTrade", # Whale Detector Stream
+            f"{s_clean}@miniTicker", # [NEW] Realtime Price for Trailing
+            f"{s_clean}@depth@100ms", # [NEW] Diff Depth Stream (Local Order Book)
+        ]
+
+    async def add_symbols(self, symbols):
+        """
+        [NEW] Tambah symbol saat runtime (feed service): preload REST, lalu SUBSCRIBE stream-nya
+        di koneksi WS yang sedang aktif (tanpa reconnect). Return list symbol yang benar-benar baru.
+        """
+        async with self._symbols_lock:
+            new = [s for s in dict.fromkeys(symbols) if s not in self.symbols]
+            if not new:
+                return []
+            for sym in new:
+                self._init_symbol(sym)
+            await self.initialize_data(new)
+            self.symbols.extend(new)
+
+            if self._ws is not None:
+                params = [stream for sym in new for stream in self._market_streams(sym)]
+                try:
+                    await self._ws.send(json.dumps({'method': 'SUBSCRIBE', 'params': params, 'id': int(time.time() * 1000)}))
+                except Exception as e:
+                    # Reconnect berikutnya otomatis memakai self.symbols terbaru
+                    logger.warning(f"⚠️ WS SUBSCRIBE gagal ({e}), stream ikut saat reconnect.")
+            logger.info(f"➕ Symbol ditambahkan: {', '.join(new)}")
+            return new
+
+    async def _dispatch_ws_message(self, msg):
+        """Parse satu pesan combined stream lalu routing ke handler sesuai event type."""
+        data = json.loads(msg)
+        callbacks = self._ws_callbacks
+
+        if 'data' in data:
+            payload = data['data']
+            evt = payload.get('e', '')
+
+            # [METRICS] Lag pesan: waktu terima vs event time Binance
+            WS_MESSAGES.inc(event=evt)
+            event_ms = payload.get('E')
+            if event_ms:
+                WS_MESSAGE_LAG.observe(max(0.0, self.last_heartbeat - event_ms / 1000), event=evt)
+            
+            if evt == 'kline':
+                await self._handle_kline(payload)
+            elif evt == 'ACCOUNT_UPDATE' and callbacks['account_update']:
+                await callbacks['account_update'](payload)
+            elif evt == 'ORDER_TRADE_UPDATE' and callbacks['order_update']:
+                await callbacks['order_update'](payload)
+            elif evt == 'aggTrade':
+                # "s": "BTCUSDT", "p": "0.001", "q": "100", "m": true, "T": 123456789
+                symbol = payload['s'].replace('USDT', '/USDT')
+                price = float(payload['p'])
+                qty = float(payload['q'])
+                is_sell = payload['m'] # m=True means the maker was a buyer, so the aggressor was a seller (SELL trade).
+
+                # Order Flow Aggregation (setiap trade)
+                flow = self.trade_flow.get(symbol)
+                if flow is not None:
+                    flow.add_trade(int(payload['T']), price, qty, is_sell)
+
+                amount_usdt = price * qty
+                if callbacks['whale'] and self.whale_threshold.observe(symbol, amount_usdt):
+                    callbacks['whale'](symbol, amount_usdt, "SELL" if is_sell else "BUY", price)
+            
+            elif evt == '24hrMiniTicker':
+                # [NEW] Realtime Price Handler for Trailing Stop
+                # Payload: {"e":"24hrMiniTicker","E":167233,"s":"BTCUSDT","c":"1234.56",...}
+                symbol = payload['s'].replace('USDT', '/USDT')
+                price = float(payload['c']) # Current Close Price
+                
+                if callbacks['trailing']:
+                    # Use fire-and-forget task
+                    asyncio.create_task(self._safe_callback_execution(callbacks['trailing'], symbol, price))
+
+            elif evt == 'depthUpdate':
+                await self._handle_depth_update(payload)
 
     async def _maintain_slow_data(self):
         """
@@ -503,7 +647,7 @@ class MarketDataManager:
                 await self._update_funding_rates_bulk()
 
                 # 2. Parallel Update for Open Interest & LSR (No Bulk API available)
-                tasks = [self._update_single_coin_slow_data(coin) for coin in config.DAFTAR_KOIN]
+                tasks = [self._update_single_coin_slow_data(symbol) for symbol in self.symbols]
                 await asyncio.gather(*tasks)
             except Exception as e:
                 logger.error(f"Slow Data Loop Error: {e}")
@@ -515,7 +659,7 @@ class MarketDataManager:
             all_rates = await self.exchange.fetch_funding_rates()
 
             # Filter only monitored coins
-            monitored_symbols = {c['symbol'] for c in config.DAFTAR_KOIN}
+            monitored_symbols = set(self.symbols)
 
             async with self.data_lock:
                 for symbol, data in all_rates.items():
@@ -525,9 +669,8 @@ class MarketDataManager:
         except Exception as e:
             logger.error(f"Failed Bulk Funding Rate Update: {e}")
 
-    async def _update_single_coin_slow_data(self, coin):
+    async def _update_single_coin_slow_data(self, symbol):
         """Helper to update slow data for a single coin concurrently (OI & LSR)"""
-        symbol = coin['symbol']
         async with self.sem_slow_data:
             try:
                 # Parallel fetch: Open Interest, LSR (Funding Rate moved to bulk)
@@ -579,6 +722,10 @@ class MarketDataManager:
             logger.error(f"Error in trailing callback: {e}")
 
     async def _handle_kline(self, data):
+        with KLINE_HANDLE.time():
+            await self._apply_kline(data)
+
+    async def _apply_kline(self, data):
         sym = data['s'].replace('USDT', '/USDT')
         k = data['k']
         interval = k['i']
@@ -603,30 +750,98 @@ class MarketDataManager:
 
     async def _handle_depth_update(self, payload):
         """
-        Handle WebSocket Partial Depth Update (depth20)
-        Payload: {e: depthUpdate, s: BTCUSDT, b: [[p, q], ...], a: [[p, q], ...]}
+        Handle WebSocket Diff Depth Update (@depth@100ms)
+        Payload: {e: depthUpdate, E: ms, s: BTCUSDT, U: first_id, u: final_id, pu: prev_final_id, b: [[p, q], ...], a: [[p, q], ...]}
         """
         try:
             symbol = payload['s'].replace('USDT', '/USDT')
-
-            # Convert strings to floats
-            # WS sends ["price", "qty"] as strings
-            bids = [[float(p), float(q)] for p, q in payload['b']]
-            asks = [[float(p), float(q)] for p, q in payload['a']]
-
-            # Update Cache (Overwrite is fine for partial depth stream)
-            # No lock needed for simple dict replacement, but good practice if structure is complex.
-            # Here we just replace the reference.
-            self.ob_cache[symbol] = {
-                'bids': bids,
-                'asks': asks,
-                'ts': time.time()
-            }
+            book = self.order_books.get(symbol)
+            if book is None:
+                return
+
+            if not book.synced:
+                # Buffer sampai snapshot REST siap
+                book.buffer_event(payload)
+                self._schedule_order_book_resync(symbol)
+                return
+
+            if not book.apply_diff(payload):
+                logger.debug(f"📚 Order Book Gap {symbol} (last {book.last_update_id}, pu {payload.get('pu')}). Resyncing...")
+                book.reset()
+                book.buffer_event(payload)
+                self._schedule_order_book_resync(symbol)
+                return
+
+            self._update_ob_features(symbol, book)
         except Exception as e:
             logger.debug(f"Depth Update Error: {e}")
 
+    def _update_ob_features(self, symbol, book):
+        """
+        Hitung ulang fitur order book (throttled) dan simpan ke self.ob_cache.
+        Imbalance band utama (ORDERBOOK_RANGE_PERCENT) juga di-sample ke rolling history.
+        """
+        now = time.time()
+        cached = self.ob_cache.get(symbol)
+        if cached and now - cached['ts'] < getattr(config, 'ORDERBOOK_FEATURE_MIN_INTERVAL', 0.25):
+            return
+
+        features = book.compute_features(self._ob_bands, getattr(config, 'ORDERBOOK_WALL_MULTIPLIER', 5.0))
+        if not features:
+            return
+
+        # Band utama -> field lama (bids_vol_usdt, asks_vol_usdt, imbalance_pct) untuk backward compat
+        main_pct = config.ORDERBOOK_RANGE_PERCENT * 100
+        main_band = next((b for b in features['bands'] if abs(b['band_pct'] - main_pct) < 1e-9), features['bands'][-1])
+        features.update({
+            "bids_vol_usdt": main_band['bids_vol_usdt'],
+            "asks_vol_usdt": main_band['asks_vol_usdt'],
+            "imbalance_pct": main_band['imbalance_pct']
+        })
+
+        history = self._ob_imbalance_history.get(symbol)
+        if history is None:
+            history = deque(maxlen=getattr(config, 'ORDERBOOK_HISTORY_LEN', 60))
+            self._ob_imbalance_history[symbol] = history
+        if not history or now - history[-1][0] >= getattr(config, 'ORDERBOOK_HISTORY_SAMPLE_SECONDS', 5):
+            history.append((now, main_band['imbalance_pct']))
+        features['imbalance_history'] = [round(v, 2) for _, v in history]
+
+        self.ob_cache[symbol] = {'ts': now, 'data': features}
+
+    def _schedule_order_book_resync(self, symbol):
+        """Jadwalkan snapshot ulang (maksimal satu task per symbol)."""
+        if symbol in self._ob_resync_pending:
+            return
+        self._ob_resync_pending.add(symbol)
+        asyncio.create_task(self._resync_order_book(symbol))
+
+    async def _resync_order_book(self, symbol):
+        """Ambil snapshot REST lalu replay diff yang ter-buffer."""
+        book = self.order_books[symbol]
+        try:
+            # Beri waktu beberapa diff masuk buffer agar event pertama pasti tercakup
+            await asyncio.sleep(getattr(config, 'ORDERBOOK_RESYNC_DELAY', 1))
+            snapshot = await self.exchange.fapiPublicGetDepth({
+                'symbol': symbol.replace('/', ''),
+                'limit': getattr(config, 'ORDERBOOK_SNAPSHOT_LIMIT', 1000)
+            })
+            if book.load_snapshot(snapshot):
+                logger.debug(f"📚 Order Book Synced {symbol} (lastUpdateId {book.last_update_id})")
+                self._update_ob_features(symbol, book)
+            else:
+                logger.debug(f"📚 Order Book Replay Gap {symbol}. Will resync on next diff.")
+        except Exception as e:
+            logger.warning(f"⚠️ Order Book Snapshot Failed {symbol}: {e}")
+        finally:
+            self._ob_resync_pending.discard(symbol)
+
     async def get_btc_correlation(self, symbol, period=config.CORRELATION_PERIOD):
         """Hitung korelasi Close price simbol vs BTC (Timeframe 1H)"""
+        with CORRELATION.time():
+            return self._calc_btc_correlation(symbol, period)
+
+    def _calc_btc_correlation(self, symbol, period):
         try:
             if symbol == config.BTC_SYMBOL: return 1.0
             
@@ -637,6 +852,7 @@ class MarketDataManager:
                 return config.DEFAULT_CORRELATION_HIGH # Default high correlation to be safe (Follow BTC)
             
             # Create DF
+            import pandas as pd
             df_sym = pd.DataFrame(bars_sym, columns=['timestamp','o','h','l','c','v'])
             df_btc = pd.DataFrame(bars_btc, columns=['timestamp','o','h','l','c','v'])
             
@@ -674,16 +890,19 @@ class MarketDataManager:
             cached = self.tech_cache.get(symbol)
             if cached and cached.get('timestamp') == last_closed_ts:
                 # Cache Hit - Use static data
+                TECH_CACHE.inc(result='hit')
                 tech_data = cached['data']
             else:
+                TECH_CACHE.inc(result='miss')
                 # Cache Miss - Offload to Thread
                 # Run the heavy calculation in a separate thread to avoid blocking the event loop
-                tech_data = await asyncio.to_thread(
-                    _calculate_tech_data_threaded,
-                    bars_exec,
-                    bars_trend,
-                    symbol
-                )
+                with TECH_CALC.time():
+                    tech_data = await asyncio.to_thread(
+                        _calculate_tech_data_threaded,
+                        bars_exec,
+                        bars_trend,
+                        symbol
+                    )
 
                 if tech_data:
                     # Update Cache
@@ -701,7 +920,8 @@ class MarketDataManager:
                 "btc_trend": self.btc_trend,
                 "funding_rate": self.funding_rates.get(symbol, 0),
                 "open_interest": self.open_interest.get(symbol, 0.0),
-                "lsr": self.lsr_data.get(symbol)
+                "lsr": self.lsr_data.get(symbol),
+                "trade_flow": self.get_trade_flow(symbol)
             })
 
             return result
@@ -709,6 +929,13 @@ class MarketDataManager:
             logger.error(f"Get Tech Data Error {symbol}: {e}")
             return None
 
+    def get_trade_flow(self, symbol):
+        """Ringkasan Order Flow (CVD, Buy/Sell Volume) untuk window config.TRADE_FLOW_WINDOWS."""
+        flow = self.trade_flow.get(symbol)
+        if flow is None:
+            return None
+        return flow.get_summary(config.TRADE_FLOW_WINDOWS, int(time.time() * 1000))
+
     def _calculate_wick_rejection(self, symbol, lookback=5):
         """Wrapper for backward compatibility / testing"""
         bars = list(self.market_store.get(symbol, {}).get(config.TIMEFRAME_EXEC, []))
@@ -726,42 +953,41 @@ class MarketDataManager:
 
     async def get_order_book_depth(self, symbol, limit=20):
         """
-        Fetch Order Book and calculate imbalance within 2% range.
-        Return: {bids_vol_usdt, asks_vol_usdt, imbalance_pct}
+        Ambil fitur order book yang sudah dihitung saat depth update (Feature Cache).
+        Fallback ke REST jika book belum sinkron (startup / resync).
+        Return: {bids_vol_usdt, asks_vol_usdt, imbalance_pct, [bands, spread, walls, ...]}
         """
         try:
-            bids = []
-            asks = []
+            range_limit = config.ORDERBOOK_RANGE_PERCENT
 
-            # 1. Try Cache First (Zero Latency)
+            # 1. Precomputed Features (Zero Cost)
+            book = self.order_books.get(symbol)
             cached = self.ob_cache.get(symbol)
-            if cached:
-                bids = cached['bids']
-                asks = cached['asks']
+            if cached and book and book.is_ready():
+                return dict(cached['data'])
+
+            # 2. Local Order Book tanpa fitur (O(log n))
+            if book and book.is_ready():
+                bids_vol, asks_vol = book.depth_in_band(range_limit)
             else:
-                # 2. Fallback to API (Network Latency)
-                # This happens only at startup before first WS message arrives
+                # 3. Fallback to API (Network Latency)
                 ob = await self.exchange.fetch_order_book(symbol, limit)
                 bids = ob['bids']
                 asks = ob['asks']
-            
-            if not bids or not asks: return None
-            
-            mid_price = (bids[0][0] + asks[0][0]) / 2
-            
-            # Filter Range from Config
-            range_limit = config.ORDERBOOK_RANGE_PERCENT
-            
-            bids_vol = 0
-            for price, qty in bids:
-                if price < mid_price * (1 - range_limit): break
-                bids_vol += price * qty
-                
-            asks_vol = 0
-            for price, qty in asks:
-                if price > mid_price * (1 + range_limit): break
-                asks_vol += price * qty
-                
+                if not bids or not asks: return None
+
+                mid_price = (bids[0][0] + asks[0][0]) / 2
+
+                bids_vol = 0
+                for price, qty in bids:
+                    if price < mid_price * (1 - range_limit): break
+                    bids_vol += price * qty
+
+                asks_vol = 0
+                for price, qty in asks:
+                    if price > mid_price * (1 + range_limit): break
+                    asks_vol += price * qty
+
             total_vol = bids_vol + asks_vol
             if total_vol == 0: return None
             
@@ -1,105 +1,240 @@
 
+import asyncio
+import codecs
+import json
+import os
 import time
+from collections import deque
 from datetime import datetime
 from typing import Optional
-import requests
+import aiohttp
 import config
 from src.utils.helper import logger
 
+
+class _JsonArrayTail:
+    """
+    Streaming parser untuk JSON array top-level berisi object: [{...}, {...}, ...].
+    Object di-decode satu per satu saat chunk datang, dan hanya N object terakhir yang disimpan.
+    """
+
+    def __init__(self, keep_last: int):
+        self.tail = deque(maxlen=keep_last)
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ""
+
+    def feed(self, chunk: bytes) -> None:
+        buf = self._buf + self._utf8.decode(chunk)
+        pos = 0
+        size = len(buf)
+        while True:
+            # Lewati pembuka array, koma, dan whitespace di antara object
+            while pos < size and buf[pos] in ' \t\r\n,[':
+                pos += 1
+            if pos >= size or buf[pos] == ']':
+                break
+            try:
+                obj, pos = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # Object belum lengkap, tunggu chunk berikutnya
+            self.tail.append(obj)
+        self._buf = buf[pos:]
+
 class OnChainAnalyzer:
     def __init__(self):
-        # Dict per-symbol: {"BTC/USDT": [...], "SOL/USDT": [...]}
-        self.whale_transactions: dict[str, list[str]] = {}
+        # Dict per-symbol: {"BTC/USDT": deque[(timestamp, side, size_usdt, price)], ...}
+        self.whale_events: dict[str, deque] = {}
         self.stablecoin_inflow = "Neutral"  # Neutral, Positive, Negative
+        self.stablecoin_trend: dict[str, float] = {}  # {'1d': %, '7d': %, ...}
         
-        # De-duplication state per symbol
-        self._last_whale_key: dict[str, str] = {}
-        self._last_whale_time: dict[str, float] = {}
         self._dedup_window_seconds: int = 5  # Skip transaksi identik dalam 5 detik
 
-    def detect_whale(self, symbol: str, size_usdt: float, side: str) -> None:
+        # Stablecoin Series lokal: [(date, total_usd), ...] + validator HTTP untuk conditional GET
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stable_series: list[tuple[int, float]] = []
+        self._stable_etag: Optional[str] = None
+        self._stable_last_modified: Optional[str] = None
+        self._load_stablecoin_history()
+
+    def detect_whale(self, symbol: str, size_usdt: float, side: str, price: float = 0.0) -> None:
         """
         Called by WebSocket AggTrade or OrderUpdate to record big trades.
-        Stores whale activity per-symbol for filtered retrieval.
+        Stores whale activity per-symbol sebagai tuple terstruktur (tanpa format string).
         Includes de-duplication to prevent logging identical transactions.
+        Threshold sudah dicek di sumber stream (MarketDataManager.whale_threshold, adaptif per symbol).
         """
-        if size_usdt >= config.WHALE_THRESHOLD_USDT:
-            current_time = time.time()
-            
-            # De-duplication: Skip jika transaksi identik dalam window waktu (per-symbol)
-            whale_key = f"{side}_{symbol}_{int(size_usdt)}"
-            last_key = self._last_whale_key.get(symbol)
-            last_time = self._last_whale_time.get(symbol, 0)
-            
-            if whale_key == last_key and (current_time - last_time) < self._dedup_window_seconds:
-                logger.debug(f"🐋 Skipped duplicate whale: {whale_key}")
+        current_time = time.time()
+        events = self.whale_events.get(symbol)
+        if events is None:
+            events = deque(maxlen=getattr(config, 'WHALE_STORE_MAXLEN', 500))
+            self.whale_events[symbol] = events
+
+        # De-duplication: Skip jika transaksi identik dalam window waktu (per-symbol)
+        if events:
+            last_ts, last_side, last_size, _ = events[-1]
+            if (last_side == side and int(last_size) == int(size_usdt)
+                    and (current_time - last_ts) < self._dedup_window_seconds):
                 return  # Skip duplicate
-            
-            # Update de-duplication state
-            self._last_whale_key[symbol] = whale_key
-            self._last_whale_time[symbol] = current_time
-            
-            # Format message dengan timestamp untuk clarity
-            timestamp = datetime.now().strftime("%H:%M")
-            msg = f"🐋 [{timestamp}] {side} {symbol} worth ${size_usdt:,.0f}"
-            
-            # Initialize list jika belum ada
-            if symbol not in self.whale_transactions:
-                self.whale_transactions[symbol] = []
-            
-            self.whale_transactions[symbol].append(msg)
-            
-            # Keep only last N transactions per symbol
-            limit = getattr(config, 'WHALE_HISTORY_LIMIT', 10)
-            if len(self.whale_transactions[symbol]) > limit:
-                self.whale_transactions[symbol].pop(0)
-            
-            #logger.info(f"🐋 Whale detected: {msg}")
 
+        events.append((current_time, side, size_usdt, price))
 
+    def get_whale_flow(self, symbol: str, window_seconds: int) -> dict:
+        """
+        Agregasi whale dalam window waktu terakhir.
+        Return: {buy_count, sell_count, buy_usdt, sell_usdt, net_usdt}
+        """
+        buy_count = sell_count = 0
+        buy_usdt = sell_usdt = 0.0
+        cutoff = time.time() - window_seconds
 
-    def fetch_stablecoin_inflows(self):
-        try:
-            url = config.DEFILLAMA_STABLECOIN_URL
-            resp = requests.get(url, timeout=config.API_REQUEST_TIMEOUT)
-            data = resp.json()
-            
-            if data and len(data) > 2:
-                # Structure: [{'date': 1600..., 'totalCirculating': {'peggedUSD': 100...}}, ...]
-                # Note: "totalCirculatingUSD" key represents aggregated mcap
-                
-                # Get last two records
-                curr = data[-1]
-                prev = data[-2]
-                
-                # Check for 'totalCirculatingUSD' key directly
-                # It is a dict: {'peggedUSD': ..., 'peggedEUR': ...}
-                curr_dict = curr.get('totalCirculatingUSD', {})
-                prev_dict = prev.get('totalCirculatingUSD', {})
-                
-                curr_val = curr_dict.get('peggedUSD', 0)
-                prev_val = prev_dict.get('peggedUSD', 0)
-                
-                if curr_val and prev_val:
-                    change_pct = ((curr_val - prev_val) / prev_val) * 100
-                    
-                    if change_pct > config.STABLECOIN_INFLOW_THRESHOLD_PERCENT:
-                        self.stablecoin_inflow = "Positive"
-                    elif change_pct < -config.STABLECOIN_INFLOW_THRESHOLD_PERCENT:
-                        self.stablecoin_inflow = "Negative"
-                    else:
-                        self.stablecoin_inflow = "Neutral"
-                        
-                    logger.info(f"🪙 Stablecoin Inflow: {self.stablecoin_inflow} ({change_pct:.2f}%)")
-                else:
-                    self.stablecoin_inflow = "Neutral"
+        # Iterasi dari event terbaru, berhenti saat keluar window
+        for ts, side, size_usdt, _ in reversed(self.whale_events.get(symbol, ())):
+            if ts < cutoff:
+                break
+            if side == "BUY":
+                buy_count += 1
+                buy_usdt += size_usdt
             else:
-                 logger.warning("CoinLlama Data Insufficient")
+                sell_count += 1
+                sell_usdt += size_usdt
+
+        return {
+            "buy_count": buy_count,
+            "sell_count": sell_count,
+            "buy_usdt": buy_usdt,
+            "sell_usdt": sell_usdt,
+            "net_usdt": buy_usdt - sell_usdt
+        }
+
+    # --- [NEW] WARM STATE CHECKPOINT ---
+    def export_state(self) -> dict:
+        return {'whale_events': {sym: list(events) for sym, events in self.whale_events.items()}}
+
+    def restore_state(self, state: dict, age: float) -> None:
+        """Restore whale events (list JSON -> deque tuple). Window agregasi tetap difilter by timestamp."""
+        maxlen = getattr(config, 'WHALE_STORE_MAXLEN', 500)
+        for sym, events in state.get('whale_events', {}).items():
+            self.whale_events[sym] = deque(
+                ((float(ts), side, float(size), float(price)) for ts, side, size, price in events),
+                maxlen=maxlen
+            )
+
+    # --- STABLECOIN FLOW (DefiLlama) ---
+    def _load_stablecoin_history(self) -> None:
+        """Load histori series stablecoin + ETag/Last-Modified dari file lokal."""
+        path = config.STABLECOIN_HISTORY_FILENAME
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as f:
+                saved = json.load(f)
+            self._stable_series = [(int(d), float(v)) for d, v in saved.get('series', [])]
+            self._stable_etag = saved.get('etag')
+            self._stable_last_modified = saved.get('last_modified')
+            self._update_stablecoin_status()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load stablecoin history: {e}")
+
+    def _save_stablecoin_history_sync(self) -> None:
+        """Sync helper untuk save histori (dijalankan di thread pool)."""
+        with open(config.STABLECOIN_HISTORY_FILENAME, 'w') as f:
+            json.dump({
+                'etag': self._stable_etag,
+                'last_modified': self._stable_last_modified,
+                'series': self._stable_series
+            }, f)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Session aiohttp persisten (connection pooling + keep-alive)."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT * 3)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def fetch_stablecoin_inflows(self):
+        """
+        Fetch series stablecoin secara incremental:
+        - Conditional GET (If-None-Match / If-Modified-Since) -> 304 jika tidak berubah.
+        - Streaming parse, hanya N record terakhir yang disimpan (bukan seluruh histori sejak 2017).
+        - Series digabung ke histori lokal agar tren beberapa hari tidak butuh download ulang.
+        """
+        try:
+            headers = {}
+            if self._stable_etag:
+                headers['If-None-Match'] = self._stable_etag
+            if self._stable_last_modified:
+                headers['If-Modified-Since'] = self._stable_last_modified
+
+            session = await self._get_session()
+            async with session.get(config.DEFILLAMA_STABLECOIN_URL, headers=headers) as resp:
+                if resp.status == 304:
+                    logger.info(f"🪙 Stablecoin Data Not Modified. Inflow: {self.stablecoin_inflow}")
+                    return
+                resp.raise_for_status()
+
+                parser = _JsonArrayTail(config.STABLECOIN_HISTORY_DAYS)
+                async for chunk in resp.content.iter_chunked(64 * 1024):
+                    parser.feed(chunk)
+
+                self._stable_etag = resp.headers.get('ETag')
+                self._stable_last_modified = resp.headers.get('Last-Modified')
+
+            # Structure: [{'date': 1600..., 'totalCirculatingUSD': {'peggedUSD': 100...}}, ...]
+            fresh = {}
+            for rec in parser.tail:
+                val = (rec.get('totalCirculatingUSD') or {}).get('peggedUSD', 0)
+                if val:
+                    fresh[int(rec['date'])] = float(val)
+
+            if len(fresh) < 2:
+                logger.warning("CoinLlama Data Insufficient")
+                return
+
+            # Merge ke histori lokal (record terbaru menimpa nilai di tanggal yang sama)
+            merged = dict(self._stable_series)
+            merged.update(fresh)
+            self._stable_series = sorted(merged.items())[-config.STABLECOIN_HISTORY_DAYS:]
+
+            self._update_stablecoin_status()
+            await asyncio.to_thread(self._save_stablecoin_history_sync)
                  
         except Exception as e:
             logger.error(f"❌ Failed fetch Stablecoin Inflow: {e}")
             self.stablecoin_inflow = "Neutral" # Fallback
 
+    def _update_stablecoin_status(self) -> None:
+        """Hitung status inflow (2 titik terakhir) dan tren multi-hari dari histori lokal."""
+        series = self._stable_series
+        if len(series) < 2:
+            self.stablecoin_inflow = "Neutral"
+            return
+
+        curr_val = series[-1][1]
+        prev_val = series[-2][1]
+        change_pct = ((curr_val - prev_val) / prev_val) * 100
+
+        if change_pct > config.STABLECOIN_INFLOW_THRESHOLD_PERCENT:
+            self.stablecoin_inflow = "Positive"
+        elif change_pct < -config.STABLECOIN_INFLOW_THRESHOLD_PERCENT:
+            self.stablecoin_inflow = "Negative"
+        else:
+            self.stablecoin_inflow = "Neutral"
+
+        trend = {}
+        for days in config.STABLECOIN_TREND_DAYS:
+            if len(series) > days:
+                base = series[-1 - days][1]
+                trend[f"{days}d"] = ((curr_val - base) / base) * 100
+        self.stablecoin_trend = trend
+
+        logger.info(f"🪙 Stablecoin Inflow: {self.stablecoin_inflow} ({change_pct:.2f}%) | Trend: {trend}")
+
     def get_latest(self, symbol: Optional[str] = None) -> dict:
         """
         Get latest on-chain data.
@@ -109,15 +244,25 @@ class OnChainAnalyzer:
                     If None, returns empty whale list (untuk global sentiment).
         
         Returns:
-            dict with whale_activity (filtered) and stablecoin_inflow
+            dict with whale_activity (filtered), whale_summary (per window) and stablecoin_inflow
         """
         whale_list = []
+        whale_summary = {}
         
-        if symbol and symbol in self.whale_transactions:
-            whale_list = self.whale_transactions[symbol].copy()
+        if symbol and symbol in self.whale_events:
+            # Format string hanya di sini (lazy), untuk N event terakhir
+            limit = getattr(config, 'WHALE_HISTORY_LIMIT', 10)
+            recent = list(self.whale_events[symbol])[-limit:]
+            whale_list = [
+                f"🐋 [{datetime.fromtimestamp(ts).strftime('%H:%M')}] {side} {symbol} worth ${size_usdt:,.0f}"
+                for ts, side, size_usdt, _ in recent
+            ]
+            for label, seconds in getattr(config, 'WHALE_FLOW_WINDOWS', {'5m': 300, '1h': 3600}).items():
+                whale_summary[label] = self.get_whale_flow(symbol, seconds)
         
         return {
             "whale_activity": whale_list,
-            "stablecoin_inflow": self.stablecoin_inflow
+            "whale_summary": whale_summary,
+            "stablecoin_inflow": self.stablecoin_inflow,
+            "stablecoin_trend": self.stablecoin_trend
         }
-
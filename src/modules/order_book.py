@@ -0,0 +1,260 @@
+import numpy as np
+from collections import deque
+
+
+def _to_levels(raw_levels):
+    """Convert [["price", "qty"], ...] (string dari Binance) ke array float (N, 2)."""
+    if not raw_levels:
+        return np.empty((0, 2), dtype=np.float64)
+    return np.asarray(raw_levels, dtype=np.float64).reshape(-1, 2)
+
+
+def _apply_side(prices, qtys, updates):
+    """
+    Terapkan update level (harga, qty absolut) ke satu sisi book yang tersortir ascending.
+    qty == 0 berarti level dihapus. Vectorized: O(n + k) per event.
+    """
+    if updates.size == 0:
+        return prices, qtys
+
+    # Sort update agar np.insert menjaga urutan ascending
+    updates = updates[np.argsort(updates[:, 0], kind='stable')]
+    up_p = updates[:, 0]
+    up_q = updates[:, 1]
+
+    if prices.size:
+        idx = np.searchsorted(prices, up_p)
+        safe_idx = np.minimum(idx, prices.size - 1)
+        exists = (idx < prices.size) & (prices[safe_idx] == up_p)
+    else:
+        idx = np.zeros(up_p.size, dtype=np.intp)
+        exists = np.zeros(up_p.size, dtype=bool)
+
+    # 1. Level yang sudah ada -> overwrite qty (qty 0 dibersihkan di langkah 3)
+    if exists.any():
+        qtys[idx[exists]] = up_q[exists]
+
+    # 2. Level baru (qty > 0) -> insert di posisi tersortir
+    new_mask = ~exists & (up_q > 0)
+    if new_mask.any():
+        prices = np.insert(prices, idx[new_mask], up_p[new_mask])
+        qtys = np.insert(qtys, idx[new_mask], up_q[new_mask])
+
+    # 3. Buang level kosong
+    keep = qtys > 0
+    if not keep.all():
+        prices = prices[keep]
+        qtys = qtys[keep]
+
+    return prices, qtys
+
+
+class LocalOrderBook:
+    """
+    Order book lokal per-symbol: snapshot REST + diff update (@depth@100ms).
+    Kedua sisi disimpan sebagai NumPy array tersortir ascending (harga & qty),
+    sehingga query depth dalam band persentase cukup O(log n) via searchsorted + cumsum.
+
+    Sequencing mengikuti aturan Binance Futures:
+    - Event dengan u < lastUpdateId snapshot dibuang.
+    - Event pertama harus U <= lastUpdateId <= u.
+    - Event berikutnya harus pu == u sebelumnya, jika tidak -> gap (perlu resync).
+    """
+
+    def __init__(self, symbol, buffer_limit=1000):
+        self.symbol = symbol
+        self.bid_prices = np.empty(0, dtype=np.float64)
+        self.bid_qtys = np.empty(0, dtype=np.float64)
+        self.ask_prices = np.empty(0, dtype=np.float64)
+        self.ask_qtys = np.empty(0, dtype=np.float64)
+
+        self.last_update_id = 0
+        self.last_event_ts = 0  # Event time (ms) dari diff terakhir
+        self.synced = False
+        self._awaiting_first = False
+        self._buffer = deque(maxlen=buffer_limit)  # Diff yang datang sebelum snapshot siap
+
+        # Prefix sum notional (harga * qty), dihitung ulang lazily setelah update
+        self._bid_cum = None
+        self._ask_cum = None
+
+    # --- STATE MANAGEMENT ---
+    def reset(self):
+        """Tandai book tidak sinkron (misal: WS reconnect atau gap sequence)."""
+        self.synced = False
+        self._awaiting_first = False
+        self._buffer.clear()
+
+    def buffer_event(self, payload):
+        """Simpan diff selama menunggu snapshot."""
+        self._buffer.append(payload)
+
+    def load_snapshot(self, snapshot):
+        """
+        Muat snapshot REST ({lastUpdateId, bids, asks}) lalu replay diff yang sudah di-buffer.
+        Return False jika replay menemukan gap (perlu snapshot ulang).
+        """
+        bids = _to_levels(snapshot.get('bids'))
+        asks = _to_levels(snapshot.get('asks'))
+
+        # REST mengirim bids descending -> simpan ascending
+        bids = bids[np.argsort(bids[:, 0], kind='stable')]
+        asks = asks[np.argsort(asks[:, 0], kind='stable')]
+
+        self.bid_prices, self.bid_qtys = bids[:, 0].copy(), bids[:, 1].copy()
+        self.ask_prices, self.ask_qtys = asks[:, 0].copy(), asks[:, 1].copy()
+        self.last_update_id = int(snapshot['lastUpdateId'])
+        self._awaiting_first = True
+        self.synced = True
+        self._invalidate()
+
+        pending = list(self._buffer)
+        self._buffer.clear()
+        for payload in pending:
+            if not self.apply_diff(payload):
+                self.reset()
+                return False
+        return True
+
+    def apply_diff(self, payload):
+        """
+        Terapkan satu event depthUpdate.
+        Return False jika terjadi gap sequence (caller wajib resync).
+        """
+        first_id = int(payload['U'])
+        final_id = int(payload['u'])
+
+        # Event lama (sudah tercakup snapshot)
+        if final_id < self.last_update_id:
+            return True
+
+        if self._awaiting_first:
+            if first_id > self.last_update_id:
+                return False
+            self._awaiting_first = False
+        elif int(payload.get('pu', -1)) != self.last_update_id:
+            return False
+
+        self.bid_prices, self.bid_qtys = _apply_side(self.bid_prices, self.bid_qtys, _to_levels(payload.get('b')))
+        self.ask_prices, self.ask_qtys = _apply_side(self.ask_prices, self.ask_qtys, _to_levels(payload.get('a')))
+        self.last_update_id = final_id
+        self.last_event_ts = int(payload.get('E', 0))
+        self._invalidate()
+        return True
+
+    def _invalidate(self):
+        self._bid_cum = None
+        self._ask_cum = None
+
+    def _ensure_cum(self):
+        if self._bid_cum is None:
+            self._bid_cum = np.concatenate(([0.0], np.cumsum(self.bid_prices * self.bid_qtys)))
+        if self._ask_cum is None:
+            self._ask_cum = np.concatenate(([0.0], np.cumsum(self.ask_prices * self.ask_qtys)))
+
+    # --- QUERIES ---
+    def is_ready(self):
+        return self.synced and self.bid_prices.size > 0 and self.ask_prices.size > 0
+
+    def best_bid(self):
+        return float(self.bid_prices[-1]) if self.bid_prices.size else 0.0
+
+    def best_ask(self):
+        return float(self.ask_prices[0]) if self.ask_prices.size else 0.0
+
+    def mid_price(self):
+        if not self.is_ready():
+            return 0.0
+        return (self.best_bid() + self.best_ask()) / 2
+
+    def depth_in_band(self, range_pct, mid_price=None):
+        """
+        Total notional (USDT) bids & asks dalam ±range_pct dari mid price. O(log n).
+        Return: (bids_vol_usdt, asks_vol_usdt)
+        """
+        if not self.is_ready():
+            return 0.0, 0.0
+        self._ensure_cum()
+
+        mid = mid_price if mid_price else self.mid_price()
+        lo = mid * (1 - range_pct)
+        hi = mid * (1 + range_pct)
+
+        bid_idx = np.searchsorted(self.bid_prices, lo, side='left')
+        ask_idx = np.searchsorted(self.ask_prices, hi, side='right')
+
+        bids_vol = self._bid_cum[-1] - self._bid_cum[bid_idx]
+        asks_vol = self._ask_cum[ask_idx]
+        return float(bids_vol), float(asks_vol)
+
+    def compute_features(self, bands, wall_multiplier=5.0):
+        """
+        Hitung fitur order book secara vectorized (cumsum + searchsorted), dipanggil saat update.
+        Args:
+            bands: list range persentase (misal [0.0025, 0.005, 0.01, 0.02])
+            wall_multiplier: level dianggap "wall" jika notional >= N x median level di band terlebar
+        Return: dict fitur atau None jika book belum siap.
+        """
+        if not self.is_ready():
+            return None
+        self._ensure_cum()
+
+        bid = self.best_bid()
+        ask = self.best_ask()
+        bid_q = float(self.bid_qtys[-1])
+        ask_q = float(self.ask_qtys[0])
+        mid = (bid + ask) / 2
+
+        # Weighted Mid (Microprice): condong ke sisi dengan qty top-of-book lebih tipis
+        top_q = bid_q + ask_q
+        weighted_mid = (bid * ask_q + ask * bid_q) / top_q if top_q > 0 else mid
+
+        # Multi-Band Depth & Imbalance (sekali searchsorted untuk semua band)
+        band_arr = np.asarray(sorted(bands), dtype=np.float64)
+        bid_idx = np.searchsorted(self.bid_prices, mid * (1 - band_arr), side='left')
+        ask_idx = np.searchsorted(self.ask_prices, mid * (1 + band_arr), side='right')
+        bids_vol = self._bid_cum[-1] - self._bid_cum[bid_idx]
+        asks_vol = self._ask_cum[ask_idx]
+        total = bids_vol + asks_vol
+        imbalance = np.divide(bids_vol - asks_vol, total, out=np.zeros_like(total), where=total > 0) * 100
+
+        band_features = [
+            {
+                "band_pct": float(band_arr[i] * 100),
+                "bids_vol_usdt": float(bids_vol[i]),
+                "asks_vol_usdt": float(asks_vol[i]),
+                "imbalance_pct": float(imbalance[i])
+            }
+            for i in range(band_arr.size)
+        ]
+
+        # Wall Detection (di band terlebar)
+        def _find_wall(prices, qtys):
+            if prices.size == 0:
+                return None
+            notional = prices * qtys
+            median = float(np.median(notional))
+            top = int(np.argmax(notional))
+            if median <= 0 or notional[top] < median * wall_multiplier:
+                return None
+            return {
+                "price": float(prices[top]),
+                "notional_usdt": float(notional[top]),
+                "distance_pct": float((prices[top] - mid) / mid * 100)
+            }
+
+        bid_wall = _find_wall(self.bid_prices[bid_idx[-1]:], self.bid_qtys[bid_idx[-1]:])
+        ask_wall = _find_wall(self.ask_prices[:ask_idx[-1]], self.ask_qtys[:ask_idx[-1]])
+
+        return {
+            "best_bid": bid,
+            "best_ask": ask,
+            "mid_price": mid,
+            "weighted_mid": weighted_mid,
+            "spread": ask - bid,
+            "spread_bps": (ask - bid) / mid * 10000 if mid > 0 else 0.0,
+            "bands": band_features,
+            "bid_wall": bid_wall,
+            "ask_wall": ask_wall,
+            "levels": int(self.bid_prices.size + self.ask_prices.size)
+        }
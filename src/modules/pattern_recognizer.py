@@ -1,24 +1,49 @@
 import io
-import base64
 import json
 import asyncio
-import pandas as pd
-import mplfinance as mpf
-from openai import AsyncOpenAI
-import httpx
+import time
 import config
-import matplotlib
-matplotlib.use('Agg') # Force non-interactive backend
-from src.utils.helper import logger
+from src.utils.helper import logger, get_next_rounded_time
+from src.utils.metrics import CHART_RENDER, LLM_LATENCY, LLM_ERRORS
 from src.utils.prompt_builder import build_pattern_recognition_prompt
+from src.utils.chart_encoding import encode_chart_data_url
+
+
+def _load_charting():
+    """
+    Lazy import stack charting (pandas, pandas_ta, matplotlib, mplfinance).
+    Hanya di-load saat chart pertama dirender, bukan saat startup.
+    Return (pd, mpf).
+    """
+    import pandas as pd
+    import pandas_ta  # noqa: F401 (registrasi accessor df.ta)
+    import matplotlib
+    matplotlib.use('Agg') # Force non-interactive backend
+    import mplfinance as mpf
+    return pd, mpf
+
+_CHART_FIGSIZE = (8, 6) # inch; ukuran px = figsize x dpi (dipangkas bbox tight)
+
+
+def chart_render_dpi(max_side=None):
+    """
+    DPI render agar chart langsung seukuran target CHART_IMAGE_MAX_SIDE.
+    Resample gambar besar ke kecil membuat warna flat jadi anti-aliased -> PNG malah membengkak.
+    """
+    max_side = getattr(config, 'CHART_IMAGE_MAX_SIDE', 512) if max_side is None else max_side
+    return max_side / max(_CHART_FIGSIZE) if max_side else getattr(config, 'CHART_RENDER_DPI', 100)
 
 class PatternRecognizer:
     def __init__(self, market_data_manager):
         self.market_data = market_data_manager
         self.cache = {} # {symbol: {'candle_ts': 12345, 'analysis': "..."}}
+        self._inflight = {} # {symbol: (candle_ts, Task)} analisa yang sedang berjalan (dipakai bersama, tidak dobel)
+        self._prewarm_sem = asyncio.Semaphore(getattr(config, 'PATTERN_PREWARM_CONCURRENCY', 2))
         
         # Initialize AI Client for Vision
         if config.USE_PATTERN_RECOGNITION and config.AI_API_KEY:
+            import httpx
+            from openai import AsyncOpenAI
             self.client = AsyncOpenAI(
                 base_url=config.AI_BASE_URL,
                 api_key=config.AI_API_KEY,
@@ -34,20 +59,46 @@ class PatternRecognizer:
             self.client = None
             logger.warning("⚠️ Vision AI Disabled or Key Missing.")
 
+    # --- [NEW] WARM STATE CHECKPOINT ---
+    def export_state(self):
+        return {'cache': self.cache}
+
+    def restore_state(self, state, age):
+        """Hasil vision per candle_ts self-validating: cache dipakai lagi hanya jika candle SETUP belum berganti."""
+        for sym, entry in state.get('cache', {}).items():
+            if sym in self.market_data.market_store:
+                self.cache[sym] = entry
+
     def get_setup_candles(self, symbol):
         """Retrieve candles for the SETUP timeframe"""
         return self.market_data.market_store.get(symbol, {}).get(config.TIMEFRAME_SETUP, [])
 
     def generate_chart_image(self, symbol):
+        """
+        Render chart lalu encode ringkas untuk Vision AI (lihat src/utils/chart_encoding.py).
+        Returns (data_url, raw_stats_dict).
+        """
+        png_bytes, raw_stats = self.render_chart_png(symbol)
+        if not png_bytes:
+            return None, None
+        try:
+            return encode_chart_data_url(png_bytes), raw_stats
+        except Exception as e:
+            logger.error(f"❌ Chart Encoding Failed {symbol}: {e}")
+            return None, None
+
+    def render_chart_png(self, symbol, dpi=None):
         """
         Generate candlestick chart image using mplfinance AND extract raw stats.
-        Returns (base64_string, raw_stats_dict).
+        Returns (png_bytes, raw_stats_dict).
         """
         candles = self.get_setup_candles(symbol)
         if not candles or len(candles) < config.MACD_SLOW: # Need at least MACD_SLOW
             return None, None
         
         try:
+            pd, mpf = _load_charting()
+
             # Convert to DataFrame
             df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
@@ -55,7 +106,6 @@ class PatternRecognizer:
 
             # --- MACD Calculation ---
             # append=True adds columns to df: MACD_12_26_9, MACDh_12_26_9, MACDs_12_26_9
-            import pandas_ta as ta
             df.ta.macd(fast=config.MACD_FAST, slow=config.MACD_SLOW, signal=config.MACD_SIGNAL, append=True)
             
             # Clean NaN created by indicators
@@ -114,14 +164,13 @@ class PatternRecognizer:
                 volume=True,
                 addplot=macd_plots,
                 panel_ratios=(6,2,2), # Price: 60%, Volume: 20%, MACD: 20%
-                savefig=dict(fname=buf, dpi=100, bbox_inches='tight', format='png'),
+                figsize=_CHART_FIGSIZE,
+                savefig=dict(fname=buf, dpi=dpi or chart_render_dpi(), bbox_inches='tight', format='png'),
                 axisoff=True, 
                 tight_layout=True
             )
             
-            buf.seek(0)
-            img_str = base64.b64encode(buf.read()).decode('utf-8')
-            return img_str, raw_stats
+            return buf.getvalue(), raw_stats
             
         except Exception as e:
             logger.error(f"❌ Chart Generation Failed {symbol}: {e}")
@@ -177,14 +226,29 @@ class PatternRecognizer:
             # Return cached analysis
             return cached['result']
 
+        # Sudah dirender/dianalisa di background (prewarm) untuk candle ini -> tunggu hasil yang sama
+        pending = self._inflight.get(symbol)
+        if pending is None or pending[0] != last_ts:
+            task = asyncio.create_task(self._analyze(symbol, last_ts))
+            pending = self._inflight[symbol] = (last_ts, task)
+            task.add_done_callback(lambda _t, s=symbol, p=pending: self._clear_inflight(s, p))
+        return await asyncio.shield(pending[1])
+
+    def _clear_inflight(self, symbol, pending):
+        if self._inflight.get(symbol) is pending:
+            del self._inflight[symbol]
+
+    async def _analyze(self, symbol, last_ts):
+        """Render chart + Vision AI (dengan retry) untuk candle SETUP last_ts. Hasil valid disimpan ke cache."""
         logger.info(f"👁️ Recognizing Pattern for {symbol} ({config.TIMEFRAME_SETUP})...")
         
         # Generate Image & Stats
         # Run in thread executor to not block async loop (mplfinance is blocking)
-        result = await asyncio.to_thread(self.generate_chart_image, symbol)
-        img_base64, raw_stats = result
+        with CHART_RENDER.time():
+            result = await asyncio.to_thread(self.generate_chart_image, symbol)
+        image_url, raw_stats = result
         
-        if not img_base64:
+        if not image_url:
             return {"analysis": "Failed to generate chart.", "is_valid": False}
 
         # Retry Loop for AI Call
@@ -195,6 +259,7 @@ class PatternRecognizer:
                 
                 logger.info(f"📤 Sending chart image to Vision AI for {symbol} (attempt {attempt + 1})...")
                 
+                llm_start = time.perf_counter()
                 response = await self.client.chat.completions.create(
                     model=self.model,
                     messages=[
@@ -205,7 +270,7 @@ class PatternRecognizer:
                                 {
                                     "type": "image_url",
                                     "image_url": {
-                                        "url": f"data:image/png;base64,{img_base64}",
+                                        "url": image_url,
                                         "detail": "low" # Low detail to save tokens, usually enough for patterns
                                     }
                                 }
@@ -215,6 +280,7 @@ class PatternRecognizer:
                     max_tokens=config.AI_VISION_MAX_TOKENS,
                     temperature=config.AI_VISION_TEMPERATURE
                 )
+                LLM_LATENCY.observe(time.perf_counter() - llm_start, kind='vision')
                 
                 analysis_text = response.choices[0].message.content
                 
@@ -242,6 +308,7 @@ class PatternRecognizer:
                         continue
                 
             except Exception as e:
+                LLM_ERRORS.inc(kind='vision')
                 logger.error(f"❌ Vision AI Error {symbol} (attempt {attempt + 1}): {e}")
                 if attempt < config.PATTERN_MAX_RETRIES:
                     await asyncio.sleep(1)
@@ -256,3 +323,36 @@ class PatternRecognizer:
             'is_valid': False
         }
 
+
+    # --- [NEW] BACKGROUND PRE-RENDER (di luar critical path main loop) ---
+    async def prewarm_loop(self, candidates_fn):
+        """
+        Setiap candle TIMEFRAME_SETUP close: render chart + Vision AI di background untuk symbol
+        dari candidates_fn() (yang kemungkinan dianalisa), concurrency dibatasi PATTERN_PREWARM_CONCURRENCY.
+        Main loop cukup membaca cache / menunggu task yang sudah berjalan.
+        """
+        delay = getattr(config, 'PATTERN_PREWARM_DELAY', 3)
+        while True:
+            boundary = get_next_rounded_time(config.TIMEFRAME_SETUP)
+            await asyncio.sleep(max(0, boundary - time.time()) + delay)
+            symbols = candidates_fn()
+            if not symbols:
+                continue
+            logger.info(f"👁️ Pre-render Pattern {config.TIMEFRAME_SETUP}: {len(symbols)} symbols")
+            await asyncio.gather(*(self._prewarm_symbol(sym, boundary * 1000) for sym in symbols), return_exceptions=True)
+
+    async def _prewarm_symbol(self, symbol, min_ts):
+        # Candle baru bisa telat masuk dari WS -> tunggu (tanpa memegang slot concurrency)
+        deadline = time.time() + getattr(config, 'PATTERN_PREWARM_MAX_WAIT', 30)
+        while True:
+            self.market_data.refresh(symbol)
+            candles = self.get_setup_candles(symbol)
+            if candles and candles[-1][0] >= min_ts:
+                break
+            if time.time() > deadline:
+                logger.debug(f"Pre-render {symbol} dilewati: candle {config.TIMEFRAME_SETUP} baru belum masuk")
+                return
+            await asyncio.sleep(1)
+
+        async with self._prewarm_sem:
+            await self.analyze_pattern(symbol)
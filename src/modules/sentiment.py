@@ -1,12 +1,73 @@
-import feedparser
-import random
 import asyncio
 import aiohttp
+import calendar
+import time
 import config
-from datetime import datetime, timezone
+from collections import deque
 from typing import Optional
 from src.utils.helper import logger
 
+
+def _parse_feed(content: bytes):
+    """Parse RSS di worker thread. feedparser di-import lazily (tidak memperlambat startup)."""
+    import feedparser
+    return feedparser.parse(content)
+
+
+class _KeywordAutomaton:
+    """
+    Aho-Corasick automaton: menemukan SEMUA keyword (substring, termasuk yang overlap)
+    dalam satu kali scan teks, berapapun jumlah keyword yang terdaftar.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+        self.keywords = {kw for kw in keywords if kw}
+
+        for kw in keywords:
+            if not kw:
+                continue
+            node = 0
+            for ch in kw:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                    self._goto[node][ch] = nxt
+                node = nxt
+            self._out[node].add(kw)
+
+        # BFS untuk failure link
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> set:
+        """Return set keyword yang muncul di text."""
+        node = 0
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
 class SentimentAnalyzer:
     def __init__(self):
         self.fng_url = config.CMC_FNG_URL
@@ -15,6 +76,11 @@ class SentimentAnalyzer:
         self.raw_news = []        # Berita mentah (unfiltered)
         self.macro_news_cache = [] # Cache khusus berita makro
 
+        # [NEW] Persistent Session + Conditional GET State per Feed
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._feed_state = {}      # {url: {'etag', 'last_modified', 'last_guid'}}
+        self.headline_store = {}   # {dedup_key: {'text': "Title (Source)", 'ts': epoch}}
+
         # Optimization: Pre-compute keyword lookups for O(1) access
         self._exact_keywords = {}
         self._base_keywords = {}
@@ -35,6 +101,22 @@ class SentimentAnalyzer:
                 if base not in self._base_keywords:
                     self._base_keywords[base] = (i, kw)
 
+        # [NEW] Keyword Index: automaton dibangun sekali, headline di-scan sekali per fetch
+        self._macro_keywords = [kw.lower() for kw in getattr(config, 'MACRO_KEYWORDS', [])]
+        self._btc_keywords = ['bitcoin', 'btc']
+        for koin in config.DAFTAR_KOIN:
+            if 'BTC' in koin['symbol']:
+                self._btc_keywords = [kw.lower() for kw in koin.get('keywords', self._btc_keywords)]
+                break
+
+        all_keywords = set(self._macro_keywords) | set(self._btc_keywords)
+        for koin in config.DAFTAR_KOIN:
+            all_keywords |= {kw.lower() for kw in self._get_coin_keywords(koin['symbol'])}
+        self._automaton = _KeywordAutomaton(sorted(all_keywords))
+
+        self._keyword_index = {}   # {keyword: [index headline di raw_news, ascending]}
+        self._relevance_cache = {} # {symbol: filtered list} -> valid sampai fetch berikutnya
+
     async def fetch_fng(self):
         """Fetch Fear & Greed Index from CoinMarketCap (Async)"""
         try:
@@ -47,9 +129,9 @@ class SentimentAnalyzer:
                 logger.warning("⚠️ CMC_API_KEY not found. Using default neutral sentiment.")
                 return
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.fng_url, headers=headers, timeout=config.API_REQUEST_TIMEOUT) as resp:
-                    data = await resp.json()
+            session = await self._get_session()
+            async with session.get(self.fng_url, headers=headers, timeout=aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT)) as resp:
+                data = await resp.json()
             
             if 'status' in data and int(data['status']['error_code']) == 0 and 'data' in data:
                 if isinstance(data['data'], list) and len(data['data']) > 0:
@@ -72,48 +154,94 @@ class SentimentAnalyzer:
         except Exception as e:
             logger.warning(f"⚠️ Failed to fetch F&G: {e}")
 
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Session aiohttp persisten (connection pooling + keep-alive antar refresh)."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    @staticmethod
+    def _headline_key(title: str) -> str:
+        """Key dedup: judul dinormalisasi (berita sama dari beberapa feed dianggap satu)."""
+        return " ".join(title.lower().split())
+
     async def _fetch_single_rss(self, session: aiohttp.ClientSession, url: str, max_per_source: int, max_age_hours: int) -> list:
-        """Fetch single RSS feed secara async."""
+        """
+        Fetch single RSS feed secara async dengan Conditional GET (ETag / Last-Modified).
+        Feed yang tidak berubah -> 304 (tanpa download & parse).
+        Hanya entry yang lebih baru dari GUID terakhir yang diproses.
+        Return: list of (key, text, published_ts)
+        """
         news_items = []
+        state = self._feed_state.setdefault(url, {})
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
         try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT)) as response:
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT)) as response:
+                if response.status == 304:
+                    return []
+                if response.status != 200:
+                    logger.warning(f"⚠️ RSS {url} returned HTTP {response.status}")
+                    return []
                 content = await response.read()
-                feed = await asyncio.to_thread(feedparser.parse, content)
+                state['etag'] = response.headers.get('ETag')
+                state['last_modified'] = response.headers.get('Last-Modified')
+
+            feed = await asyncio.to_thread(_parse_feed, content)
+            
+            if not feed.entries:
+                return []
+
+            source_name = feed.feed.get('title', 'Unknown Source')
+            last_guid = state.get('last_guid')
+            now = time.time()
+            
+            for entry in feed.entries:
+                if len(news_items) >= max_per_source:
+                    break
+
+                # Feed terurut terbaru dulu: stop saat ketemu entry yang sudah pernah diproses
+                guid = entry.get('id') or entry.get('link') or entry.get('title')
+                if last_guid and guid == last_guid:
+                    break
                 
-                if not feed.entries:
-                    return []
+                published_ts = now
+                if hasattr(entry, 'published_parsed') and entry.published_parsed:
+                    try:
+                        published_ts = calendar.timegm(entry.published_parsed)
+                    except Exception:
+                        pass
 
-                source_name = feed.feed.get('title', 'Unknown Source')
+                if now - published_ts > (max_age_hours * 3600):
+                    continue
                 
-                count = 0
-                for entry in feed.entries:
-                    if count >= max_per_source:
-                        break
-                    
-                    is_recent = True
-                    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                        try:
-                            published_dt = datetime(*entry.published_parsed[:6])
-                            age_seconds = (datetime.now(timezone.utc) - published_dt.replace(tzinfo=timezone.utc)).total_seconds()
-                            if age_seconds > (max_age_hours * 3600):
-                                is_recent = False
-                        except Exception:
-                            pass
+                # Clean title
+                title = entry.get('title', '').replace('\n', ' ').strip()
+                if title:
+                    news_items.append((self._headline_key(title), f"{title} ({source_name})", published_ts))
+
+            first_guid = feed.entries[0].get('id') or feed.entries[0].get('link') or feed.entries[0].get('title')
+            if first_guid:
+                state['last_guid'] = first_guid
                     
-                    if is_recent:
-                        title = entry.title
-                        # Clean title
-                        title = title.replace('\n', ' ').strip()
-                        news_items.append(f"{title} ({source_name})")
-                        count += 1
-                        
         except Exception as e:
             logger.warning(f"⚠️ Failed to fetch RSS {url}: {e}")
         
         return news_items
 
     async def fetch_news(self):
-        """Fetch Top News dari RSS Feeds secara concurrent dan simpan ke raw_news."""
+        """
+        Fetch RSS Feeds secara concurrent (incremental) dan update headline store.
+        raw_news = headline unik terbaru (urut waktu publish), maksimal NEWS_MAX_TOTAL.
+        """
         rss_urls = getattr(config, 'RSS_FEED_URLS', [])
         if not rss_urls:
             logger.warning("⚠️ No RSS URLs configured in config.")
@@ -123,40 +251,88 @@ class SentimentAnalyzer:
         max_age_hours = getattr(config, 'NEWS_MAX_AGE_HOURS', 24) 
         max_total = getattr(config, 'NEWS_MAX_TOTAL', 50)
         
-        # Concurrent fetch dengan aiohttp
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                self._fetch_single_rss(session, url, max_per_source, max_age_hours) 
-                for url in rss_urls
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Concurrent fetch dengan session persisten
+        session = await self._get_session()
+        tasks = [
+            self._fetch_single_rss(session, url, max_per_source, max_age_hours) 
+            for url in rss_urls
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        # Gabungkan hasil dari semua feeds
-        all_news = []
+        # Masukkan headline baru ke store (dedup by key)
+        new_count = 0
         for result in results:
-            if isinstance(result, list):
-                all_news.extend(result)
-            # Skip exceptions (sudah di-log di _fetch_single_rss)
-        
-        # Shuffle biar variatif sumbernya
-        random.shuffle(all_news)
-        
-        # Simpan ke raw_news 
-        self.raw_news = all_news[:max_total]
+            if not isinstance(result, list):
+                continue # Skip exceptions (sudah di-log di _fetch_single_rss)
+            for key, text, published_ts in result:
+                if key not in self.headline_store:
+                    self.headline_store[key] = {'text': text, 'ts': published_ts}
+                    new_count += 1
+
+        # Buang headline kadaluarsa
+        cutoff = time.time() - (max_age_hours * 3600)
+        expired = [k for k, v in self.headline_store.items() if v['ts'] < cutoff]
+        for k in expired:
+            del self.headline_store[k]
+
+        if new_count or expired or not self.raw_news:
+            self._publish_headlines(max_total)
         
-        # Update Macro Cache juga saat fetch
+        logger.info(f"📰 News Fetched: {new_count} new, {len(self.raw_news)} headlines. (Macro: {len(self.macro_news_cache)})")
+
+    def _publish_headlines(self, max_total):
+        """headline_store -> raw_news (terbaru dulu), lalu rebuild keyword index & Macro Cache."""
+        newest = sorted(self.headline_store.values(), key=lambda v: v['ts'], reverse=True)[:max_total]
+        self.raw_news = [v['text'] for v in newest]
+        self._rebuild_news_index()
         self._update_macro_cache()
-        
-        logger.info(f"📰 News Fetched: {len(self.raw_news)} headlines. (Macro: {len(self.macro_news_cache)})")
+
+    # --- [NEW] WARM STATE CHECKPOINT ---
+    def export_state(self):
+        return {
+            'last_fng': self.last_fng,
+            'headline_store': self.headline_store,
+            'feed_state': self._feed_state,
+        }
+
+    def restore_state(self, state, age):
+        """
+        Restore headline store + state conditional GET (ETag/Last-Modified/last_guid) per feed,
+        sehingga fetch pertama setelah restart cukup 304 / incremental, bukan download ulang semua feed.
+        """
+        self.last_fng = state.get('last_fng') or self.last_fng
+        cutoff = time.time() - getattr(config, 'NEWS_MAX_AGE_HOURS', 24) * 3600
+        self.headline_store = {k: v for k, v in state.get('headline_store', {}).items() if v['ts'] >= cutoff}
+        # Tanpa headline, validator feed tidak boleh dipakai (304 -> store tetap kosong)
+        self._feed_state = state.get('feed_state', {}) if self.headline_store else {}
+        self._publish_headlines(getattr(config, 'NEWS_MAX_TOTAL', 50))
+
+    def _rebuild_news_index(self):
+        """
+        Scan raw_news sekali dengan automaton -> inverted index keyword -> headline.
+        Cache hasil filter per-symbol dikosongkan, lalu dihitung ulang untuk koin yang dipantau.
+        """
+        index = {}
+        for i, news in enumerate(self.raw_news):
+            for kw in self._automaton.find(news.lower()):
+                index.setdefault(kw, []).append(i)
+        self._keyword_index = index
+
+        self._relevance_cache = {}
+        for koin in config.DAFTAR_KOIN:
+            self.filter_news_by_relevance(koin['symbol'])
+
+    def _indices_for(self, keywords) -> set:
+        """Gabungan index headline yang mengandung salah satu keyword."""
+        result = set()
+        for kw in keywords:
+            result.update(self._keyword_index.get(kw, ()))
+        return result
 
     def _update_macro_cache(self):
         """Filter dan simpan berita makro terbaru ke cache."""
-        macro_keywords = getattr(config, 'MACRO_KEYWORDS', [])
-        found = []
-        for news in self.raw_news:
-            news_lower = news.lower()
-            if any(kw in news_lower for kw in macro_keywords):
-                found.append(f"[MACRO] {news}")
+        macro_idx = sorted(self._indices_for(self._macro_keywords))
+        found = [f"[MACRO] {self.raw_news[i]}" for i in macro_idx]
         
         # Ambil Top N Macro News (max limit)
         self.macro_news_cache = found[:getattr(config, 'NEWS_MACRO_MAX', 3)]
@@ -194,6 +370,10 @@ class SentimentAnalyzer:
         """
         if not self.raw_news:
             return []
+
+        cached = self._relevance_cache.get(symbol)
+        if cached is not None:
+            return list(cached)
         
         base_coin = symbol.split('/')[0].upper()
         is_btc = base_coin == 'BTC'
@@ -204,39 +384,31 @@ class SentimentAnalyzer:
         btc_max = getattr(config, 'NEWS_BTC_MAX', 3)
         total_limit = getattr(config, 'NEWS_RETENTION_LIMIT', 10)
         
-        # Get keywords
-        target_keywords = self._get_coin_keywords(symbol)
-        macro_keywords = getattr(config, 'MACRO_KEYWORDS', [])
-        
-        btc_keywords = []
-        if not is_btc:
-            for koin in config.DAFTAR_KOIN:
-                if 'BTC' in koin['symbol']:
-                    btc_keywords = koin.get('keywords', ['bitcoin', 'btc'])
-                    break
-            if not btc_keywords:
-                btc_keywords = ['bitcoin', 'btc']
+        # Lookup index (bukan scan semua headline)
+        target_keywords = [kw.lower() for kw in self._get_coin_keywords(symbol)]
+        if any(kw not in self._automaton.keywords for kw in target_keywords):
+            # Koin di luar DAFTAR_KOIN: keyword belum ada di automaton, fallback substring scan
+            coin_idx = {i for i, n in enumerate(self.raw_news) if any(kw in n.lower() for kw in target_keywords)}
+        else:
+            coin_idx = self._indices_for(target_keywords)
+        macro_idx = self._indices_for(self._macro_keywords)
+        btc_idx = self._indices_for(self._btc_keywords) if not is_btc else set()
         
-        # Kategorisasi berita
+        # Kategorisasi berita (urutan headline dipertahankan)
         macro_news = []
         coin_news = []
         btc_news = []
         
-        for news in self.raw_news:
-            news_lower = news.lower()
-            
-            # Check macro first (priority)
-            is_macro = any(kw in news_lower for kw in macro_keywords)
-            is_coin = any(kw in news_lower for kw in target_keywords)
-            is_btc_rel = any(kw in news_lower for kw in btc_keywords) if not is_btc else False
+        for i in sorted(macro_idx | coin_idx | btc_idx):
+            news = self.raw_news[i]
             
             # Categorize (allow overlap for coin-specific)
-            if is_macro and len(macro_news) < macro_max:
+            if i in macro_idx and len(macro_news) < macro_max:
                 macro_news.append(f"[MACRO] {news}")
             
-            if is_coin:
+            if i in coin_idx:
                 coin_news.append(news)
-            elif is_btc_rel and len(btc_news) < btc_max:
+            elif i in btc_idx and len(btc_news) < btc_max:
                 btc_news.append(f"[BTC-CORR] {news}")
         
         # Warning jika berita koin spesifik kurang dari minimum
@@ -264,7 +436,8 @@ class SentimentAnalyzer:
             btc_to_add = btc_news[:min(remaining_slots, btc_max)]
             result.extend(btc_to_add)
         
-        return result
+        self._relevance_cache[symbol] = result
+        return list(result)
 
     def get_latest(self, symbol: Optional[str] = None) -> dict:
         """
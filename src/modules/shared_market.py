@@ -0,0 +1,250 @@
+"""
+Market data lewat shared memory (mode multi-proses).
+
+- MarketDataPublisher (proses ingestion / feed service): MarketDataManager biasa yang setiap update candle /
+  ticker / fitur order book / slow data juga ditulis ke segmen shared memory per symbol. Client memanggil
+  RPC `subscribe(symbols)`: symbol baru di-preload & di-stream sekali, segmennya dibuat saat itu juga.
+- SharedMarketData (proses decision / bot yang memakai feed service): interface sama dengan
+  MarketDataManager, tapi datanya dibaca dari shared memory (lazy, hanya saat symbol diminta & seq berubah).
+  Kalkulasi indikator tetap lokal.
+"""
+import asyncio
+import time
+from collections import deque
+
+import config
+from src.utils.helper import logger
+from src.utils.ipc import ipc_address
+from src.utils.shm_ring import SharedCandleRing, SharedSlots, SharedBlob
+from src.modules.market_data import MarketDataManager
+
+
+def _timeframe_limits():
+    """{timeframe: jumlah candle} sesuai market_store."""
+    return {
+        config.TIMEFRAME_EXEC: config.LIMIT_EXEC,
+        config.TIMEFRAME_TREND: config.LIMIT_TREND,
+        config.TIMEFRAME_SETUP: config.LIMIT_SETUP,
+    }
+
+
+def feed_address():
+    """Endpoint IPC sumber market data: feed service bersama (MARKET_FEED_SERVICE) atau proses ingestion bot ini."""
+    if getattr(config, 'MARKET_FEED_SERVICE', False):
+        return ipc_address('feed', prefix=getattr(config, 'FEED_SERVICE_PREFIX', 'ezfeed'))
+    return ipc_address('ingestion')
+
+
+async def subscribe_feeds(client, symbols):
+    """
+    Minta publisher menyediakan `symbols` (preload + stream jika belum ada), lalu attach segmennya
+    (+ BTC yang selalu tersedia sebagai helper trend/korelasi). Return {symbol: SharedSymbolFeed}.
+    """
+    info = await client.call('subscribe', list(symbols), timeout=getattr(config, 'MP_READY_TIMEOUT', 300))
+    served = info['timeframes']
+    for tf, limit in _timeframe_limits().items():
+        if tf not in served:
+            raise RuntimeError(f"Feed market data tidak menyediakan timeframe {tf} (tersedia: {', '.join(served)})")
+        if served[tf] < limit:
+            logger.warning(f"⚠️ Feed {tf} hanya {served[tf]} candle (LIMIT bot ini {limit})")
+    return {
+        sym: SharedSymbolFeed(sym, prefix=info['prefix'], timeframes=served)
+        for sym in dict.fromkeys([*symbols, config.BTC_SYMBOL]) if sym in info['symbols']
+    }
+
+
+class SharedSymbolFeed:
+    """
+    Kumpulan segmen shared memory untuk satu symbol:
+    - rings[tf]: candle OHLCV per timeframe
+    - ticker: [price, ts] realtime (miniTicker)
+    - meta: JSON {funding_rate, open_interest, lsr, order_book, trade_flow, btc_trend}
+    """
+
+    def __init__(self, symbol, create=False, prefix=None, timeframes=None):
+        self.symbol = symbol
+        prefix = prefix or getattr(config, 'MP_SHM_PREFIX', 'ezbot')
+        base = f"{prefix}_{symbol.replace('/', '').lower()}"
+        self.rings = {
+            tf: SharedCandleRing(f"{base}_{tf}", capacity=limit, create=create)
+            for tf, limit in (timeframes or _timeframe_limits()).items()
+        }
+        self.ticker = SharedSlots(f"{base}_tick", n_slots=1, n_fields=2, create=create)
+        self.meta = SharedBlob(f"{base}_meta", capacity=getattr(config, 'MP_META_MAX_BYTES', 64 * 1024), create=create)
+
+    def write_ticker(self, price):
+        self.ticker.write(0, (price, time.time()))
+
+    def read_ticker(self):
+        """Return (price, ts). ts 0.0 = belum ada update."""
+        return self.ticker.read(0)
+
+    def close(self):
+        for seg in (*self.rings.values(), self.ticker, self.meta):
+            seg.close()
+
+
+class MarketDataPublisher(MarketDataManager):
+    """MarketDataManager (pemilik WebSocket & REST) yang mempublikasikan datanya ke shared memory."""
+
+    def __init__(self, exchange, server=None, symbols=None, prefix=None):
+        super().__init__(exchange, symbols)
+        self.server = server  # IpcServer: RPC subscribe & event whale ke proses lain
+        self.prefix = prefix or getattr(config, 'MP_SHM_PREFIX', 'ezbot')
+        self.feeds = {}       # Segmen dibuat saat symbol di-preload (initialize_data / add_symbols)
+        self.ready = asyncio.Event()
+        if server:
+            server.register('subscribe', self.subscribe)
+
+    async def initialize_data(self, symbols=None):
+        await super().initialize_data(symbols)
+        for sym in (self.market_store if symbols is None else symbols):
+            feed = self.feeds.get(sym)
+            if feed is None:
+                feed = self.feeds[sym] = SharedSymbolFeed(sym, create=True, prefix=self.prefix)
+            for tf, ring in feed.rings.items():
+                ring.replace(self.market_store[sym].get(tf, []))
+        self.publish_meta()
+        if not self.ready.is_set():
+            self.ready.set()
+            logger.info(f"🧩 Shared Market Data siap ({len(self.feeds)} symbols)")
+
+    async def subscribe(self, symbols=None):
+        """
+        RPC client: pastikan `symbols` tersedia di shared memory (symbol yang sudah ada tidak di-fetch ulang,
+        jadi beban REST/WS sebanding jumlah symbol unik, bukan jumlah bot). Return info untuk attach.
+        """
+        await self.ready.wait()
+        if symbols:
+            await self.add_symbols(symbols)
+        return {'prefix': self.prefix, 'symbols': sorted(self.feeds), 'timeframes': _timeframe_limits()}
+
+    async def _apply_kline(self, data):
+        await super()._apply_kline(data)
+        sym = data['s'].replace('USDT', '/USDT')
+        feed = self.feeds.get(sym)
+        ring = feed.rings.get(data['k']['i']) if feed else None
+        if ring is not None:
+            ring.upsert(self.market_store[sym][data['k']['i']][-1])
+
+    async def publish_ticker(self, symbol, price):
+        """Callback miniTicker (pengganti callback trailing di proses ingestion)."""
+        feed = self.feeds.get(symbol)
+        if feed:
+            feed.write_ticker(price)
+
+    def publish_whale(self, symbol, amount, side, price=0.0):
+        if self.server:
+            self.server.publish('whale', [symbol, amount, side, price])
+
+    def _meta_for(self, symbol):
+        ob = self.ob_cache.get(symbol)
+        meta = {
+            'funding_rate': self.funding_rates.get(symbol, 0),
+            'open_interest': self.open_interest.get(symbol, 0.0),
+            'lsr': self.lsr_data.get(symbol),
+            'order_book': ob['data'] if ob else None,
+            'order_book_ts': ob['ts'] if ob else 0,
+            'trade_flow': self.get_trade_flow(symbol),
+        }
+        if symbol == config.BTC_SYMBOL:
+            meta['btc_trend'] = self.btc_trend
+        return meta
+
+    def publish_meta(self):
+        for sym, feed in list(self.feeds.items()):
+            if not feed.meta.write(self._meta_for(sym)):
+                logger.warning(f"⚠️ Meta {sym} melebihi MP_META_MAX_BYTES, tidak dipublikasikan.")
+
+    async def publish_meta_loop(self):
+        """Data non-candle (fitur order book, trade flow, funding/OI) dipublikasikan periodik."""
+        interval = getattr(config, 'MP_META_INTERVAL', 0.5)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.publish_meta()
+            except Exception as e:
+                logger.error(f"Shared Meta Publish Error: {e}")
+
+    def close(self):
+        for feed in self.feeds.values():
+            feed.close()
+
+
+class SharedMarketData(MarketDataManager):
+    """
+    Reader MarketDataManager untuk proses decision: tidak membuka WebSocket / REST market data.
+    market_store, funding/OI/LSR, fitur order book & trade flow disinkronkan dari shared memory
+    saat symbol dibaca (get_technical_data / get_btc_correlation / get_order_book_depth).
+    """
+
+    def __init__(self, feed_client=None):
+        super().__init__(exchange=None)
+        self.feed_client = feed_client  # IpcClient ke proses ingestion / feed service
+        self.feeds = {}
+        self._seen_seq = {}       # {(symbol, part): seq terakhir yang sudah disalin}
+        self._flow_cache = {}     # {symbol: ringkasan trade flow}
+
+    async def initialize_data(self, symbols=None):
+        """Subscribe symbol bot ini ke publisher (tunggu preload selesai), lalu attach segmen & salin data awal."""
+        self.feeds.update(await subscribe_feeds(self.feed_client, symbols or self.symbols))
+        for sym in self.feeds:
+            self._sync(sym)
+        missing = [sym for sym in self.market_store if sym not in self.feeds]
+        if missing:
+            logger.warning(f"⚠️ Symbol tidak tersedia di feed: {', '.join(missing)}")
+        logger.info(f"🧩 Attached Shared Market Data ({len(self.feeds)} symbols)")
+
+    async def start_stream(self, *args, **kwargs):
+        raise RuntimeError("SharedMarketData tidak membuka WebSocket (dimiliki proses ingestion)")
+
+    def refresh(self, symbol):
+        self._sync(symbol)
+
+    def _sync(self, symbol):
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            return
+        store = self.market_store[symbol]
+        for tf, ring in feed.rings.items():
+            if self._seen_seq.get((symbol, tf)) == ring.seq:
+                continue
+            seq, bars = ring.snapshot()
+            store[tf] = deque(bars, maxlen=ring.capacity)
+            self._seen_seq[(symbol, tf)] = seq
+
+        if self._seen_seq.get((symbol, 'meta')) != feed.meta.seq:
+            seq, meta = feed.meta.read()
+            self._seen_seq[(symbol, 'meta')] = seq
+            if meta:
+                self.funding_rates[symbol] = meta.get('funding_rate', 0)
+                self.open_interest[symbol] = meta.get('open_interest', 0.0)
+                self.lsr_data[symbol] = meta.get('lsr')
+                self._flow_cache[symbol] = meta.get('trade_flow')
+                if meta.get('order_book'):
+                    self.ob_cache[symbol] = {'ts': meta.get('order_book_ts', 0), 'data': meta['order_book']}
+                if 'btc_trend' in meta:
+                    self.btc_trend = meta['btc_trend']
+
+    async def get_technical_data(self, symbol):
+        self._sync(config.BTC_SYMBOL)
+        self._sync(symbol)
+        return await super().get_technical_data(symbol)
+
+    async def get_btc_correlation(self, symbol, period=config.CORRELATION_PERIOD):
+        self._sync(config.BTC_SYMBOL)
+        self._sync(symbol)
+        return await super().get_btc_correlation(symbol, period)
+
+    async def get_order_book_depth(self, symbol, limit=20):
+        """Fitur order book dari proses ingestion (tanpa fallback REST di proses decision)."""
+        self._sync(symbol)
+        cached = self.ob_cache.get(symbol)
+        return dict(cached['data']) if cached else None
+
+    def get_trade_flow(self, symbol):
+        return self._flow_cache.get(symbol)
+
+    def close(self):
+        for feed in self.feeds.values():
+            feed.close()
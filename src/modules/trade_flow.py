@@ -0,0 +1,126 @@
+import math
+import numpy as np
+
+
+class TradeFlowAggregator:
+    """
+    Agregator order flow per-symbol dari stream aggTrade.
+    Setiap trade dilipat ke bucket waktu tetap (misal 60 detik) yang disimpan di NumPy ring buffer:
+    buy volume, sell volume, jumlah trade, trade terbesar, dan CVD (Cumulative Volume Delta) akhir bucket.
+
+    Bucket yang sedang berjalan diakumulasi di scalar Python (tanpa alokasi per trade),
+    lalu ditulis ke ring buffer saat bucket berganti atau saat summary diminta.
+    """
+
+    def __init__(self, bucket_seconds=60, n_buckets=60):
+        self.bucket_ms = int(bucket_seconds * 1000)
+        self.n_buckets = int(n_buckets)
+
+        self.bucket_ts = np.zeros(self.n_buckets, dtype=np.int64)  # Start bucket (ms)
+        self.buy_vol = np.zeros(self.n_buckets, dtype=np.float64)  # USDT (aggressor BUY)
+        self.sell_vol = np.zeros(self.n_buckets, dtype=np.float64) # USDT (aggressor SELL)
+        self.trades = np.zeros(self.n_buckets, dtype=np.int64)
+        self.max_trade = np.zeros(self.n_buckets, dtype=np.float64)
+        self.cvd = np.zeros(self.n_buckets, dtype=np.float64)      # CVD di akhir bucket
+
+        self._head = -1        # Index ring untuk bucket yang sedang berjalan
+        self._cur_id = None    # ID bucket berjalan (ts_ms // bucket_ms)
+
+        # Akumulator bucket berjalan
+        self._buy = 0.0
+        self._sell = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._cvd = 0.0        # Running CVD sejak start
+        self.last_trade_ts = 0
+
+    def add_trade(self, ts_ms, price, qty, is_sell):
+        """Lipat satu aggTrade ke bucket berjalan."""
+        bucket_id = ts_ms // self.bucket_ms
+        if self._cur_id is None or bucket_id > self._cur_id:
+            self._roll(bucket_id)
+        # Trade telat (bucket_id < _cur_id) tetap masuk bucket berjalan
+
+        notional = price * qty
+        if is_sell:
+            self._sell += notional
+            self._cvd -= notional
+        else:
+            self._buy += notional
+            self._cvd += notional
+        self._count += 1
+        if notional > self._max:
+            self._max = notional
+        self.last_trade_ts = ts_ms
+
+    def _write_head(self):
+        """Tulis akumulator bucket berjalan ke ring buffer."""
+        if self._head < 0:
+            return
+        h = self._head
+        self.buy_vol[h] = self._buy
+        self.sell_vol[h] = self._sell
+        self.trades[h] = self._count
+        self.max_trade[h] = self._max
+        self.cvd[h] = self._cvd
+
+    def _advance(self, bucket_id):
+        """Geser head ke slot berikutnya dan kosongkan slot untuk bucket_id."""
+        self._head = (self._head + 1) % self.n_buckets
+        h = self._head
+        self.bucket_ts[h] = bucket_id * self.bucket_ms
+        self.buy_vol[h] = 0.0
+        self.sell_vol[h] = 0.0
+        self.trades[h] = 0
+        self.max_trade[h] = 0.0
+        self.cvd[h] = self._cvd
+
+    def _roll(self, bucket_id):
+        """Tutup bucket berjalan, isi bucket kosong (gap tanpa trade), buka bucket baru."""
+        if self._cur_id is not None:
+            self._write_head()
+            # Bucket tanpa trade di antaranya (maksimal sepanjang ring)
+            gap_start = max(self._cur_id + 1, bucket_id - self.n_buckets + 1)
+            for gap_id in range(gap_start, bucket_id):
+                self._advance(gap_id)
+
+        self._advance(bucket_id)
+        self._cur_id = bucket_id
+        self._buy = 0.0
+        self._sell = 0.0
+        self._count = 0
+        self._max = 0.0
+
+    def get_summary(self, window_minutes, now_ms):
+        """
+        Ringkasan order flow untuk beberapa window waktu (menit), vectorized di atas ring buffer.
+        Return: {'windows': [...], 'cvd_usdt': float, 'last_trade_ts': int} atau None jika belum ada data.
+        """
+        if self._cur_id is None:
+            return None
+        self._write_head()
+
+        now_id = now_ms // self.bucket_ms
+        windows = []
+        for minutes in window_minutes:
+            n = max(1, math.ceil(minutes * 60000 / self.bucket_ms))
+            mask = self.bucket_ts >= (now_id - n + 1) * self.bucket_ms
+
+            buy = float(self.buy_vol[mask].sum())
+            sell = float(self.sell_vol[mask].sum())
+            total = buy + sell
+            windows.append({
+                "minutes": minutes,
+                "buy_vol_usdt": buy,
+                "sell_vol_usdt": sell,
+                "delta_usdt": buy - sell,
+                "buy_ratio": (buy / total) if total > 0 else 0.5,
+                "trades": int(self.trades[mask].sum()),
+                "max_trade_usdt": float(self.max_trade[mask].max()) if mask.any() else 0.0
+            })
+
+        return {
+            "windows": windows,
+            "cvd_usdt": self._cvd,
+            "last_trade_ts": self.last_trade_ts
+        }
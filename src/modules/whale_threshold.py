@@ -0,0 +1,85 @@
+import time
+
+import config
+from src.utils.sketch import QuantileSketch
+from src.utils.metrics import WHALE_THRESHOLD
+
+
+class WhaleThreshold:
+    """
+    Threshold whale adaptif per symbol dari stream aggTrade.
+
+    Notional setiap trade masuk ke QuantileSketch milik symbol (memori tetap per symbol). Trade ditandai
+    whale jika >= persentil WHALE_QUANTILE (override per koin: 'whale_quantile' di DAFTAR_KOIN) dari
+    distribusi trade symbol itu sendiri, dengan lantai WHALE_MIN_USDT. Threshold di-cache dan dihitung
+    ulang tiap WHALE_SKETCH_REFRESH_TRADES trade; bobot lama di-decay (half-life WHALE_SKETCH_HALFLIFE)
+    agar mengikuti rezim volume terbaru. Sebelum sketch cukup sampel: fallback WHALE_THRESHOLD_USDT.
+    """
+
+    def __init__(self):
+        self.mode = getattr(config, 'WHALE_THRESHOLD_MODE', 'quantile')
+        self.sketches = {}        # {symbol: QuantileSketch}
+        self.thresholds = {}      # {symbol: usdt} (hanya setelah sketch cukup sampel)
+        self._pending = {}        # {symbol: jumlah trade sejak refresh terakhir}
+        self._last_decay = {}     # {symbol: epoch detik}
+        default_q = getattr(config, 'WHALE_QUANTILE', 0.999)
+        self._quantiles = {coin['symbol']: coin.get('whale_quantile', default_q) for coin in config.DAFTAR_KOIN}
+        self._default_quantile = default_q
+
+    def _new_sketch(self):
+        return QuantileSketch(alpha=getattr(config, 'WHALE_SKETCH_ALPHA', 0.02))
+
+    def quantile_for(self, symbol):
+        return self._quantiles.get(symbol, self._default_quantile)
+
+    def observe(self, symbol, amount_usdt):
+        """Catat satu trade (hot path aggTrade). Return True jika trade ini whale."""
+        if self.mode != 'quantile':
+            return amount_usdt >= config.WHALE_THRESHOLD_USDT
+
+        sketch = self.sketches.get(symbol)
+        if sketch is None:
+            sketch = self.sketches[symbol] = self._new_sketch()
+            self._last_decay[symbol] = time.time()
+        sketch.add(amount_usdt)
+
+        pending = self._pending.get(symbol, 0) + 1
+        if pending >= getattr(config, 'WHALE_SKETCH_REFRESH_TRADES', 200):
+            self._refresh(symbol, sketch)
+            pending = 0
+        self._pending[symbol] = pending
+
+        return amount_usdt >= self.thresholds.get(symbol, config.WHALE_THRESHOLD_USDT)
+
+    def _refresh(self, symbol, sketch):
+        """Decay bobot sesuai waktu berlalu, lalu hitung ulang threshold dari quantile sketch."""
+        now = time.time()
+        halflife = getattr(config, 'WHALE_SKETCH_HALFLIFE', 24 * 3600)
+        elapsed = now - self._last_decay.get(symbol, now)
+        if halflife > 0 and elapsed > 0:
+            sketch.decay(0.5 ** (elapsed / halflife))
+        self._last_decay[symbol] = now
+
+        if sketch.total < getattr(config, 'WHALE_SKETCH_MIN_COUNT', 1000):
+            return
+        value = sketch.quantile(self.quantile_for(symbol))
+        threshold = max(getattr(config, 'WHALE_MIN_USDT', 50000), value)
+        self.thresholds[symbol] = threshold
+        WHALE_THRESHOLD.set(threshold, symbol=symbol)
+
+    # --- [NEW] WARM STATE CHECKPOINT ---
+    def export_state(self):
+        return {'sketches': {sym: sketch.to_dict() for sym, sketch in self.sketches.items()}}
+
+    def restore_state(self, state, age):
+        """Restore sketch (di-decay sesuai umur checkpoint), threshold langsung dihitung ulang."""
+        if self.mode != 'quantile':
+            return
+        alpha = getattr(config, 'WHALE_SKETCH_ALPHA', 0.02)
+        for sym, data in state.get('sketches', {}).items():
+            if data.get('alpha') != alpha:
+                continue  # Resolusi bucket berubah -> mulai ulang
+            sketch = QuantileSketch.from_dict(data)
+            self._last_decay[sym] = time.time() - max(0.0, age)
+            self.sketches[sym] = sketch
+            self._refresh(sym, sketch)
@@ -0,0 +1,215 @@
+"""
+Mode multi-proses (opt-in: config.MULTIPROCESS_MODE = True atau `python src/main.py --multiprocess`).
+
+  ingestion : WebSocket market (kline/aggTrade/miniTicker/depth) + preload REST + slow data
+              -> ditulis ke shared memory per symbol (src/modules/shared_market.py)
+  decision  : main trading loop (sentiment, on-chain, vision, AI) membaca shared memory
+  execution : OrderExecutor + user data stream + Safety Monitor + trailing stop
+
+Data pasar (candle, ticker, fitur order book) lewat shared memory; kontrol (RPC order, state executor,
+event whale) lewat IPC lokal (src/utils/ipc.py). Tiap proses punya GIL & event loop sendiri.
+Jika MARKET_FEED_SERVICE=True, proses ingestion tidak dijalankan: decision & execution memakai
+feed service bersama (src/feed_service.py).
+"""
+import asyncio
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+
+import config
+import src.main as bot
+from src.utils.helper import logger, setup_logger, role_filename, kirim_tele, kirim_tele_sync, run_with_telegram
+from src.utils.ipc import IpcServer, IpcClient, ipc_address
+from src.utils.metrics import start_metrics_server
+from src.utils.loop_watchdog import LoopWatchdog
+from src.modules.market_data import MarketDataManager
+from src.modules.shared_market import MarketDataPublisher, SharedMarketData, feed_address, subscribe_feeds
+from src.modules.executor_client import ExecutorClient, serve_executor
+from src.modules.executor import OrderExecutor
+from src.modules.sentiment import SentimentAnalyzer
+from src.modules.onchain import OnChainAnalyzer
+from src.modules.ai_brain import AIBrain
+from src.modules.pattern_recognizer import PatternRecognizer
+
+# Urutan start: ingestion & execution dulu (server IPC), decision terakhir (client keduanya)
+ROLES = ('ingestion', 'execution', 'decision')
+_METRICS_PORT_OFFSET = {'decision': 0, 'ingestion': 1, 'execution': 2, 'feed': 3}
+
+_checkpoint = None  # StateCheckpoint milik proses ini (disimpan saat shutdown)
+
+
+async def _start_observability(role):
+    await start_metrics_server(getattr(config, 'METRICS_PORT', 9108) + _METRICS_PORT_OFFSET[role])
+    if getattr(config, 'LOOP_WATCHDOG_ENABLED', False):
+        LoopWatchdog().start()
+
+
+# --- INGESTION ---
+async def run_ingestion(address=None, symbols=None, prefix=None, role='ingestion'):
+    """
+    Pemilik WebSocket & REST market data -> shared memory. Dipakai proses ingestion (symbol DAFTAR_KOIN)
+    maupun feed service standalone (symbol ditambah saat client subscribe).
+    """
+    server = IpcServer(address or ipc_address('ingestion'))
+    market_data = MarketDataPublisher(bot.build_exchange(), server, symbols=symbols, prefix=prefix)
+    # Warm state proses ini: sketch threshold whale (aggTrade diproses di sini)
+    checkpoint = bot.setup_state_checkpoint(
+        {'market_data': market_data},
+        filename=role_filename(getattr(config, 'CHECKPOINT_FILENAME', 'state_checkpoint.json.gz'), role)
+    )
+    await server.start()
+    await _start_observability(role)
+    try:
+        await market_data.initialize_data()
+        asyncio.create_task(market_data.publish_meta_loop())
+        if checkpoint:
+            checkpoint.start_periodic()
+        await bot.safe_task_wrapper(
+            lambda: market_data.start_stream(
+                callback_whale=market_data.publish_whale,
+                callback_trailing=market_data.publish_ticker,
+                include_user=False
+            ),
+            "WebSocket Stream"
+        )
+    finally:
+        if checkpoint:
+            checkpoint.save()
+        market_data.close()
+        await server.close()
+
+
+# --- EXECUTION ---
+async def run_execution():
+    global _checkpoint
+    exchange = bot.build_exchange()
+    bot.executor = OrderExecutor(exchange)
+    _checkpoint = bot.setup_state_checkpoint(
+        {'executor': bot.executor},
+        filename=role_filename(getattr(config, 'CHECKPOINT_FILENAME', 'state_checkpoint.json.gz'), 'execution')
+    )
+    await bot.executor.seed_account_state() # Cache Leverage/Margin & Saldo
+
+    server = IpcServer(ipc_address('execution'))
+    publish_state = serve_executor(server, bot.executor)
+    await server.start()
+    await _start_observability('execution')
+
+    user_stream = MarketDataManager(exchange, symbols=[])
+    asyncio.create_task(bot.safe_task_wrapper(
+        lambda: user_stream.start_stream(bot.account_update_cb, bot.order_update_cb, include_market=False),
+        "User Data Stream"
+    ))
+    asyncio.create_task(bot.safe_task_wrapper(bot.safety_monitor_loop, "Safety Monitor"))
+    asyncio.create_task(publish_state)
+    if _checkpoint:
+        _checkpoint.start_periodic()
+
+    try:
+        feed_client = IpcClient(feed_address())
+        await feed_client.connect()
+        feeds = await subscribe_feeds(feed_client, [coin['symbol'] for coin in config.DAFTAR_KOIN])
+        if config.ENABLE_TRAILING_STOP:
+            await bot.trailing_from_shared(feeds)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+# --- DECISION ---
+async def run_decision():
+    global _checkpoint
+    analyzed_candle_ts = {}
+
+    feed_client = IpcClient(feed_address())
+    exec_client = IpcClient(ipc_address('execution'))
+    await feed_client.connect()
+    await exec_client.connect()
+
+    await kirim_tele("🤖 <b>BOT TRADING STARTED</b>\nAI-Hybrid System Online (Multi-Process).", alert=True)
+
+    bot.market_data = SharedMarketData(feed_client)
+    bot.sentiment = SentimentAnalyzer()
+    bot.onchain = OnChainAnalyzer()
+    bot.ai_brain = AIBrain()
+    bot.executor = ExecutorClient(exec_client)
+    bot.pattern_recognizer = PatternRecognizer(bot.market_data)
+    feed_client.on('whale', lambda event: bot.whale_handler(*event))
+
+    await _start_observability('decision')
+    _checkpoint = bot.setup_state_checkpoint({
+        'market_data': bot.market_data,
+        'pattern': bot.pattern_recognizer,
+        'sentiment': bot.sentiment,
+        'onchain': bot.onchain,
+    }, analyzed_candle_ts)
+
+    await bot.market_data.initialize_data()
+    await bot.executor.start()
+    await bot.sentiment.update_all() # Initial Fetch Headline & F&G
+    if _checkpoint:
+        _checkpoint.start_periodic()
+
+    await bot.trading_loop(analyzed_candle_ts)
+
+
+_RUNNERS = {'ingestion': run_ingestion, 'execution': run_execution, 'decision': run_decision}
+
+
+def _role_entry(role):
+    """Entry point proses anak."""
+    setup_logger(role)
+    try:
+        asyncio.run(run_with_telegram(_RUNNERS[role]()))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.error(f"💀 Proses {role} crash: {e}")
+        raise
+    finally:
+        if _checkpoint:
+            _checkpoint.save()
+
+
+def _stop(procs, send_interrupt=True, timeout=15):
+    """
+    Minta semua proses berhenti dengan sopan (SIGINT -> checkpoint tersimpan), lalu paksa jika perlu.
+    Saat Ctrl+C, SIGINT sudah diterima semua proses di process group -> cukup tunggu (send_interrupt=False).
+    """
+    for p in procs:
+        if send_interrupt and p.is_alive():
+            if os.name != 'nt':
+                os.kill(p.pid, signal.SIGINT)
+            else:
+                p.terminate()
+    for p in procs:
+        p.join(timeout)
+        if p.is_alive():
+            logger.warning(f"⚠️ Proses {p.name} tidak berhenti, terminate paksa.")
+            p.terminate()
+            p.join(5)
+
+
+def run_multiprocess():
+    """Jalankan 3 proses & awasi: jika satu berhenti, semua dihentikan (bot tidak jalan setengah)."""
+    ctx = multiprocessing.get_context('spawn')
+    procs = []
+    roles = [r for r in ROLES if not (r == 'ingestion' and getattr(config, 'MARKET_FEED_SERVICE', False))]
+    for role in roles:
+        p = ctx.Process(target=_role_entry, args=(role,), name=f"bot-{role}")
+        p.start()
+        procs.append(p)
+    logger.info(f"🧬 Multi-Process Mode: {', '.join(f'{p.name} (pid {p.pid})' for p in procs)}")
+
+    try:
+        multiprocessing.connection.wait([p.sentinel for p in procs])
+        dead = [f"{p.name} (exit {p.exitcode})" for p in procs if not p.is_alive()]
+        logger.error(f"💀 Proses berhenti: {', '.join(dead)}. Menghentikan proses lain...")
+        _stop(procs)
+        kirim_tele_sync(f"💀 Bot Crash: proses {', '.join(dead)} berhenti")
+    except KeyboardInterrupt:
+        print("👋 Bot Stopped Manually.")
+        _stop(procs, send_interrupt=False)
+        kirim_tele_sync("🛑 Bot Stopped Manually")
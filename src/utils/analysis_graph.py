@@ -0,0 +1,75 @@
+"""
+DAG langkah analisa per symbol.
+
+Setiap step mendeklarasikan dependency-nya; step yang tidak saling bergantung dijalankan bersamaan
+(asyncio task), sehingga latency per symbol = cabang terpanjang, bukan jumlah semua step.
+Hasil step (memo=True) disimpan per (symbol, candle): symbol yang di-skip lalu diputar ulang
+round robin di candle yang sama tidak menghitung ulang step tersebut.
+"""
+import asyncio
+import inspect
+import time
+
+from src.utils.metrics import ANALYSIS_STEP, ANALYSIS_MEMO
+
+
+class AnalysisGraph:
+    def __init__(self):
+        self._steps = {}  # {name: (fn, deps, memo)}
+        self._memo = {}   # {symbol: (candle_ts, {name: result})} -> hanya candle terakhir per symbol
+
+    def step(self, name, fn, deps=(), memo=True):
+        """
+        Daftarkan step. fn(symbol, **hasil_deps) -> value atau awaitable.
+        deps = nama step lain atau nama input run(). memo=False untuk data live (misal order book).
+        """
+        self._steps[name] = (fn, tuple(deps), memo)
+        return self
+
+    async def run(self, symbol, candle_ts, targets, **inputs):
+        """
+        Jalankan targets (+ dependency-nya) untuk symbol pada candle_ts. inputs = nilai yang sudah ada
+        (misal tech_data). Return {name: result}. Exception di step mana pun -> step lain di-cancel, lalu di-raise.
+        """
+        memo_ts, memo = self._memo.get(symbol, (None, None))
+        if memo_ts != candle_ts:
+            memo = {}
+            self._memo[symbol] = (candle_ts, memo)
+
+        tasks = {}
+
+        def schedule(name):
+            task = tasks.get(name)
+            if task is None:
+                task = tasks[name] = asyncio.create_task(self._run_step(symbol, name, memo, inputs, schedule))
+            return task
+
+        try:
+            results = await asyncio.gather(*(schedule(name) for name in targets))
+            return dict(zip(targets, results))
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Tandai sudah diambil (hindari warning "never retrieved")
+
+    async def _run_step(self, symbol, name, memo, inputs, schedule):
+        if name in memo:
+            ANALYSIS_MEMO.inc(step=name)
+            return memo[name]
+
+        fn, deps, keep = self._steps[name]
+        kwargs = {dep: inputs[dep] for dep in deps if dep in inputs}
+        pending = [dep for dep in deps if dep not in inputs]
+        if pending:
+            kwargs.update(zip(pending, await asyncio.gather(*(schedule(dep) for dep in pending))))
+
+        start = time.perf_counter()
+        result = fn(symbol, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        ANALYSIS_STEP.observe(time.perf_counter() - start, step=name)
+        if keep:
+            memo[name] = result
+        return result
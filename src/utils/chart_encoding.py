@@ -0,0 +1,60 @@
+"""
+Encoding chart untuk Vision AI.
+
+Chart dirender langsung seukuran tile "detail: low" model vision (CHART_IMAGE_MAX_SIDE, lihat
+chart_render_dpi di pattern_recognizer; resize di sini hanya jaring pengaman), lalu PNG mplfinance
+di-encode ulang dalam format yang lebih ringkas:
+- png         : PNG truecolor (optimize)
+- png_palette : PNG palette (CHART_IMAGE_COLORS warna) -> chart warna flat, ukuran turun drastis
+- webp / jpeg : lossy dengan CHART_IMAGE_QUALITY
+Ukuran (bytes) & durasi tiap encode dicatat ke metrics (label fmt).
+"""
+import base64
+import io
+import time
+
+import config
+from src.utils.metrics import CHART_ENCODE, CHART_IMAGE_BYTES
+
+FORMATS = ('png', 'png_palette', 'webp', 'jpeg')
+_MIME = {'png': 'image/png', 'png_palette': 'image/png', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+def encode_chart(png_bytes, fmt=None, max_side=None, quality=None, colors=None):
+    """
+    Re-encode PNG hasil render (resize jika masih lebih besar dari max_side; 0 = tanpa resize).
+    Return (bytes, mime).
+    """
+    from PIL import Image  # Dependency matplotlib, sudah ter-load saat render
+
+    fmt = fmt or getattr(config, 'CHART_IMAGE_FORMAT', 'png_palette')
+    if fmt not in FORMATS:
+        raise ValueError(f"CHART_IMAGE_FORMAT tidak dikenal: {fmt} (pilihan: {', '.join(FORMATS)})")
+    max_side = getattr(config, 'CHART_IMAGE_MAX_SIDE', 512) if max_side is None else max_side
+    quality = quality or getattr(config, 'CHART_IMAGE_QUALITY', 80)
+    colors = colors or getattr(config, 'CHART_IMAGE_COLORS', 64)
+
+    img = Image.open(io.BytesIO(png_bytes)).convert('RGB')
+    if max_side and max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    out = io.BytesIO()
+    if fmt == 'png':
+        img.save(out, format='PNG', optimize=True)
+    elif fmt == 'png_palette':
+        img.quantize(colors=colors, method=Image.Quantize.MEDIANCUT).save(out, format='PNG', optimize=True)
+    elif fmt == 'webp':
+        img.save(out, format='WEBP', quality=quality, method=4)
+    else:
+        img.save(out, format='JPEG', quality=quality, optimize=True)
+    return out.getvalue(), _MIME[fmt]
+
+
+def encode_chart_data_url(png_bytes, fmt=None):
+    """Encode chart sesuai config -> data URL base64 siap dikirim ke Vision AI (+ metrics)."""
+    fmt = fmt or getattr(config, 'CHART_IMAGE_FORMAT', 'png_palette')
+    start = time.perf_counter()
+    data, mime = encode_chart(png_bytes, fmt)
+    CHART_ENCODE.observe(time.perf_counter() - start, fmt=fmt)
+    CHART_IMAGE_BYTES.observe(len(data), fmt=fmt)
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
@@ -0,0 +1,128 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+
+import config
+from src.utils.helper import logger, json_default
+
+# Naikkan jika format state berubah (checkpoint versi lain diabaikan saat load)
+CHECKPOINT_VERSION = 1
+
+
+class StateCheckpoint:
+    """
+    Checkpoint state in-memory (cache & histori) ke file lokal terkompresi (gzip JSON),
+    supaya restart bot tidak mulai dari nol (cache teknikal, hasil vision, headline, whale, cooldown).
+
+    Tiap komponen didaftarkan dengan pasangan (export_fn, restore_fn):
+    - export_fn() -> dict JSON-able (dipanggil di thread event loop agar snapshot konsisten)
+    - restore_fn(state, age_seconds) -> komponen sendiri yang memutuskan data mana yang masih valid
+
+    File ditulis atomik (tmp + os.replace). Saat load: versi beda / file terlalu tua / rusak -> diabaikan.
+    """
+
+    def __init__(self, filename=None, max_age=None):
+        self.filename = filename or getattr(config, 'CHECKPOINT_FILENAME', 'state_checkpoint.json.gz')
+        self.max_age = max_age if max_age is not None else getattr(config, 'CHECKPOINT_MAX_AGE', 6 * 3600)
+        self._components = {}  # {name: (export_fn, restore_fn)}
+        self._task = None
+
+    def register(self, name, export_fn, restore_fn):
+        self._components[name] = (export_fn, restore_fn)
+
+    # --- SAVE ---
+    def _snapshot(self):
+        sections = {}
+        for name, (export_fn, _) in self._components.items():
+            try:
+                sections[name] = export_fn()
+            except Exception as e:
+                logger.warning(f"⚠️ Checkpoint export '{name}' gagal: {e}")
+        return {'version': CHECKPOINT_VERSION, 'saved_at': time.time(), 'sections': sections}
+
+    def _write(self, payload):
+        raw = json.dumps(payload, default=json_default, separators=(',', ':')).encode('utf-8')
+        tmp = f"{self.filename}.tmp"
+        with gzip.open(tmp, 'wb', compresslevel=6) as f:
+            f.write(raw)
+        os.replace(tmp, self.filename)
+        return len(raw)
+
+    def save(self):
+        """Simpan sinkron (dipakai saat shutdown). Return True jika berhasil."""
+        try:
+            size = self._write(self._snapshot())
+            logger.debug(f"💾 Checkpoint saved ({size / 1024:.1f} KB raw) -> {self.filename}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Checkpoint save gagal: {e}")
+            return False
+
+    async def save_async(self):
+        """Snapshot di thread loop (konsisten), serialize + tulis file di thread pool."""
+        payload = self._snapshot()
+        try:
+            size = await asyncio.to_thread(self._write, payload)
+            logger.debug(f"💾 Checkpoint saved ({size / 1024:.1f} KB raw) -> {self.filename}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Checkpoint save gagal: {e}")
+            return False
+
+    async def _run_periodic(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self.save_async()
+
+    def start_periodic(self, interval=None):
+        """Jalankan checkpoint berkala di background (harus dipanggil dari dalam event loop)."""
+        interval = interval or getattr(config, 'CHECKPOINT_INTERVAL', 300)
+        self._task = asyncio.create_task(self._run_periodic(interval))
+        return self._task
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    # --- LOAD ---
+    def load(self):
+        """
+        Baca checkpoint & panggil restore_fn tiap komponen.
+        Return umur checkpoint (detik) jika berhasil, None jika tidak ada / tidak valid.
+        """
+        if not os.path.exists(self.filename):
+            return None
+        try:
+            with gzip.open(self.filename, 'rb') as f:
+                payload = json.loads(f.read().decode('utf-8'))
+        except Exception as e:
+            logger.warning(f"⚠️ Checkpoint rusak, diabaikan: {e}")
+            return None
+
+        version = payload.get('version')
+        if version != CHECKPOINT_VERSION:
+            logger.warning(f"⚠️ Checkpoint versi {version} != {CHECKPOINT_VERSION}, diabaikan.")
+            return None
+
+        age = time.time() - float(payload.get('saved_at', 0))
+        if age < 0 or age > self.max_age:
+            logger.info(f"⌛ Checkpoint terlalu tua ({age / 60:.0f} menit), mulai dari state kosong.")
+            return None
+
+        sections = payload.get('sections', {})
+        restored = []
+        for name, (_, restore_fn) in self._components.items():
+            state = sections.get(name)
+            if state is None:
+                continue
+            try:
+                restore_fn(state, age)
+                restored.append(name)
+            except Exception as e:
+                logger.warning(f"⚠️ Checkpoint restore '{name}' gagal: {e}")
+
+        logger.info(f"♻️ Warm state restored ({age:.0f}s old): {', '.join(restored) or '-'}")
+        return age
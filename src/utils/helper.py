@@ -1,9 +1,20 @@
 
 import logging
+import logging.handlers
+import atexit
+import glob
+import gzip
+import queue
+import random
+import shutil
 import sys
 import os
+import json
+import time
 import requests
 import asyncio
+import aiohttp
+from collections import deque
 from datetime import datetime, timedelta, timezone
 import config
 
@@ -15,7 +26,132 @@ def wib_time(*args):
     wib_dt = utc_dt + timedelta(hours=7)
     return wib_dt.timetuple()
 
-def setup_logger():
+class WibJsonFormatter(logging.Formatter):
+    """Format log sebagai 1 JSON per baris (mudah di-parse / di-ingest)."""
+
+    def __init__(self, role=None):
+        super().__init__()
+        self.role = role
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone(timedelta(hours=7))).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "msg": record.getMessage(),
+        }
+        if self.role:
+            entry["role"] = self.role
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SizeTimeRotatingFileHandler(logging.FileHandler):
+    """
+    File handler dengan rotasi berbasis ukuran DAN waktu (mana yang duluan).
+    File lama di-rename dengan timestamp lalu dikompres (.gz) bila LOG_COMPRESS aktif.
+    Dijalankan di thread QueueListener, jadi kompresi tidak memblokir event loop.
+    """
+
+    def __init__(self, filename, max_bytes=0, rotate_seconds=0, backup_count=7, compress=True, encoding='utf-8'):
+        super().__init__(filename, encoding=encoding)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.compress = compress
+        self.rollover_at = time.time() + rotate_seconds if rotate_seconds > 0 else None
+
+    def emit(self, record):
+        try:
+            if self._should_rollover(record):
+                self._do_rollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+    def _should_rollover(self, record) -> bool:
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def _do_rollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if self.rotate_seconds > 0:
+            self.rollover_at = time.time() + self.rotate_seconds
+
+        if not os.path.exists(self.baseFilename) or os.path.getsize(self.baseFilename) == 0:
+            return
+
+        suffix = time.strftime('%Y%m%d-%H%M%S', wib_time())
+        dest = f"{self.baseFilename}.{suffix}"
+        n = 1
+        while os.path.exists(dest) or os.path.exists(dest + '.gz'):
+            dest = f"{self.baseFilename}.{suffix}.{n}"
+            n += 1
+        os.replace(self.baseFilename, dest)
+
+        if self.compress:
+            with open(dest, 'rb') as src, gzip.open(dest + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(dest)
+
+        # Hapus file rotasi terlama
+        if self.backup_count > 0:
+            backups = sorted(glob.glob(glob.escape(self.baseFilename) + '.*'), key=os.path.getmtime)
+            for old in backups[:-self.backup_count]:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+
+class _ExcludeLoggerFilter(logging.Filter):
+    """Tolak record dari logger tertentu (payload tidak masuk log utama)."""
+
+    def __init__(self, excluded_name):
+        super().__init__()
+        self.excluded_name = excluded_name
+
+    def filter(self, record):
+        return record.name != self.excluded_name
+
+
+_log_listener = None
+
+
+def role_filename(filename, role):
+    """'bot_trading.log' + 'ingestion' -> 'bot_trading.ingestion.log' (1 file per proses)."""
+    if not role:
+        return filename
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{role}{ext}"
+
+
+def _stop_log_listener():
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+def setup_logger(role=None):
+    """
+    Logging non-blocking: semua logger menulis ke QueueHandler (hanya enqueue, O(1)),
+    sedangkan file & console ditulis oleh QueueListener di thread terpisah.
+    Payload besar (prompt/reasoning AI) diarahkan ke file arsip terpisah via logger 'payload'.
+    `role` (mode multi-proses): file log terpisah per proses + label proses di tiap baris.
+    """
+    global _log_listener
+
     # [FIX] Force UTF-8 untuk Windows Console agar emoji tidak crash
     if sys.platform.startswith('win'):
         try:
@@ -29,110 +165,389 @@ def setup_logger():
     # Reset handlers if exist (to prevent duplicates during reload)
     if logger.handlers:
         logger.handlers = []
+    _stop_log_listener()
+
+    if getattr(config, 'LOG_FORMAT', 'text') == 'json':
+        formatter = WibJsonFormatter(role)
+    else:
+        label = f"{role}:" if role else ""
+        formatter = logging.Formatter(f'%(asctime)s - %(levelname)s - [{label}%(funcName)s] - %(message)s')
+        formatter.converter = wib_time 
 
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(funcName)s] - %(message)s')
-    formatter.converter = wib_time 
+    rotate_kwargs = {
+        'max_bytes': getattr(config, 'LOG_MAX_BYTES', 0),
+        'rotate_seconds': getattr(config, 'LOG_ROTATE_HOURS', 0) * 3600,
+        'backup_count': getattr(config, 'LOG_BACKUP_COUNT', 7),
+        'compress': getattr(config, 'LOG_COMPRESS', True),
+    }
+    exclude_payload = _ExcludeLoggerFilter('payload')
 
-    # File Handler
-    file_handler = logging.FileHandler(config.LOG_FILENAME, encoding='utf-8')
+    # File Handler (rotasi ukuran + waktu)
+    file_handler = SizeTimeRotatingFileHandler(role_filename(config.LOG_FILENAME, role), **rotate_kwargs)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    file_handler.addFilter(exclude_payload)
 
     # Console Handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    console_handler.addFilter(exclude_payload)
+
+    # Payload Archive Handler (hanya record dari logger 'payload')
+    payload_handler = SizeTimeRotatingFileHandler(
+        role_filename(getattr(config, 'LOG_PAYLOAD_FILENAME', 'ai_payloads.log'), role), **rotate_kwargs
+    )
+    payload_handler.setFormatter(formatter)
+    payload_handler.addFilter(logging.Filter('payload'))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+
+    payload_logger = logging.getLogger('payload')
+    payload_logger.handlers = [queue_handler]
+    payload_logger.propagate = False
+
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, payload_handler, respect_handler_level=True
+    )
+    _log_listener.start()
     
     return logger
 
 logger = setup_logger()
+atexit.register(_stop_log_listener) # Flush sisa antrian saat proses keluar
+payload_logger = logging.getLogger('payload')
+
+
+def log_payload(title: str, text: str) -> None:
+    """
+    Log payload besar (prompt & response AI, reasoning) tanpa membanjiri log utama:
+    isi penuh masuk arsip LOG_PAYLOAD_FILENAME, log utama hanya dapat preview
+    (kecuali tersampling LOG_PAYLOAD_SAMPLE_RATE -> ditulis penuh).
+    """
+    text = str(text)
+    payload_logger.info(f"{title}\n{text}", stacklevel=2)
+
+    if random.random() < getattr(config, 'LOG_PAYLOAD_SAMPLE_RATE', 0.0):
+        logger.info(f"{title}\n{text}", stacklevel=2)
+    else:
+        preview_len = getattr(config, 'LOG_PAYLOAD_PREVIEW_CHARS', 200)
+        preview = text[:preview_len].replace('\n', ' ')
+        suffix = "..." if len(text) > preview_len else ""
+        logger.info(f"{title} ({len(text)} chars, full -> archive): {preview}{suffix}", stacklevel=2)
 
 # ==========================================
 # TELEGRAM NOTIFIER
 # ==========================================
-async def kirim_tele(pesan: str, alert: bool = False, channel: str = 'default') -> None:
+TELEGRAM_MAX_MESSAGE_LEN = 4096
+TELEGRAM_BATCH_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+
+
+def _resolve_tele_target(channel: str = 'default') -> tuple:
+    """Tentukan (bot_token, chat_id, message_thread_id) berdasarkan channel."""
+    bot_token = config.TELEGRAM_TOKEN
+    chat_id = config.TELEGRAM_CHAT_ID
+
+    if channel == 'sentiment':
+        if config.TELEGRAM_TOKEN_SENTIMENT and config.TELEGRAM_CHAT_ID_SENTIMENT:
+            bot_token = config.TELEGRAM_TOKEN_SENTIMENT
+            chat_id = config.TELEGRAM_CHAT_ID_SENTIMENT
+        else:
+            # Fallback ke default agar info tidak hilang, tapi beri log warning.
+            logger.warning("⚠️ Credentials Sentiment Telegram kosong, menggunakan default channel.")
+
+    # Message Thread ID hanya dipakai jika diset untuk channel tersebut
+    thread_id = None
+    if channel == 'default' and config.TELEGRAM_MESSAGE_THREAD_ID:
+        thread_id = config.TELEGRAM_MESSAGE_THREAD_ID
+    elif channel == 'sentiment' and config.TELEGRAM_MESSAGE_THREAD_ID_SENTIMENT:
+        thread_id = config.TELEGRAM_MESSAGE_THREAD_ID_SENTIMENT
+
+    return bot_token, chat_id, thread_id
+
+
+class _ChatLane:
+    """Antrian per chat (token + chat_id + thread) dengan rate limit sendiri."""
+
+    def __init__(self, bot_token, chat_id, thread_id):
+        maxlen = getattr(config, 'TELEGRAM_QUEUE_MAXLEN', 500)
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.thread_id = thread_id
+        self.high = deque(maxlen=maxlen)
+        self.normal = deque(maxlen=maxlen)
+        self.low = deque(maxlen=maxlen)
+        self.low_chars = 0
+        self.low_since = None     # monotonic saat pesan low pertama masuk batch
+        self.inflight = None      # Pesan yang sedang dikirim (ikut di-flush saat shutdown)
+        self.last_sent = 0.0
+        self.event = asyncio.Event()
+        self.task = None
+
+    def has_pending(self) -> bool:
+        return bool(self.high or self.normal or self.low or self.inflight)
+
+
+class TelegramDispatcher:
+    """
+    Dispatcher notifikasi Telegram di background:
+    - Enqueue fire-and-forget (caller tidak menunggu HTTP ke Telegram).
+    - Satu aiohttp session (connection pooling) untuk semua pesan.
+    - Rate limit per chat (TELEGRAM_MIN_INTERVAL) + hormati 'retry_after' dari 429.
+    - Pesan prioritas rendah digabung jadi satu pesan tiap TELEGRAM_BATCH_INTERVAL.
+    - Retry dengan exponential backoff untuk error network / 429 / 5xx.
+    - Sisa antrian di-flush secara sinkron saat shutdown via kirim_tele_sync.
+    """
+
+    def __init__(self):
+        self._lanes = {}
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Hentikan worker lane (sisa pesan tetap di antrian untuk drain_pending), lalu tutup session."""
+        tasks = [lane.task for lane in self._lanes.values() if lane.task is not None and not lane.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def enqueue(self, text: str, channel: str = 'default', priority: str = 'normal') -> None:
+        bot_token, chat_id, thread_id = _resolve_tele_target(channel)
+        if not bot_token or not chat_id:
+            logger.warning(f"⚠️ Telegram credentials ({channel}) kosong, pesan dilewati.")
+            return
+
+        key = (bot_token, str(chat_id), str(thread_id or ''))
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = _ChatLane(bot_token, chat_id, thread_id)
+            self._lanes[key] = lane
+
+        if priority == 'low':
+            if len(lane.low) == lane.low.maxlen:
+                lane.low_chars -= len(lane.low[0])
+            lane.low.append(text)
+            lane.low_chars += len(text)
+            if lane.low_since is None:
+                lane.low_since = time.monotonic()
+        else:
+            target = lane.high if priority == 'high' else lane.normal
+            if len(target) == target.maxlen:
+                logger.warning("⚠️ Antrian Telegram penuh, pesan tertua dibuang.")
+            target.append(text)
+
+        lane.event.set()
+        self._ensure_worker(lane)
+
+    def _ensure_worker(self, lane: _ChatLane) -> None:
+        if lane.task is not None and not lane.task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Tidak ada event loop: pesan tetap di antrian, dikirim saat flush sinkron
+        lane.task = loop.create_task(self._run_lane(lane))
+
+    def _take_batch(self, lane: _ChatLane) -> str:
+        """Gabungkan pesan low-priority sebanyak muat dalam satu pesan Telegram."""
+        parts = [lane.low.popleft()]
+        size = len(parts[0])
+        while lane.low and size + len(TELEGRAM_BATCH_SEPARATOR) + len(lane.low[0]) <= TELEGRAM_MAX_MESSAGE_LEN:
+            msg = lane.low.popleft()
+            size += len(TELEGRAM_BATCH_SEPARATOR) + len(msg)
+            parts.append(msg)
+
+        lane.low_chars = sum(len(m) for m in lane.low)
+        if not lane.low:
+            lane.low_since = None
+        return TELEGRAM_BATCH_SEPARATOR.join(parts)
+
+    async def _run_lane(self, lane: _ChatLane) -> None:
+        batch_interval = getattr(config, 'TELEGRAM_BATCH_INTERVAL', 30)
+        min_interval = getattr(config, 'TELEGRAM_MIN_INTERVAL', 1.1)
+
+        while True:
+            if lane.high:
+                text = lane.high.popleft()
+            elif lane.normal:
+                text = lane.normal.popleft()
+            elif lane.low:
+                wait = lane.low_since + batch_interval - time.monotonic()
+                if wait > 0 and lane.low_chars < TELEGRAM_MAX_MESSAGE_LEN:
+                    lane.event.clear()
+                    try:
+                        await asyncio.wait_for(lane.event.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                text = self._take_batch(lane)
+            else:
+                lane.event.clear()
+                await lane.event.wait()
+                continue
+
+            # Pesan dipegang sebagai inflight sejak keluar antrian: jika lane di-cancel saat menunggu
+            # rate limit / saat HTTP berjalan (shutdown), pesan tetap ikut di-flush oleh drain_pending
+            lane.inflight = text
+
+            # Rate limit per chat
+            delay = lane.last_sent + min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                await self._send(lane, text)
+            except Exception as e:
+                logger.error(f"❌ Telegram Send Error ({lane.chat_id}): {e}")
+            lane.inflight = None
+            lane.last_sent = time.monotonic()
+
+    async def _send(self, lane: _ChatLane, text: str) -> bool:
+        max_retries = getattr(config, 'TELEGRAM_MAX_RETRIES', 4)
+        base_delay = getattr(config, 'TELEGRAM_RETRY_BASE_DELAY', 1.0)
+
+        data = {'chat_id': lane.chat_id, 'text': text, 'parse_mode': 'HTML'}
+        if lane.thread_id:
+            data['message_thread_id'] = lane.thread_id
+        url = f"https://api.telegram.org/bot{lane.bot_token}/sendMessage"
+
+        last_error = ""
+        for attempt in range(max_retries + 1):
+            delay = base_delay * (2 ** attempt)
+            try:
+                session = await self._get_session()
+                async with session.post(url, data=data) as resp:
+                    if resp.status == 200:
+                        return True
+
+                    error_details = await resp.text()
+                    last_error = f"Status {resp.status}: {error_details}"
+
+                    if resp.status == 429:
+                        try:
+                            retry_after = json.loads(error_details).get('parameters', {}).get('retry_after', 0)
+                            delay = max(delay, float(retry_after))
+                        except (ValueError, AttributeError):
+                            pass
+                    elif resp.status < 500:
+                        # Error permanen (400/401/403) -> tidak perlu retry
+                        logger.error(f"❌ Telegram Send Failed ({lane.chat_id}) {last_error}")
+                        if resp.status == 400 and "chat not found" in error_details:
+                            logger.warning(f"💡 HINT: Pastikan Bot Token '{lane.bot_token[:5]}...' sudah di-invite ke Chat ID '{lane.chat_id}'!")
+                        elif resp.status == 401:
+                            logger.warning(f"💡 HINT: Token Bot mungkin salah atau expired.")
+                        return False
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = f"{type(e).__name__}: {e}"
+
+            if attempt < max_retries:
+                await asyncio.sleep(delay)
+
+        logger.error(f"❌ Telegram Send Failed ({lane.chat_id}) setelah {max_retries + 1}x percobaan. {last_error}")
+        return False
+
+    def drain_pending(self) -> list:
+        """Ambil semua pesan yang belum terkirim (untuk flush sinkron saat shutdown)."""
+        pending = []
+        for lane in self._lanes.values():
+            texts = []
+            if lane.inflight:
+                texts.append(lane.inflight)
+                lane.inflight = None
+            texts.extend(lane.high)
+            texts.extend(lane.normal)
+            lane.high.clear()
+            lane.normal.clear()
+            while lane.low:
+                texts.append(self._take_batch(lane))
+            pending.extend((lane.bot_token, lane.chat_id, lane.thread_id, t) for t in texts)
+        return pending
+
+
+telegram_dispatcher = TelegramDispatcher()
+
+
+async def kirim_tele(pesan: str, alert: bool = False, channel: str = 'default', priority: str = None) -> None:
     """
-    Kirim pesan ke Telegram.
+    Kirim pesan ke Telegram (fire-and-forget, non-blocking).
+    Pesan masuk antrian TelegramDispatcher; caller tidak menunggu HTTP ke Telegram.
     :param channel: 'default' (Sinyal Utama) atau 'sentiment' (Analisa Berita)
+    :param priority: 'high' | 'normal' | 'low'. Default: alert -> high, sentiment -> low (di-batch).
     """
     try:
         prefix = "⚠️ <b>SYSTEM ALERT</b>\n" if alert else ""
-        
-        # Tentukan Token & ChatID berdasarkan channel
-        bot_token = config.TELEGRAM_TOKEN
-        chat_id = config.TELEGRAM_CHAT_ID
-        
-        if channel == 'sentiment':
-            if config.TELEGRAM_TOKEN_SENTIMENT and config.TELEGRAM_CHAT_ID_SENTIMENT:
-                bot_token = config.TELEGRAM_TOKEN_SENTIMENT
-                chat_id = config.TELEGRAM_CHAT_ID_SENTIMENT
-            else:
-                # Fallback atau skip jika credentials sentimen tidak ada
-                logger.warning("⚠️ Credentials Sentiment Telegram kosong, menggunakan default channel.")
-                # Kita bisa memilih untuk tetap kirim ke default atau return.
-                # Sesuai request user: "beda untuk dikirimnya". Jika kosong, lebih aman tetap kirim (fallback) atau log error.
-                # Mari kita gunakan fallback ke default agar info tidak hilang, tapi beri log warning.
-        
-        def send_request():
-            data = {
-                'chat_id': chat_id, 
-                'text': f"{prefix}{pesan}", 
-                'parse_mode': 'HTML'
-            }
-            # Message Thread ID hanya support di default channel biasanya, atau jika user set var khusus (belum ada).
-            # Asumsi: Sentimen channel mungkin topik terpisah atau grup terpisah. 
-            # Jika user set unique Token/ChatID, kemungkinan besar itu channel/grup berbeda.
-            # Jadi kita hanya pakai message_thread_id untuk default channel jika ada.
-            
-            if channel == 'default' and config.TELEGRAM_MESSAGE_THREAD_ID:
-                data['message_thread_id'] = config.TELEGRAM_MESSAGE_THREAD_ID
-            elif channel == 'sentiment' and config.TELEGRAM_MESSAGE_THREAD_ID_SENTIMENT:
-                data['message_thread_id'] = config.TELEGRAM_MESSAGE_THREAD_ID_SENTIMENT
-                
-            return requests.post(
-                f"https://api.telegram.org/bot{bot_token}/sendMessage",
-                data=data
-            )
-        
-        response = await asyncio.to_thread(send_request)
-        if response.status_code != 200:
-            error_details = response.text
-            logger.error(f"❌ Telegram Send Failed ({channel}) Status {response.status_code}: {error_details}")
-            
-            # Additional Hint for User
-            if response.status_code == 400 and "chat not found" in error_details:
-                logger.warning(f"💡 HINT: Pastikan Bot Token '{bot_token[:5]}...' sudah di-invite ke Chat ID '{chat_id}'!")
-            elif response.status_code == 401:
-                logger.warning(f"💡 HINT: Token Bot mungkin salah atau expired.")
+        if priority is None:
+            priority = 'high' if alert else ('low' if channel == 'sentiment' else 'normal')
+        telegram_dispatcher.enqueue(f"{prefix}{pesan}", channel=channel, priority=priority)
     except Exception as e:
         logger.error(f"❌ Telegram Exception: {e}")
 
+
+async def run_with_telegram(coro):
+    """Jalankan entry point async; saat selesai / di-cancel, worker Telegram dihentikan & session ditutup."""
+    try:
+        return await coro
+    finally:
+        await telegram_dispatcher.close()
+
+
+def _post_tele_sync(bot_token, chat_id, thread_id, text) -> None:
+    data = {
+        'chat_id': chat_id,
+        'text': text,
+        'parse_mode': 'HTML'
+    }
+    if thread_id:
+        data['message_thread_id'] = thread_id
+    # Timeout 5 detik agar bot tidak hang selamanya jika internet mati
+    requests.post(f"https://api.telegram.org/bot{bot_token}/sendMessage", data=data, timeout=5)
+
+
 def kirim_tele_sync(pesan):
     """
     Fungsi khusus untuk kirim notif saat bot mati/crash.
     Menggunakan requests biasa (blocking) agar pesan pasti terkirim sebelum process kill.
+    Sisa antrian TelegramDispatcher ikut di-flush lebih dulu agar urutan pesan terjaga.
     """
-    try:
-        url = f"https://api.telegram.org/bot{config.TELEGRAM_TOKEN}/sendMessage"
-        data = {
-            'chat_id': config.TELEGRAM_CHAT_ID, 
-            'text': pesan, 
-            'parse_mode': 'HTML'
-        }
-        if config.TELEGRAM_MESSAGE_THREAD_ID:
-            data['message_thread_id'] = config.TELEGRAM_MESSAGE_THREAD_ID
-        # Timeout 5 detik agar bot tidak hang selamanya jika internet mati
-        requests.post(url, data=data, timeout=5) 
+    min_interval = getattr(config, 'TELEGRAM_MIN_INTERVAL', 1.1)
+    pending = telegram_dispatcher.drain_pending()
+    pending.append((config.TELEGRAM_TOKEN, config.TELEGRAM_CHAT_ID, config.TELEGRAM_MESSAGE_THREAD_ID, pesan))
+
+    last_sent = {}
+    failed = False
+    for bot_token, chat_id, thread_id, text in pending:
+        key = (bot_token, str(chat_id))
+        if key in last_sent:
+            wait = last_sent[key] + min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        try:
+            _post_tele_sync(bot_token, chat_id, thread_id, text)
+        except Exception as e:
+            failed = True
+            print(f"❌ Gagal kirim notif exit: {e}")
+        last_sent[key] = time.monotonic()
+    if not failed:
         print("✅ Notifikasi Telegram terkirim (Sync).")
-    except Exception as e:
-        print(f"❌ Gagal kirim notif exit: {e}")
 
 # ==========================================
 # FORMATTING TOOLS
 # ==========================================
-import time
-
-# ... (rest of imports)
+def json_default(obj):
+    """Handler `default` json.dumps: tipe numpy/deque/set -> tipe JSON standar (checkpoint, IPC)."""
+    if hasattr(obj, 'item') and hasattr(obj, 'dtype'):
+        return obj.tolist() if getattr(obj, 'ndim', 0) else obj.item()  # numpy scalar / ndarray
+    if isinstance(obj, (set, deque)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 def get_next_rounded_time(interval_str: str) -> float:
     """
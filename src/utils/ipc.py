@@ -0,0 +1,225 @@
+"""
+Channel IPC lokal (Unix domain socket, fallback TCP 127.0.0.1) untuk mode multi-proses.
+
+Frame: 4 byte panjang (big-endian) + JSON. Jenis pesan:
+- {"op": "call", "id", "method", "args", "kwargs"}  -> server membalas {"op": "result", "id", "result" | "error"}
+- {"op": "notify", "method", "args", "kwargs"}      -> fire-and-forget (tanpa balasan)
+- {"op": "event", "topic", "data"}                  -> publish server ke semua client (pub/sub)
+Data besar (candle, order book) TIDAK lewat sini -> shared memory (src/utils/shm_ring.py).
+"""
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import socket
+import struct
+import tempfile
+
+import config
+from src.utils.helper import logger, json_default
+
+_LEN = struct.Struct('>I')
+_MAX_FRAME = 16 * 1024 * 1024
+_MAX_CLIENT_BUFFER = 8 * 1024 * 1024  # Client yang terlalu lambat membaca event diputus
+
+
+class IpcError(RuntimeError):
+    """Error dari sisi remote (handler raise exception / method tidak dikenal)."""
+
+
+def ipc_address(name, prefix=None):
+    """
+    Alamat endpoint IPC: path Unix socket, atau (host, port) jika platform tidak punya AF_UNIX.
+    prefix default MP_SHM_PREFIX (per bot); feed service bersama memakai FEED_SERVICE_PREFIX.
+    """
+    if hasattr(socket, 'AF_UNIX'):
+        base = getattr(config, 'MP_IPC_DIR', None) or tempfile.gettempdir()
+        return os.path.join(base, f"{prefix or getattr(config, 'MP_SHM_PREFIX', 'ezbot')}_{name}.sock")
+    ports = {'ingestion': 0, 'execution': 1, 'feed': 2}
+    return ('127.0.0.1', getattr(config, 'MP_IPC_PORT_BASE', 9120) + ports.get(name, 3))
+
+
+def _encode(msg):
+    raw = json.dumps(msg, default=json_default, separators=(',', ':')).encode('utf-8')
+    return _LEN.pack(len(raw)) + raw
+
+
+async def _read_frame(reader):
+    header = await reader.readexactly(_LEN.size)
+    (size,) = _LEN.unpack(header)
+    if size > _MAX_FRAME:
+        raise IpcError(f"Frame IPC terlalu besar ({size} bytes)")
+    return json.loads(await reader.readexactly(size))
+
+
+class IpcServer:
+    """Server RPC + publisher event. Handler boleh sync atau async."""
+
+    def __init__(self, address):
+        self.address = address
+        self._handlers = {}
+        self._writers = set()
+        self._server = None
+
+    def register(self, method, fn):
+        self._handlers[method] = fn
+
+    async def start(self):
+        if isinstance(self.address, tuple):
+            self._server = await asyncio.start_server(self._handle_conn, *self.address)
+        else:
+            if os.path.exists(self.address):
+                os.unlink(self.address)  # Socket basi dari proses sebelumnya
+            self._server = await asyncio.start_unix_server(self._handle_conn, self.address)
+        logger.info(f"🔌 IPC Server aktif: {self.address}")
+
+    def publish(self, topic, data):
+        """Kirim event ke semua client (non-blocking, hanya enqueue ke buffer transport)."""
+        if not self._writers:
+            return
+        frame = _encode({'op': 'event', 'topic': topic, 'data': data})
+        for writer in list(self._writers):
+            if writer.transport.get_write_buffer_size() > _MAX_CLIENT_BUFFER:
+                logger.warning("⚠️ IPC client terlalu lambat, koneksi diputus.")
+                self._writers.discard(writer)
+                writer.close()
+                continue
+            writer.write(frame)
+
+    async def _dispatch(self, msg):
+        fn = self._handlers.get(msg.get('method'))
+        if fn is None:
+            raise IpcError(f"Method tidak dikenal: {msg.get('method')}")
+        result = fn(*msg.get('args', []), **msg.get('kwargs', {}))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def _answer(self, writer, msg):
+        reply = {'op': 'result', 'id': msg.get('id')}
+        try:
+            reply['result'] = await self._dispatch(msg)
+        except Exception as e:
+            reply['error'] = f"{type(e).__name__}: {e}"
+        if not writer.is_closing():
+            writer.write(_encode(reply))
+
+    async def _handle_conn(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                msg = await _read_frame(reader)
+                op = msg.get('op')
+                if op == 'call':
+                    # Tiap call di task sendiri: RPC lambat (order) tidak menahan call lain
+                    asyncio.create_task(self._answer(writer, msg))
+                elif op == 'notify':
+                    asyncio.create_task(self._notify(msg))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ IPC connection error: {e}")
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _notify(self, msg):
+        try:
+            await self._dispatch(msg)
+        except Exception as e:
+            logger.warning(f"⚠️ IPC notify '{msg.get('method')}' gagal: {e}")
+
+    async def close(self):
+        for writer in list(self._writers):
+            writer.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if not isinstance(self.address, tuple) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class IpcClient:
+    """Client RPC + subscriber event (callback per topic, sync atau async)."""
+
+    def __init__(self, address):
+        self.address = address
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._subscribers = {}
+        self._reader_task = None
+
+    def on(self, topic, callback):
+        self._subscribers.setdefault(topic, []).append(callback)
+
+    async def connect(self, timeout=None):
+        """Connect dengan retry sampai server siap (proses lain mungkin masih startup)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or getattr(config, 'MP_READY_TIMEOUT', 300))
+        while True:
+            try:
+                if isinstance(self.address, tuple):
+                    self._reader, self._writer = await asyncio.open_connection(*self.address)
+                else:
+                    self._reader, self._writer = await asyncio.open_unix_connection(self.address)
+                break
+            except (FileNotFoundError, ConnectionError, OSError):
+                if loop.time() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            while True:
+                msg = await _read_frame(self._reader)
+                op = msg.get('op')
+                if op == 'result':
+                    fut = self._pending.pop(msg.get('id'), None)
+                    if fut and not fut.done():
+                        if 'error' in msg:
+                            fut.set_exception(IpcError(msg['error']))
+                        else:
+                            fut.set_result(msg.get('result'))
+                elif op == 'event':
+                    for cb in self._subscribers.get(msg.get('topic'), ()):
+                        try:
+                            res = cb(msg.get('data'))
+                            if inspect.isawaitable(res):
+                                await res
+                        except Exception as e:
+                            logger.error(f"❌ IPC event handler '{msg.get('topic')}' error: {e}")
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.error(f"❌ IPC koneksi ke {self.address} terputus: {e}")
+        finally:
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(IpcError("Koneksi IPC terputus"))
+            self._pending.clear()
+
+    async def call(self, method, *args, timeout=None, **kwargs):
+        if self._writer is None or self._writer.is_closing():
+            raise IpcError("IPC belum terhubung")
+        msg_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = fut
+        self._writer.write(_encode({'op': 'call', 'id': msg_id, 'method': method, 'args': args, 'kwargs': kwargs}))
+        try:
+            return await asyncio.wait_for(fut, timeout or getattr(config, 'MP_RPC_TIMEOUT', 30))
+        finally:
+            self._pending.pop(msg_id, None)
+
+    def notify(self, method, *args, **kwargs):
+        if self._writer is None or self._writer.is_closing():
+            logger.warning(f"⚠️ IPC notify '{method}' dibuang (belum terhubung)")
+            return
+        self._writer.write(_encode({'op': 'notify', 'method': method, 'args': args, 'kwargs': kwargs}))
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
@@ -0,0 +1,207 @@
+"""
+Structured output LLM: JSON schema keputusan (dikirim via response_format) + validator ter-compile.
+
+Schema di-compile sekali menjadi closure per field (tanpa dependency jsonschema). Validasi sekaligus
+melakukan repair murah yang aman: angka dalam string ("85%", "1,234.5"), enum beda huruf / spasi.
+Field yang tetap tidak valid dilaporkan per path agar AIBrain cukup me-retry field itu saja.
+"""
+import json
+import re
+
+_NUM_RE = re.compile(r'-?\d+(?:\.\d+)?')
+_INVALID = object()
+
+_PRICE = {"type": "number", "minimum": 0}
+
+DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis": {
+            "type": "object",
+            "properties": {
+                "interaction_zone": {"type": "string"},
+                "zone_reaction": {"type": "string"},
+                "price_vs_pivot": {"type": "string"},
+            },
+            "required": ["interaction_zone", "zone_reaction", "price_vs_pivot"],
+            "additionalProperties": False,
+        },
+        "selected_strategy": {"type": "string"},
+        "execution_mode": {"type": "string", "enum": ["LIMIT", "MARKET"]},
+        "decision": {"type": "string", "enum": ["BUY", "SELL", "WAIT"]},
+        "entry_price": _PRICE,
+        "tp_price": _PRICE,
+        "sl_price": _PRICE,
+        "reason": {"type": "string"},
+        "confidence": {"type": "integer", "minimum": 0, "maximum": 100},
+        "risk_level": {"type": "string", "enum": ["LOW", "MEDIUM", "HIGH"]},
+    },
+    "required": [
+        "analysis", "selected_strategy", "execution_mode", "decision", "entry_price",
+        "tp_price", "sl_price", "reason", "confidence", "risk_level",
+    ],
+    "additionalProperties": False,
+}
+
+SCREEN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "verdict": {"type": "string", "enum": ["WAIT", "CANDIDATE"]},
+        "direction": {"type": "string", "enum": ["BUY", "SELL", "NONE"]},
+        "confidence": {"type": "integer", "minimum": 0, "maximum": 100},
+        "reason": {"type": "string"},
+    },
+    "required": ["verdict", "direction", "confidence", "reason"],
+    "additionalProperties": False,
+}
+
+SENTIMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis": {"type": "string"},
+        "overall_sentiment": {"type": "string", "enum": ["BULLISH", "BEARISH", "NEUTRAL", "MIXED"]},
+        "sentiment_score": {"type": "integer", "minimum": 0, "maximum": 100},
+        "summary": {"type": "string"},
+        "key_drivers": {"type": "array", "items": {"type": "string"}},
+        "risk_assessment": {"type": "string"},
+    },
+    "required": ["analysis", "overall_sentiment", "sentiment_score", "summary", "key_drivers", "risk_assessment"],
+    "additionalProperties": False,
+}
+
+
+def response_format(name, schema):
+    """Payload response_format (OpenAI / OpenRouter structured outputs)."""
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def sub_schema(schema, fields):
+    """Schema object yang hanya berisi `fields` (untuk retry tertarget)."""
+    return {
+        "type": "object",
+        "properties": {f: schema["properties"][f] for f in fields},
+        "required": list(fields),
+        "additionalProperties": False,
+    }
+
+
+def extract_json(text):
+    """
+    Ambil objek JSON dari output LLM. Structured output = JSON murni (fast path json.loads);
+    fallback: buang code fence, lalu decode objek pertama yang valid (bukan regex greedy).
+    """
+    if not text or not text.strip():
+        raise ValueError("Response kosong")
+    text = text.strip()
+    try:
+        obj = json.loads(text)
+        if isinstance(obj, dict):
+            return obj
+    except json.JSONDecodeError:
+        pass
+
+    decoder = json.JSONDecoder()
+    start = text.find('{')
+    while start >= 0:
+        try:
+            obj, _ = decoder.raw_decode(text, start)
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        start = text.find('{', start + 1)
+    raise ValueError("Tidak ada objek JSON di response")
+
+
+def _compile(schema):
+    """Return check(value, path, errors) -> value bersih atau _INVALID (error dicatat di errors[path])."""
+    kind = schema.get("type")
+
+    if "enum" in schema:
+        allowed = {str(v).upper(): v for v in schema["enum"]}
+
+        def check_enum(value, path, errors):
+            if isinstance(value, str):
+                hit = allowed.get(value.strip().upper())
+                if hit is not None:
+                    return hit
+            errors[path] = f"harus salah satu dari {list(schema['enum'])}"
+            return _INVALID
+        return check_enum
+
+    if kind in ("number", "integer"):
+        lo, hi = schema.get("minimum"), schema.get("maximum")
+        cast = int if kind == "integer" else float
+
+        def check_number(value, path, errors):
+            if isinstance(value, str):
+                match = _NUM_RE.search(value.replace(',', ''))
+                value = float(match.group(0)) if match else None
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+                errors[path] = "harus angka"
+                return _INVALID
+            if (lo is not None and value < lo) or (hi is not None and value > hi):
+                errors[path] = f"di luar rentang {lo}..{hi}"
+                return _INVALID
+            return cast(round(value) if cast is int else value)
+        return check_number
+
+    if kind == "string":
+        def check_string(value, path, errors):
+            if isinstance(value, str):
+                return value
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return str(value)
+            errors[path] = "harus string"
+            return _INVALID
+        return check_string
+
+    if kind == "array":
+        item_check = _compile(schema.get("items", {}))
+
+        def check_array(value, path, errors):
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, list):
+                errors[path] = "harus array"
+                return _INVALID
+            items = [item_check(v, f"{path}[{i}]", errors) for i, v in enumerate(value)]
+            return [v for v in items if v is not _INVALID]
+        return check_array
+
+    if kind == "object":
+        props = {name: _compile(sub) for name, sub in schema.get("properties", {}).items()}
+        required = set(schema.get("required", ()))
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                errors[path or "$"] = "harus object"
+                return _INVALID
+            clean = {k: v for k, v in value.items() if k not in props}  # Key tambahan dibiarkan
+            for name, check in props.items():
+                field_path = f"{path}.{name}" if path else name
+                if name not in value or value[name] is None:
+                    if name in required:
+                        errors[field_path] = "wajib ada"
+                    continue
+                result = check(value[name], field_path, errors)
+                if result is not _INVALID:
+                    clean[name] = result
+            return clean
+        return check_object
+
+    return lambda value, path, errors: value  # Tipe bebas
+
+
+class CompiledSchema:
+    """Validator hasil compile satu kali per schema."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._check = _compile(schema)
+
+    def validate(self, obj):
+        """Return (clean_dict, errors {path: pesan}). Field tidak valid tidak ikut di clean_dict."""
+        errors = {}
+        clean = self._check(obj, "", errors)
+        return ({} if clean is _INVALID else clean), errors
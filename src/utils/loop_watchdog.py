@@ -0,0 +1,106 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+import numpy as np
+
+import config
+from src.utils.helper import logger
+from src.utils.metrics import metrics
+
+LOOP_LAG = metrics.histogram("loop_lag_seconds", "Lag penjadwalan event loop (sleep aktual - sleep target)", min_value=0.0001)
+LOOP_LAG_QUANTILE = metrics.gauge("loop_lag_recent_seconds", "Quantile lag event loop pada window terakhir")
+LOOP_STALLS = metrics.counter("loop_stalls_total", "Jumlah stall event loop di atas LOOP_LAG_THRESHOLD")
+
+
+class LoopWatchdog:
+    """
+    Pemantau lag event loop (opt-in):
+    - Probe coroutine: sleep(interval) berulang, selisih waktu bangun vs target = lag penjadwalan.
+    - Helper thread: jika heartbeat probe terlambat > threshold, ambil stack trace thread loop
+      (sys._current_frames) SAAT stall masih berlangsung -> kode pemblokir langsung terlihat.
+    - Quantile lag (p50/p90/p99/max) pada window terakhir diekspor sebagai gauge.
+    """
+
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, interval=None, threshold=None, window=None):
+        self.interval = interval or getattr(config, 'LOOP_WATCHDOG_INTERVAL', 0.1)
+        self.threshold = threshold or getattr(config, 'LOOP_LAG_THRESHOLD', 0.25)
+        self.window = deque(maxlen=window or getattr(config, 'LOOP_LAG_WINDOW', 600))
+
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_tick = time.monotonic()
+        self._stall_reported = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._task = None
+
+    def start(self):
+        """Mulai probe (harus dipanggil dari dalam event loop)."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+
+        if getattr(config, 'LOOP_DEBUG_MODE', False):
+            # Dev mode: asyncio melaporkan callback lambat ke logger 'asyncio'
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = getattr(config, 'LOOP_SLOW_CALLBACK', 0.1)
+            logger.info(f"🐢 Asyncio Debug Mode ON (slow callback > {self._loop.slow_callback_duration}s)")
+
+        self._last_tick = time.monotonic()
+        self._task = self._loop.create_task(self._probe())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"🩺 Loop Watchdog aktif (interval {self.interval}s, threshold {self.threshold}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _probe(self):
+        samples = 0
+        export_every = max(1, int(10 / self.interval))  # Update gauge quantile ~tiap 10 detik
+        while not self._stop.is_set():
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+
+            lag = max(0.0, now - start - self.interval)
+            LOOP_LAG.observe(lag)
+            self.window.append(lag)
+
+            samples += 1
+            if samples % export_every == 0:
+                self._export_quantiles()
+
+    def _export_quantiles(self):
+        if not self.window:
+            return
+        arr = np.fromiter(self.window, dtype=np.float64)
+        for q, v in zip(self.QUANTILES, np.quantile(arr, self.QUANTILES)):
+            LOOP_LAG_QUANTILE.set(float(v), quantile=str(q))
+        LOOP_LAG_QUANTILE.set(float(arr.max()), quantile="max")
+
+    def _monitor(self):
+        """Thread helper: deteksi stall dan capture stack thread loop."""
+        check_every = max(self.interval / 2, 0.02)
+        while not self._stop.wait(check_every):
+            overdue = time.monotonic() - self._last_tick - self.interval
+            if overdue < self.threshold:
+                self._stall_reported = False
+                continue
+            if self._stall_reported:
+                continue  # Satu laporan per stall
+
+            self._stall_reported = True
+            LOOP_STALLS.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<stack tidak tersedia>"
+            # Logging aman dari thread ini (QueueHandler hanya enqueue)
+            logger.warning(f"🐢 EVENT LOOP STALL > {overdue:.3f}s. Stack thread loop:\n{stack}")
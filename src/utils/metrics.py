@@ -0,0 +1,240 @@
+import bisect
+import math
+import time
+from contextlib import contextmanager
+
+import config
+from src.utils.helper import logger
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: tuple, extra: dict = None) -> str:
+    items = list(key)
+    if extra:
+        items += list(extra.items())
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v))
+
+
+class Counter:
+    """Nilai yang hanya bertambah (misal: jumlah cache hit)."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list:
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in self._values.items()]
+
+
+class Gauge:
+    """Nilai yang bisa naik-turun (misal: saldo, jumlah posisi)."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[_label_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list:
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in self._values.items()]
+
+
+def _log_linear_bounds(min_value: float, max_value: float, sub_buckets: int) -> list:
+    """
+    Bucket ala HDR Histogram: setiap kelipatan 2 dibagi `sub_buckets` secara geometris,
+    sehingga presisi relatif konstan (~2^(1/sub_buckets) - 1) dari ms sampai puluhan detik.
+    """
+    bounds = []
+    factor = 2 ** (1.0 / sub_buckets)
+    b = min_value
+    while b < max_value * factor:
+        bounds.append(float(f"{b:.6g}"))
+        b *= factor
+    return bounds
+
+
+class Histogram:
+    """
+    Histogram log-linear (HDR-style) dengan bucket tetap.
+    observe() O(log n) via bisect, tanpa alokasi. Output Prometheus: _bucket{le}, _sum, _count.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, min_value=0.0005, max_value=120.0, sub_buckets=2):
+        self.name = name
+        self.help = help_text
+        self.bounds = _log_linear_bounds(min_value, max_value, sub_buckets)
+        self._series = {}  # {label_key: [counts(list), sum, count]}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = [[0] * (len(self.bounds) + 1), 0.0, 0]
+            self._series[key] = series
+        series[0][bisect.bisect_left(self.bounds, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager: ukur durasi blok (detik)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def mean(self, **labels) -> float:
+        """Rata-rata semua observasi (0.0 jika belum ada)."""
+        series = self._series.get(_label_key(labels))
+        return series[1] / series[2] if series and series[2] else 0.0
+
+    def quantile(self, q: float, **labels) -> float:
+        """Estimasi quantile dari bucket (batas atas bucket)."""
+        series = self._series.get(_label_key(labels))
+        if not series or series[2] == 0:
+            return 0.0
+        target = q * series[2]
+        cum = 0
+        for i, c in enumerate(series[0]):
+            cum += c
+            if cum >= target:
+                return self.bounds[i] if i < len(self.bounds) else math.inf
+        return math.inf
+
+    def render(self) -> list:
+        lines = []
+        for key, (counts, total, count) in self._series.items():
+            cum = 0
+            for bound, c in zip(self.bounds, counts):
+                cum += c
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': bound})} {cum}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registry metrik in-process. Semua akses dari event loop (tanpa lock)."""
+
+    def __init__(self, prefix: str = "bot"):
+        self.prefix = prefix
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, help_text, **kwargs):
+        full_name = f"{self.prefix}_{name}"
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            metric = cls(full_name, help_text, **kwargs)
+            self._metrics[full_name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", **kwargs) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, **kwargs)
+
+    def render(self) -> str:
+        """Format teks Prometheus (exposition format 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# --- Metrik Hot Path (didefinisikan di satu tempat agar nama konsisten) ---
+WS_MESSAGE_LAG = metrics.histogram("ws_message_lag_seconds", "Selisih waktu terima vs event time (E) Binance per stream")
+WS_MESSAGES = metrics.counter("ws_messages_total", "Jumlah pesan WebSocket per event type")
+KLINE_HANDLE = metrics.histogram("kline_handle_seconds", "Durasi _handle_kline", min_value=0.00001)
+TECH_CACHE = metrics.counter("tech_cache_total", "Cache get_technical_data (result=hit|miss)")
+TECH_CALC = metrics.histogram("tech_calc_seconds", "Durasi kalkulasi indikator (cache miss)")
+CORRELATION = metrics.histogram("correlation_seconds", "Durasi hitung korelasi BTC", min_value=0.00001)
+WHALE_THRESHOLD = metrics.gauge("whale_threshold_usdt", "Threshold whale adaptif per symbol (persentil notional trade)")
+ANALYSIS_STEP = metrics.histogram("analysis_step_seconds", "Durasi step DAG analisa per symbol (step)", min_value=0.00001)
+ANALYSIS_MEMO = metrics.counter("analysis_memo_hits_total", "Hasil step DAG analisa dipakai ulang dari memo candle (step)")
+CHART_RENDER = metrics.histogram("chart_render_seconds", "Durasi render chart untuk Vision AI")
+CHART_ENCODE = metrics.histogram("chart_encode_seconds", "Durasi resize + encode chart (fmt=png|png_palette|webp|jpeg)", min_value=0.0001)
+CHART_IMAGE_BYTES = metrics.histogram("chart_image_bytes", "Ukuran gambar chart terkirim ke Vision AI (bytes)", min_value=1000, max_value=4_000_000)
+LLM_LATENCY = metrics.histogram("llm_latency_seconds", "Latency request LLM (kind=logic|vision|sentiment)")
+LLM_ERRORS = metrics.counter("llm_errors_total", "Jumlah request LLM gagal")
+LLM_CASCADE = metrics.counter("llm_cascade_total", "Routing model cascade (route=escalated|screened_out|screen_failed)")
+LLM_CASCADE_SAVED = metrics.counter("llm_cascade_saved_seconds_total", "Estimasi latency main model yang dihemat screening (detik)")
+LLM_REQUEST = metrics.histogram("llm_request_seconds", "Latency end-to-end keputusan LLM termasuk repair & hedge (kind)")
+LLM_HEDGE = metrics.counter("llm_hedge_total", "Hedged request (result=primary_won|hedge_won|both_failed|skipped_budget)")
+LLM_PARSE = metrics.counter("llm_parse_total", "Hasil parse output terstruktur LLM (result=ok|repaired|failed)")
+ORDER_RTT = metrics.histogram("order_rtt_seconds", "Round trip request order ke exchange (kind=entry|safety)")
+FILL_TO_PROTECTED = metrics.histogram("fill_to_protected_seconds", "Waktu dari fill entry sampai SL/TP terpasang")
+
+
+# ==========================================
+# PROMETHEUS HTTP ENDPOINT
+# ==========================================
+async def _handle_metrics(request):
+    from aiohttp import web
+    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(port=None):
+    """
+    Jalankan endpoint /metrics (format Prometheus) di host/port lokal.
+    `port` override METRICS_PORT (mode multi-proses: 1 port per proses).
+    Return AppRunner (untuk cleanup) atau None jika nonaktif/gagal.
+    """
+    if not getattr(config, 'METRICS_ENABLED', True):
+        return None
+
+    from aiohttp import web  # Lazy: aiohttp.web hanya dibutuhkan jika endpoint aktif
+
+    host = getattr(config, 'METRICS_HOST', '127.0.0.1')
+    port = port or getattr(config, 'METRICS_PORT', 9108)
+    try:
+        app = web.Application()
+        app.router.add_get('/metrics', _handle_metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        logger.info(f"📈 Metrics endpoint aktif: http://{host}:{port}/metrics")
+        return runner
+    except Exception as e:
+        logger.warning(f"⚠️ Gagal start metrics endpoint: {e}")
+        return None
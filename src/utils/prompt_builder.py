@@ -121,7 +121,39 @@ def build_market_prompt(symbol, tech_data, sentiment_data, onchain_data, pattern
         ask_vol = ob_data.get('asks_vol_usdt', 0) / 1000 # to K
         imbalance = ob_data.get('imbalance_pct', 0)
         ob_imp = f"Bids: ${bid_vol:.1f}K | Asks: ${ask_vol:.1f}K | Imbalance: {imbalance:+.1f}%"
+
+    # [NEW] Precomputed Order Book Features (Multi-Band, Spread, Walls, Trend)
+    ob_extra_lines = []
+    if ob_data and ob_data.get('bands'):
+        band_str = " | ".join([f"{b['band_pct']:g}%: {b['imbalance_pct']:+.1f}%" for b in ob_data['bands']])
+        ob_extra_lines.append(f"- Imbalance per Band: {band_str}")
+        ob_extra_lines.append(
+            f"- Spread: {ob_data.get('spread_bps', 0):.2f} bps | Weighted Mid: {format_price(ob_data.get('weighted_mid', 0))}"
+        )
+        for label, key in (("Bid Wall", 'bid_wall'), ("Ask Wall", 'ask_wall')):
+            wall = ob_data.get(key)
+            if wall:
+                ob_extra_lines.append(
+                    f"- {label}: {format_price(wall['price'])} (${wall['notional_usdt']/1000:.1f}K, {wall['distance_pct']:+.2f}% from mid)"
+                )
+        history = ob_data.get('imbalance_history') or []
+        if len(history) >= 2:
+            ob_extra_lines.append(f"- Imbalance Trend: {history[0]:+.1f}% -> {history[-1]:+.1f}% ({len(history)} samples)")
+    ob_extra_str = ("\n" + "\n".join(ob_extra_lines)) if ob_extra_lines else ""
     
+    # [NEW] Order Flow (aggTrade CVD & Buy/Sell Volume)
+    flow_data = tech_data.get('trade_flow') or {}
+    flow_lines = []
+    for w in flow_data.get('windows', []):
+        flow_lines.append(
+            f"- Last {w['minutes']}m: Buy ${w['buy_vol_usdt']/1000:.1f}K | Sell ${w['sell_vol_usdt']/1000:.1f}K | "
+            f"Delta {w['delta_usdt']/1000:+.1f}K | Buy Ratio {w['buy_ratio']*100:.1f}% | "
+            f"Trades {w['trades']} | Max Trade ${w['max_trade_usdt']/1000:.1f}K"
+        )
+    if flow_lines:
+        flow_lines.append(f"- CVD (since bot start): ${flow_data.get('cvd_usdt', 0)/1000:+.1f}K")
+    flow_str = "\n".join(flow_lines) if flow_lines else "- No trade flow data yet."
+
     # Volume & Market Data
     volume = tech_data.get('volume', 0)
     vol_ma = tech_data.get('vol_ma', 0)
@@ -163,6 +195,17 @@ def build_market_prompt(symbol, tech_data, sentiment_data, onchain_data, pattern
     whale_str = "\n".join([f"- {w}" for w in whale_activity]) if whale_activity else "No significant whale activity detected."
     inflow_status = onchain_data.get('stablecoin_inflow', 'Neutral')
 
+    stable_trend = onchain_data.get('stablecoin_trend') or {}
+    if stable_trend:
+        inflow_status = f"{inflow_status} (Supply Change: " + ", ".join([f"{k} {v:+.2f}%" for k, v in stable_trend.items()]) + ")"
+
+    # [NEW] Aggregated Whale Flow (per window)
+    whale_summary = onchain_data.get('whale_summary') or {}
+    whale_flow_str = " | ".join([
+        f"{label}: Net ${w['net_usdt']/1e6:+.2f}M ({w['buy_count']} Buy / {w['sell_count']} Sell)"
+        for label, w in whale_summary.items()
+    ]) if whale_summary else "N/A"
+
     # ==========================================
     # 2. CONTEXTUAL LOGIC BUILDER
     # ==========================================
@@ -362,9 +405,13 @@ TASK: Analyze market data for {symbol} using the Multi-Timeframe logic below. De
 - Volume: {volume} | Avg: {vol_ma} | Ratio: {vol_ratio:.2f}x {'✓ SPIKE' if vol_meets_threshold else '✗ NORMAL'}
 
 [ORDER BOOK DEPTH]
-- Depth ({config.ORDERBOOK_RANGE_PERCENT*100:.0f}%): {ob_imp}
+- Depth ({config.ORDERBOOK_RANGE_PERCENT*100:.0f}%): {ob_imp}{ob_extra_str}
 - NOTE: Significant Imbalance (>{config.ORDERBOOK_IMBALANCE_THRESHOLD}%) suggests potential Liquidity Hunt or Breakout.
 
+[ORDER FLOW (AGGRESSOR TRADES)]
+{flow_str}
+- NOTE: Positive delta = aggressive buyers dominate. CVD divergence vs price hints absorption.
+
 [MARKET DATA]
 - Funding Rate: {funding_rate:.6f}%
 - Open Interest: {open_interest}
@@ -375,6 +422,7 @@ TASK: Analyze market data for {symbol} using the Multi-Timeframe logic below. De
 4. SENTIMENT & EXTERNAL FACTORS
 - Fear & Greed Index: {fng_value} ({fng_text})
 - Stablecoin Inflow: {inflow_status}
+- Net Whale Flow: {whale_flow_str}
 - Whale Activity:
 {whale_str}
 - Latest News:
@@ -435,6 +483,28 @@ OUTPUT FORMAT (JSON ONLY):
 """
     return prompt
 
+def build_screening_prompt(market_prompt):
+    """
+    [NEW] Prompt screening (model cascade): data & aturan sama dengan market prompt, tapi format output
+    diganti verdict singkat WAIT / CANDIDATE (output kecil, model murah).
+    """
+    body = market_prompt.split("OUTPUT FORMAT (JSON ONLY):")[0].rstrip()
+    return f"""{body}
+
+SCREENING MODE:
+You are a fast pre-filter. Do NOT produce a full trade plan.
+Decide only whether this setup deserves a full analysis by the main strategist.
+Return CANDIDATE only if a setup from the rules above is plausibly confirmed, otherwise WAIT.
+
+OUTPUT FORMAT (JSON ONLY):
+{{
+  "verdict": "WAIT" | "CANDIDATE",
+  "direction": "BUY" | "SELL" | "NONE",
+  "confidence": 0-100,
+  "reason": "One short sentence."
+}}
+"""
+
 def build_sentiment_prompt(sentiment_data, onchain_data):
     """
     Menyusun prompt khusus untuk Analisa Sentimen AI.
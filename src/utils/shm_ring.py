@@ -0,0 +1,204 @@
+"""
+Primitive shared memory (multiprocessing.shared_memory) untuk mode multi-proses.
+
+Model: 1 writer (proses ingestion), banyak reader (proses decision / execution / bot lain).
+Konsistensi pakai seqlock: writer menaikkan `seq` ke ganjil sebelum menulis dan ke genap sesudahnya;
+reader mengulang copy jika `seq` ganjil atau berubah selama copy. Reader tidak pernah memblokir writer.
+Reader juga bisa cek `seq` saja untuk tahu ada data baru (tanpa copy).
+"""
+import json
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.utils.helper import json_default
+
+_HEADER_SLOTS = 4                 # uint64: seq, count/length, head, capacity
+_HEADER_BYTES = _HEADER_SLOTS * 8
+CANDLE_FIELDS = 6                 # [ts, open, high, low, close, volume]
+
+
+def _attach(name):
+    """Attach ke segmen yang sudah ada tanpa membuat resource_tracker meng-unlink saat reader keluar."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # <3.13: jangan daftarkan ke resource_tracker (tracker dipakai bersama semua proses anak,
+        # unregister dari reader akan menghapus registrasi milik writer)
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _create(name, size):
+    try:
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        # Sisa proses sebelumnya yang crash -> buang dan buat ulang
+        stale = shared_memory.SharedMemory(name=name)
+        stale.close()
+        stale.unlink()
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+
+class _SeqLockSegment:
+    """Segmen shared memory dengan header seqlock. Subclass menambah view data di belakang header."""
+
+    def __init__(self, name, size, create, capacity=0):
+        self.name = name
+        self.owner = create
+        self._shm = _create(name, size) if create else _attach(name)
+        self._header = np.ndarray((_HEADER_SLOTS,), dtype=np.uint64, buffer=self._shm.buf)
+        if create:
+            self._header[:] = 0
+            self._header[3] = capacity
+        # Kapasitas dibaca dari header (ukuran segmen bisa dibulatkan ke page size oleh OS)
+        self.capacity = int(self._header[3])
+
+    @property
+    def seq(self):
+        return int(self._header[0])
+
+    def _begin_write(self):
+        self._header[0] += 1
+
+    def _end_write(self):
+        self._header[0] += 1
+
+    def _read(self, copy_fn, retries=1000):
+        """Copy konsisten via seqlock. Return (seq, hasil copy_fn)."""
+        for attempt in range(retries):
+            start = int(self._header[0])
+            if not start & 1:
+                data = copy_fn()
+                if int(self._header[0]) == start:
+                    return start, data
+            if attempt % 50 == 49:
+                time.sleep(0)  # Beri kesempatan writer menyelesaikan update
+        raise TimeoutError(f"Seqlock read {self.name} tidak stabil")
+
+    def _release_views(self):
+        self._header = None
+
+    def close(self):
+        """Lepas mapping (dan unlink jika pemilik). View numpy harus dilepas dulu (BufferError)."""
+        if self._shm is None:
+            return
+        self._release_views()
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+
+class SharedCandleRing(_SeqLockSegment):
+    """
+    Ring buffer candle OHLCV (float64[capacity, 6]) dengan semantik sama seperti deque market_store:
+    candle dengan timestamp sama dengan candle terakhir -> ditimpa, selain itu -> append (yang terlama terbuang).
+    """
+
+    def __init__(self, name, capacity=None, create=False):
+        size = _HEADER_BYTES + capacity * CANDLE_FIELDS * 8 if create else 0
+        super().__init__(name, size, create, capacity)
+        self._data = np.ndarray((self.capacity, CANDLE_FIELDS), dtype=np.float64, buffer=self._shm.buf, offset=_HEADER_BYTES)
+
+    def _release_views(self):
+        self._data = None
+        super()._release_views()
+
+    def __len__(self):
+        return int(self._header[1])
+
+    def replace(self, candles):
+        """Tulis ulang seluruh isi ring (dipakai setelah initialize_data / resync)."""
+        arr = np.asarray(list(candles)[-self.capacity:], dtype=np.float64).reshape(-1, CANDLE_FIELDS)
+        self._begin_write()
+        try:
+            self._data[:len(arr)] = arr
+            self._header[1] = len(arr)
+            self._header[2] = 0
+        finally:
+            self._end_write()
+
+    def upsert(self, candle):
+        count, head = int(self._header[1]), int(self._header[2])
+        self._begin_write()
+        try:
+            if count and self._data[(head + count - 1) % self.capacity, 0] == candle[0]:
+                idx = (head + count - 1) % self.capacity
+            elif count < self.capacity:
+                idx = (head + count) % self.capacity
+                self._header[1] = count + 1
+            else:
+                idx = head
+                self._header[2] = (head + 1) % self.capacity
+            self._data[idx] = candle
+        finally:
+            self._end_write()
+
+    def snapshot(self):
+        """Return (seq, [[ts, o, h, l, c, v], ...]) urut dari candle terlama (format sama dengan ccxt)."""
+        def copy():
+            count, head = int(self._header[1]), int(self._header[2])
+            idx = (head + np.arange(count)) % self.capacity
+            return self._data[idx].copy()
+
+        seq, rows = self._read(copy)
+        return seq, [[int(r[0]), r[1], r[2], r[3], r[4], r[5]] for r in rows.tolist()]
+
+
+class SharedSlots(_SeqLockSegment):
+    """Array float64[n_slots, n_fields] kecil (misal ticker: [price, ts]) dengan satu seqlock."""
+
+    def __init__(self, name, n_slots=1, n_fields=2, create=False):
+        size = _HEADER_BYTES + n_slots * n_fields * 8 if create else 0
+        super().__init__(name, size, create, n_slots)
+        self._data = np.ndarray((self.capacity, n_fields), dtype=np.float64, buffer=self._shm.buf, offset=_HEADER_BYTES)
+
+    def _release_views(self):
+        self._data = None
+        super()._release_views()
+
+    def write(self, slot, values):
+        self._begin_write()
+        try:
+            self._data[slot] = values
+        finally:
+            self._end_write()
+
+    def read(self, slot):
+        return self._read(lambda: tuple(self._data[slot].tolist()))[1]
+
+
+class SharedBlob(_SeqLockSegment):
+    """Satu object JSON (ukuran variabel, maksimal `capacity` bytes) untuk data non-numerik."""
+
+    def __init__(self, name, capacity=None, create=False):
+        size = _HEADER_BYTES + capacity if create else 0
+        super().__init__(name, size, create, capacity)
+
+    def write(self, obj):
+        """Return False jika payload melebihi kapasitas (data lama dipertahankan)."""
+        raw = json.dumps(obj, default=json_default, separators=(',', ':')).encode('utf-8')
+        if len(raw) > self.capacity:
+            return False
+        self._begin_write()
+        try:
+            self._shm.buf[_HEADER_BYTES:_HEADER_BYTES + len(raw)] = raw
+            self._header[1] = len(raw)
+        finally:
+            self._end_write()
+        return True
+
+    def read(self):
+        """Return (seq, object) atau (seq, None) jika belum pernah ditulis."""
+        seq, raw = self._read(lambda: bytes(self._shm.buf[_HEADER_BYTES:_HEADER_BYTES + int(self._header[1])]))
+        return seq, (json.loads(raw) if raw else None)
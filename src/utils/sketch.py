@@ -0,0 +1,83 @@
+"""
+Streaming quantile sketch (log-bucket, ala DDSketch) dengan memori tetap.
+
+Nilai dipetakan ke bucket logaritmik: bucket k = [gamma^k, gamma^(k+1)), gamma = (1 + a) / (1 - a),
+sehingga estimasi quantile punya error relatif <= a (cocok untuk notional trade yang rentangnya
+$1 - $100jt). Jumlah bucket tetap (rentang [min_value, max_value], nilai di luar rentang masuk bucket
+ujung) -> memori per sketch konstan berapa pun jumlah data. Bobot lama bisa di-decay agar adaptif.
+"""
+import math
+
+
+class QuantileSketch:
+    __slots__ = ('alpha', 'min_value', 'max_value', '_gamma', '_log_gamma', '_offset', 'counts', 'total')
+
+    def __init__(self, alpha=0.02, min_value=1.0, max_value=1e10):
+        self.alpha = alpha
+        self.min_value = min_value
+        self.max_value = max_value
+        self._gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self._gamma)
+        self._offset = math.floor(math.log(min_value) / self._log_gamma)
+        self.counts = [0.0] * (math.floor(math.log(max_value) / self._log_gamma) - self._offset + 1)
+        self.total = 0.0
+
+    def add(self, value, weight=1.0):
+        """O(1): satu log + increment bucket."""
+        if value <= self.min_value:
+            idx = 0
+        elif value >= self.max_value:
+            idx = len(self.counts) - 1
+        else:
+            idx = math.floor(math.log(value) / self._log_gamma) - self._offset
+        self.counts[idx] += weight
+        self.total += weight
+
+    def quantile(self, q):
+        """
+        Estimasi nilai pada quantile q (0..1), None jika kosong.
+        Scan dari bucket teratas: untuk quantile tinggi (0.99+) hanya beberapa bucket yang dilewati.
+        """
+        if self.total <= 0:
+            return None
+        rank_above = (1.0 - q) * self.total  # Bobot yang boleh berada di atas nilai target
+        above = 0.0
+        for idx in range(len(self.counts) - 1, -1, -1):
+            above += self.counts[idx]
+            if above > rank_above:
+                return self._bucket_value(idx)
+        return self._bucket_value(0)
+
+    def _bucket_value(self, idx):
+        """Nilai representatif bucket (error relatif <= alpha terhadap semua nilai di bucket)."""
+        return 2 * self._gamma ** (idx + self._offset + 1) / (self._gamma + 1)
+
+    def merge(self, other):
+        """Gabungkan sketch lain (alpha & rentang harus sama) ke sketch ini, hasil setara add semua datanya."""
+        if (other.alpha, other.min_value, other.max_value) != (self.alpha, self.min_value, self.max_value):
+            raise ValueError("Sketch dengan alpha / rentang berbeda tidak bisa digabung")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        return self
+
+    def decay(self, factor):
+        """Kalikan semua bobot dengan factor (0..1): data lama makin kecil pengaruhnya."""
+        self.counts = [c * factor for c in self.counts]
+        self.total *= factor
+
+    # --- Serialisasi (checkpoint) ---
+    def to_dict(self):
+        """Sparse: hanya bucket berisi -> [[idx, count], ...]."""
+        return {
+            'alpha': self.alpha, 'min_value': self.min_value, 'max_value': self.max_value,
+            'counts': [[i, round(c, 4)] for i, c in enumerate(self.counts) if c > 0],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['alpha'], data['min_value'], data['max_value'])
+        for idx, count in data.get('counts', []):
+            if 0 <= idx < len(sketch.counts):
+                sketch.counts[idx] = float(count)
+        sketch.total = sum(sketch.counts)
+        return sketch
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, 'src'), ROOT):  # Sama seperti src/main.py: from src.utils... & import config
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Log, tracker & checkpoint ditulis relatif ke cwd -> jalankan test di direktori sementara (repo tetap bersih)
+os.chdir(tempfile.mkdtemp(prefix='ezbot-tests-'))
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import config
+from src.modules.ai_brain import AIBrain, _decision_critical_fields
+
+
+@pytest.fixture
+def brain(monkeypatch):
+    monkeypatch.setattr(config, 'AI_API_KEY', None)
+    brain = AIBrain()
+    brain.model_name, brain.hedge_model = 'main', 'hedge'
+    return brain
+
+
+def _hedged(brain, monkeypatch, outcomes):
+    """outcomes = {model: (detik, hasil atau Exception)}. Return (hasil, model yang dipanggil)."""
+    monkeypatch.setattr(config, 'AI_HEDGE_ENABLED', True)
+    monkeypatch.setattr(config, 'AI_HEDGE_DEFAULT_DELAY', 0.05)
+    calls = []
+
+    async def fake_structured(kind, model, messages, **kwargs):
+        calls.append(model)
+        delay, outcome = outcomes[model]
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, model
+
+    brain._request_structured = fake_structured
+
+    async def scenario():
+        result = await brain._request_hedged('logic', [])
+        await asyncio.sleep(0)  # Done callback main task (cancel) diproses
+        return result
+    return asyncio.run(scenario()), calls
+
+
+def test_primary_win_records_primary_latency(brain, monkeypatch):
+    (result, model), calls = _hedged(brain, monkeypatch, {'main': (0.01, {'decision': 'WAIT'})})
+    assert model == 'main' and calls == ['main']
+    [sample] = brain._latency_window['logic']
+    assert 0.01 <= sample < 0.05
+
+
+def test_hedge_win_records_cancelled_primary_as_lower_bound(brain, monkeypatch):
+    (result, model), calls = _hedged(brain, monkeypatch, {'main': (5, {}), 'hedge': (0.05, {'decision': 'BUY'})})
+    assert model == 'hedge' and calls == ['main', 'hedge']
+    [sample] = brain._latency_window['logic']  # Tidak ada sampel terpisah untuk hedge
+    assert 0.09 <= sample < 1
+
+
+def test_failed_primary_records_its_own_finish_time(brain, monkeypatch):
+    (result, model), calls = _hedged(brain, monkeypatch, {
+        'main': (0.1, ValueError('schema')), 'hedge': (0.3, {'decision': 'SELL'}),
+    })
+    assert model == 'hedge'
+    [sample] = brain._latency_window['logic']
+    assert 0.1 <= sample < 0.3  # Waktu main, bukan waktu hedge menang
+
+
+class FakeCompletions:
+    """chat.completions.create: jawaban diambil berurutan dari `replies`, params tiap panggilan dicatat."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    async def create(self, **params):
+        self.calls.append(params)
+        message = SimpleNamespace(content=self.replies.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _structured(brain, replies):
+    completions = FakeCompletions(replies)
+    brain.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    async def scenario():
+        return await brain._request_structured(
+            'logic', 'main', [{'role': 'user', 'content': 'prompt'}], 'trade_decision',
+            _decision_critical_fields, 0.1
+        )
+    return completions, scenario
+
+
+DECISION = {
+    'analysis': {'interaction_zone': 'demand', 'zone_reaction': 'rejection', 'price_vs_pivot': 'above'},
+    'selected_strategy': 'TREND', 'execution_mode': 'LIMIT', 'decision': 'BUY',
+    'entry_price': 100, 'tp_price': 110, 'sl_price': 95, 'reason': 'ok', 'confidence': 80, 'risk_level': 'LOW',
+}
+
+
+def test_valid_output_needs_no_retry(brain):
+    completions, scenario = _structured(brain, [json.dumps(DECISION)])
+    clean, raw = asyncio.run(scenario())
+    assert len(completions.calls) == 1
+    assert clean['decision'] == 'BUY' and clean['sl_price'] == 95.0
+    assert completions.calls[0]['response_format']['json_schema']['name'] == 'trade_decision'
+
+
+def test_non_critical_error_is_not_retried(brain):
+    completions, scenario = _structured(brain, [json.dumps(dict(DECISION, risk_level='EXTREME'))])
+    clean, _ = asyncio.run(scenario())
+    assert len(completions.calls) == 1
+    assert 'risk_level' not in clean and clean['decision'] == 'BUY'
+
+
+def test_missing_critical_field_triggers_one_targeted_retry(brain):
+    partial = {k: v for k, v in DECISION.items() if k != 'sl_price'}
+    completions, scenario = _structured(brain, [json.dumps(partial), '{"sl_price": "94.5"}'])
+    clean, _ = asyncio.run(scenario())
+
+    assert len(completions.calls) == 2
+    fix = completions.calls[1]
+    assert fix['response_format']['json_schema']['name'] == 'trade_decision_fix'
+    assert fix['response_format']['json_schema']['schema']['required'] == ['sl_price']
+    assert fix['max_tokens'] == config.AI_SCHEMA_REPAIR_MAX_TOKENS
+    assert fix['messages'][-2] == {'role': 'assistant', 'content': json.dumps(partial)}
+    assert 'sl_price' in fix['messages'][-1]['content']
+    assert clean['sl_price'] == 94.5 and clean['tp_price'] == 110.0
+
+
+def test_malformed_output_retries_once_then_raises(brain):
+    completions, scenario = _structured(brain, ['I think BUY', 'still not json'])
+    with pytest.raises(ValueError, match='decision'):
+        asyncio.run(scenario())
+    assert len(completions.calls) == 2
+    assert completions.calls[1]['response_format']['json_schema']['schema']['required'] == ['decision', 'confidence']
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import config
+from src.modules.executor import OrderExecutor
+
+
+class FakeExchange:
+    """batchOrders: jawaban diambil berurutan dari `batch_results` (Exception -> di-raise)."""
+
+    def __init__(self, batch_results, open_orders=None):
+        self.batch_results = list(batch_results)
+        self.open_orders = open_orders or []
+        self.batches = []
+
+    async def fapiPrivatePostBatchOrders(self, params):
+        legs = json.loads(params['batchOrders'])
+        self.batches.append(legs)
+        result = self.batch_results.pop(0)
+        if isinstance(result, Exception):
+            # Request sampai ke exchange, tapi response hilang (timeout)
+            self.open_orders += [{'clientOrderId': leg['newClientOrderId']} for leg in legs if leg['type'] in result.args]
+            raise result
+        return result(legs)
+
+    async def fapiPrivateGetOpenOrders(self, params):
+        return list(self.open_orders)
+
+
+def _accept_all(legs):
+    return [{'orderId': i + 1, 'clientOrderId': leg['newClientOrderId']} for i, leg in enumerate(legs)]
+
+
+def _place(exchange, monkeypatch):
+    monkeypatch.setattr(config, 'ORDER_SLTP_RETRIES', 2, raising=False)
+    monkeypatch.setattr(config, 'ORDER_SLTP_RETRY_DELAY', 0, raising=False)
+    executor = OrderExecutor(exchange)
+    return asyncio.run(executor._place_safety_batch('BTC/USDT', 'sell', '90', '110'))
+
+
+def test_retry_after_timeout_resends_only_missing_leg(monkeypatch):
+    exchange = FakeExchange([TimeoutError('STOP_MARKET'), _accept_all])
+    assert _place(exchange, monkeypatch) is True
+    assert [leg['type'] for leg in exchange.batches[1]] == ['TAKE_PROFIT_MARKET']
+
+
+def test_timeout_after_both_legs_accepted_is_success(monkeypatch):
+    exchange = FakeExchange([TimeoutError('STOP_MARKET', 'TAKE_PROFIT_MARKET')])
+    assert _place(exchange, monkeypatch) is True
+    assert len(exchange.batches) == 1
+
+
+def test_duplicate_client_id_counts_as_placed(monkeypatch):
+    def sl_duplicate(legs):
+        return [{'code': -4116, 'msg': 'ClientOrderId is duplicated.'}, {'orderId': 2}]
+    exchange = FakeExchange([sl_duplicate])
+    assert _place(exchange, monkeypatch) is True
+
+
+def test_rejected_leg_is_retried(monkeypatch):
+    def tp_rejected(legs):
+        return [{'orderId': 1}, {'code': -2021, 'msg': 'Order would immediately trigger.'}]
+    exchange = FakeExchange([tp_rejected, _accept_all])
+    assert _place(exchange, monkeypatch) is True
+    assert [leg['type'] for leg in exchange.batches[1]] == ['TAKE_PROFIT_MARKET']
+
+
+class BalanceExchange:
+    def __init__(self, free):
+        self.free = free
+        self.fetches = 0
+
+    async def fetch_balance(self):
+        self.fetches += 1
+        return {'USDT': {'total': 1000.0, 'free': self.free}}
+
+
+def test_account_update_then_entry_reads_balance_from_rest_once(monkeypatch):
+    import src.main as bot
+
+    monkeypatch.setattr(config, 'USE_DYNAMIC_SIZE', True)
+    monkeypatch.setattr(config, 'RISK_PERCENT_PER_TRADE', 10)
+    monkeypatch.setattr(config, 'MIN_ORDER_USDT', 5)
+    exchange = BalanceExchange(free=400.0)
+    executor = OrderExecutor(exchange)
+    monkeypatch.setattr(bot, 'executor', executor)
+
+    async def no_sync():
+        return 0
+    executor.sync_positions = no_sync
+
+    async def scenario():
+        await executor.get_available_balance()        # Seed saat startup
+        exchange.free = 350.0
+        await bot.account_update_cb({'e': 'ACCOUNT_UPDATE', 'a': {'B': [{'a': 'USDT', 'wb': '1000', 'cw': '950'}]}})
+        first = await executor.calculate_dynamic_amount_usdt('BTC/USDT', 10)
+        second = await executor.calculate_dynamic_amount_usdt('ETH/USDT', 10)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == 35.0   # 10% dari available REST (bukan cw)
+    assert exchange.fetches == 2     # Seed + 1x setelah ACCOUNT_UPDATE; entry kedua pakai cache
+
+
+def test_available_balance_cached_until_invalidated():
+    exchange = BalanceExchange(free=400.0)
+    executor = OrderExecutor(exchange)
+    assert asyncio.run(executor.get_available_balance()) == 400.0
+    assert asyncio.run(executor.get_available_balance()) == 400.0
+    assert exchange.fetches == 1
+
+    executor.invalidate_available_balance()
+    exchange.free = 300.0
+    assert asyncio.run(executor.get_available_balance()) == 300.0
+    assert exchange.fetches == 2
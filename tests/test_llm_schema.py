@@ -0,0 +1,69 @@
+import pytest
+
+from src.utils.llm_schema import DECISION_SCHEMA, CompiledSchema, extract_json, sub_schema
+
+VALIDATOR = CompiledSchema(DECISION_SCHEMA)
+
+VALID = {
+    'analysis': {'interaction_zone': 'demand', 'zone_reaction': 'rejection', 'price_vs_pivot': 'above'},
+    'selected_strategy': 'TREND', 'execution_mode': 'LIMIT', 'decision': 'BUY',
+    'entry_price': 100.5, 'tp_price': 110, 'sl_price': 95, 'reason': 'ok', 'confidence': 80, 'risk_level': 'LOW',
+}
+
+
+@pytest.mark.parametrize('text', [
+    '{"decision": "WAIT"}',
+    '```json\n{"decision": "WAIT"}\n```',
+    'Here is my answer: {"decision": "WAIT"} hope it helps {"x": 1}',
+    'noise {broken {"decision": "WAIT"}',
+])
+def test_extract_json_finds_first_object(text):
+    assert extract_json(text) == {'decision': 'WAIT'}
+
+
+@pytest.mark.parametrize('text', ['', '   ', 'no json here', '[1, 2]', '{"decision": "WAIT"'])
+def test_extract_json_rejects_malformed(text):
+    with pytest.raises(ValueError):
+        extract_json(text)
+
+
+def test_valid_output_passes_unchanged():
+    clean, errors = VALIDATOR.validate(dict(VALID))
+    assert errors == {}
+    assert clean == VALID
+
+
+def test_cheap_repairs():
+    raw = dict(VALID, decision=' buy ', confidence='85%', entry_price='1,234.5', risk_level='medium')
+    clean, errors = VALIDATOR.validate(raw)
+    assert errors == {}
+    assert (clean['decision'], clean['confidence'], clean['entry_price'], clean['risk_level']) == ('BUY', 85, 1234.5, 'MEDIUM')
+
+
+def test_partially_valid_output_reports_bad_fields_only():
+    raw = dict(VALID, confidence=150, tp_price='n/a', execution_mode='STOP')
+    del raw['sl_price']
+    raw['analysis'] = {'interaction_zone': 'demand'}
+
+    clean, errors = VALIDATOR.validate(raw)
+    assert set(errors) == {
+        'confidence', 'tp_price', 'execution_mode', 'sl_price',
+        'analysis.zone_reaction', 'analysis.price_vs_pivot',
+    }
+    assert errors['sl_price'] == 'wajib ada'
+    for field in ('confidence', 'tp_price', 'execution_mode', 'sl_price'):
+        assert field not in clean
+    assert clean['decision'] == 'BUY' and clean['entry_price'] == 100.5
+    assert clean['analysis'] == {'interaction_zone': 'demand'}
+
+
+def test_non_object_output():
+    clean, errors = VALIDATOR.validate(['BUY'])
+    assert clean == {} and errors == {'$': 'harus object'}
+
+
+def test_sub_schema_only_requires_bad_fields():
+    schema = sub_schema(DECISION_SCHEMA, ['tp_price', 'sl_price'])
+    assert schema['required'] == ['tp_price', 'sl_price']
+    assert set(schema['properties']) == {'tp_price', 'sl_price'}
+    assert CompiledSchema(schema).validate({'tp_price': 1, 'sl_price': 2}) == ({'tp_price': 1.0, 'sl_price': 2.0}, {})
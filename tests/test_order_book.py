@@ -0,0 +1,80 @@
+import pytest
+
+from src.modules.order_book import LocalOrderBook
+
+SNAPSHOT = {
+    'lastUpdateId': 100,
+    'bids': [['99', '1'], ['98', '2'], ['95', '10']],  # REST: descending
+    'asks': [['101', '1'], ['102', '3'], ['110', '5']],
+}
+
+
+def _book():
+    book = LocalOrderBook('BTC/USDT')
+    assert book.load_snapshot(SNAPSHOT)
+    return book
+
+
+def _diff(first, final, prev=None, bids=(), asks=()):
+    payload = {'U': first, 'u': final, 'E': 1, 'b': [list(b) for b in bids], 'a': [list(a) for a in asks]}
+    if prev is not None:
+        payload['pu'] = prev
+    return payload
+
+
+def test_stale_event_is_dropped():
+    book = _book()
+    assert book.apply_diff(_diff(90, 99, bids=[('99', '50')]))
+    assert book.bid_qtys[-1] == 1.0
+    assert book.last_update_id == 100
+
+
+def test_first_event_must_bridge_snapshot():
+    book = _book()
+    assert book.apply_diff(_diff(105, 110)) is False
+
+
+def test_pu_gap_returns_false():
+    book = _book()
+    assert book.apply_diff(_diff(95, 105))
+    assert book.apply_diff(_diff(106, 107, prev=105))
+    assert book.apply_diff(_diff(109, 110, prev=108)) is False
+
+
+def test_zero_quantity_deletes_level_and_new_level_is_sorted():
+    book = _book()
+    assert book.apply_diff(_diff(95, 105, bids=[('99', '0'), ('97', '4')], asks=[('100.5', '2')]))
+    assert book.bid_prices.tolist() == [95.0, 97.0, 98.0]
+    assert book.bid_qtys.tolist() == [10.0, 4.0, 2.0]
+    assert book.best_bid() == 98.0
+    assert book.best_ask() == 100.5
+
+
+def test_buffered_replay_with_gap_resets_book():
+    book = LocalOrderBook('BTC/USDT')
+    book.buffer_event(_diff(95, 105))
+    book.buffer_event(_diff(107, 108, prev=106))
+    assert book.load_snapshot(SNAPSHOT) is False
+    assert not book.is_ready()
+
+
+def test_band_depth_and_imbalance_match_hand_computed_book():
+    book = _book()
+    features = book.compute_features([0.005, 0.025], wall_multiplier=5.0)
+
+    assert features['mid_price'] == 100.0
+    assert features['weighted_mid'] == 100.0
+    assert features['spread'] == 2.0
+    assert features['spread_bps'] == pytest.approx(200.0)
+
+    narrow, wide = features['bands']
+    # ±0.5% -> [99.5, 100.5]: tidak ada level
+    assert (narrow['bids_vol_usdt'], narrow['asks_vol_usdt'], narrow['imbalance_pct']) == (0.0, 0.0, 0.0)
+    # ±2.5% -> [97.5, 102.5]: bids 99*1 + 98*2 = 295, asks 101*1 + 102*3 = 407
+    assert wide['bids_vol_usdt'] == pytest.approx(295.0)
+    assert wide['asks_vol_usdt'] == pytest.approx(407.0)
+    assert wide['imbalance_pct'] == pytest.approx((295 - 407) / 702 * 100)
+    assert book.depth_in_band(0.025) == pytest.approx((295.0, 407.0))
+
+    assert features['bid_wall'] is None and features['ask_wall'] is None
+    assert features['levels'] == 6
@@ -0,0 +1,54 @@
+import asyncio
+
+import config
+import src.main as bot
+
+
+class FakeExecutor:
+    def __init__(self, tracker):
+        self.safety_orders_tracker = tracker
+        self.position_cache = {}
+        self.synced = 0
+
+    def invalidate_available_balance(self):
+        pass
+
+    async def sync_positions(self):
+        self.synced += 1
+
+
+def _limit_fill(symbol='ETHUSDT', side='BUY', price='2000', qty='0.5'):
+    return {'o': {'s': symbol, 'X': 'FILLED', 'o': 'LIMIT', 'S': side, 'ap': price, 'q': qty, 'rp': '0', 'T': 1700000000000}}
+
+
+def _drive(monkeypatch, tracker, payload):
+    messages = []
+
+    async def fake_tele(msg, *args, **kwargs):
+        messages.append(msg)
+
+    ex = FakeExecutor(tracker)
+    monkeypatch.setattr(bot, 'executor', ex)
+    monkeypatch.setattr(bot, 'kirim_tele', fake_tele)
+    asyncio.run(bot.order_update_cb(payload))
+    return ex, messages
+
+
+def test_entry_fill_without_ai_setup_uses_atr_fallback(monkeypatch):
+    tracker = {'ETH/USDT': {'status': 'WAITING_ENTRY', 'atr_value': 10.0}}
+    ex, messages = _drive(monkeypatch, tracker, _limit_fill(side='SELL'))
+
+    assert ex.synced == 1
+    assert ex.safety_orders_tracker['ETH/USDT']['filled_at'] == 1700000000.0
+    [msg] = messages
+    assert f"TP: {2000 - 10 * config.ATR_MULTIPLIER_TP1:.4f}" in msg
+    assert f"SL: {2000 + 10 * config.TRAP_SAFETY_SL:.4f}" in msg
+    assert f"R:R: 1:{config.ATR_MULTIPLIER_TP1 / config.TRAP_SAFETY_SL:.2f}" in msg
+
+
+def test_entry_fill_without_tracker_still_notifies(monkeypatch):
+    ex, messages = _drive(monkeypatch, {}, _limit_fill())
+
+    assert ex.synced == 1
+    [msg] = messages
+    assert "TP: -" in msg and "SL: -" in msg and "R:R: -" in msg
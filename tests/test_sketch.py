@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+import config
+from src.modules.whale_threshold import WhaleThreshold
+from src.utils.sketch import QuantileSketch
+
+ALPHA = 0.02
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def _sample(seed=7, n=50_000):
+    return np.random.default_rng(seed).lognormal(mean=8, sigma=2, size=n)
+
+
+def _sketch(values, alpha=ALPHA):
+    sketch = QuantileSketch(alpha=alpha)
+    for v in values:
+        sketch.add(float(v))
+    return sketch
+
+
+@pytest.mark.parametrize('q', QUANTILES)
+def test_quantile_within_relative_error(q):
+    data = _sample()
+    exact = np.quantile(data, q, method='inverted_cdf')
+    assert abs(_sketch(data).quantile(q) - exact) <= ALPHA * exact
+
+
+def test_empty_and_out_of_range():
+    sketch = QuantileSketch(alpha=ALPHA, min_value=1.0, max_value=1e6)
+    assert sketch.quantile(0.5) is None
+    sketch.add(0.01)
+    sketch.add(1e9)
+    assert sketch.quantile(0.0) <= 1.0 * (1 + ALPHA)   # Di bawah rentang -> bucket pertama
+    assert sketch.quantile(1.0) >= 1e6 * (1 - ALPHA)   # Di atas rentang -> bucket terakhir
+
+
+def test_merge_equals_sketch_of_union():
+    data = _sample()
+    left, right = _sketch(data[:20_000]), _sketch(data[20_000:])
+    merged = left.merge(right)
+    full = _sketch(data)
+    assert merged.total == full.total
+    assert merged.counts == full.counts
+    for q in QUANTILES:
+        assert merged.quantile(q) == full.quantile(q)
+
+
+def test_merge_rejects_different_resolution():
+    with pytest.raises(ValueError):
+        QuantileSketch(alpha=0.02).merge(QuantileSketch(alpha=0.01))
+
+
+def test_decay_shifts_toward_recent_regime():
+    sketch = _sketch(np.full(1000, 1_000.0))
+    sketch.decay(0.5)
+    assert sketch.total == pytest.approx(500)
+    assert sketch.quantile(0.5) == pytest.approx(1_000, rel=ALPHA)
+
+    for _ in range(1000):
+        sketch.add(100_000.0)
+    # Bobot lama 500 vs baru 1000 -> median pindah ke rezim baru
+    assert sketch.quantile(0.5) == pytest.approx(100_000, rel=ALPHA)
+    sketch.decay(0.0)
+    assert sketch.total == 0 and sketch.quantile(0.5) is None
+
+
+def test_checkpoint_round_trip():
+    sketch = _sketch(_sample(n=5_000))
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    for q in QUANTILES:
+        assert restored.quantile(q) == sketch.quantile(q)
+
+
+@pytest.fixture
+def whale(monkeypatch):
+    monkeypatch.setattr(config, 'WHALE_THRESHOLD_MODE', 'quantile')
+    monkeypatch.setattr(config, 'WHALE_THRESHOLD_USDT', 200_000)
+    monkeypatch.setattr(config, 'WHALE_MIN_USDT', 50_000)
+    monkeypatch.setattr(config, 'WHALE_SKETCH_MIN_COUNT', 1000)
+    monkeypatch.setattr(config, 'WHALE_SKETCH_REFRESH_TRADES', 100)
+    return WhaleThreshold()
+
+
+def test_fixed_threshold_until_enough_samples(whale):
+    symbol = 'ETH/USDT'
+    for _ in range(999):
+        whale.observe(symbol, 10.0)
+    assert symbol not in whale.thresholds
+    assert whale.observe(symbol, 150_000) is False   # < WHALE_THRESHOLD_USDT
+    assert whale.observe(symbol, 200_000) is True
+
+
+def test_adaptive_threshold_floor(whale):
+    symbol = 'ETH/USDT'
+    for v in _sample(seed=1, n=2_000) / 100:   # Trade kecil: persentil tinggi jauh di bawah lantai
+        whale.observe(symbol, float(v))
+    assert whale.thresholds[symbol] == config.WHALE_MIN_USDT
+    assert whale.observe(symbol, 60_000) is True     # Di atas lantai walau < WHALE_THRESHOLD_USDT
+    assert whale.observe(symbol, 40_000) is False
+
+
+def test_adaptive_threshold_follows_quantile(whale):
+    symbol = 'ETH/USDT'
+    data = _sample(seed=3, n=5_000) * 10
+    for v in data:
+        whale.observe(symbol, float(v))
+    q = whale.quantile_for(symbol)
+    expected = np.quantile(data, q, method='inverted_cdf')
+    assert expected > config.WHALE_MIN_USDT
+    assert whale.thresholds[symbol] == pytest.approx(expected, rel=2 * ALPHA)
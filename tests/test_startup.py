@@ -0,0 +1,17 @@
+import config
+from benchmarks import startup
+
+# Library berat yang wajib lazy (di-import saat pertama dipakai, bukan saat startup)
+HEAVY_MODULES = ('pandas_ta', 'scipy', 'mplfinance', 'openai')
+
+
+def test_cold_start_within_budget_and_heavy_libs_lazy():
+    # report() menjalankan `import src.main` di subprocess bersih (cwd = root repo)
+    result = startup.report(runs=1)
+
+    budget = getattr(config, 'STARTUP_IMPORT_BUDGET', 2.0)
+    assert result['wall_seconds'] <= budget, f"cold-start {result['wall_seconds']:.3f}s > budget {budget:.3f}s"
+
+    lazy = set(HEAVY_MODULES) | set(getattr(config, 'STARTUP_LAZY_MODULES', []))
+    eager = sorted(m for m in lazy if m in result['imported'])
+    assert not eager, f"ter-import saat startup: {eager}"
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+import config
+from src.utils.helper import TelegramDispatcher
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    monkeypatch.setattr(config, 'TELEGRAM_TOKEN', 'token')
+    monkeypatch.setattr(config, 'TELEGRAM_CHAT_ID', '42')
+    monkeypatch.setattr(config, 'TELEGRAM_MESSAGE_THREAD_ID', None)
+    monkeypatch.setattr(config, 'TELEGRAM_MIN_INTERVAL', 60)
+    dispatcher = TelegramDispatcher()
+    dispatcher.sent = []
+
+    async def fake_send(lane, text):
+        dispatcher.sent.append(text)
+        return True
+    dispatcher._send = fake_send
+    return dispatcher
+
+
+def _pending_texts(dispatcher):
+    return [text for *_, text in dispatcher.drain_pending()]
+
+
+def test_message_waiting_on_rate_limit_survives_shutdown(dispatcher):
+    async def scenario():
+        dispatcher.enqueue('first')
+        dispatcher.enqueue('trade closed')
+        dispatcher.enqueue('last')
+        await asyncio.sleep(0.05)  # 'first' terkirim, 'trade closed' menunggu rate limit 60 detik
+        assert dispatcher.sent == ['first']
+        await dispatcher.close()
+
+    asyncio.run(scenario())
+    assert _pending_texts(dispatcher) == ['trade closed', 'last']
+    assert _pending_texts(dispatcher) == []
+
+
+def test_message_mid_send_survives_cancel(dispatcher):
+    started = []
+
+    async def hanging_send(lane, text):
+        started.append(text)
+        await asyncio.sleep(60)
+    dispatcher._send = hanging_send
+
+    async def scenario():
+        dispatcher.enqueue('crash alert', priority='high')
+        await asyncio.sleep(0.05)
+        assert started == ['crash alert']
+        [lane] = dispatcher._lanes.values()
+        lane.task.cancel()  # Sama seperti asyncio.run() meng-cancel task saat shutdown
+        await asyncio.gather(lane.task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert _pending_texts(dispatcher) == ['crash alert']
+
+
+def test_close_closes_pooled_session(dispatcher):
+    async def scenario():
+        session = await dispatcher._get_session()
+        await dispatcher.close()
+        return session
+
+    assert asyncio.run(scenario()).closed